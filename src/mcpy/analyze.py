@@ -0,0 +1,268 @@
+'''
+Module for estimating how many commands a datapack runs each tick.
+
+Functions are read from the generated files of a build and linked by their `function` commands, `execute ... run function` commands and function tags into a call graph starting at `#minecraft:tick`. The cost of a function is the worst case number of commands it runs, including the functions it calls, assuming every condition passes.
+
+The entity selectors of each function are counted too, and `@e` selectors that check every loaded entity in a function run each tick are reported.
+
+Attributes:
+    MAX_COMMAND_CHAIN_LENGTH (int): Default of the `maxCommandChainLength` game rule
+'''
+from __future__ import annotations
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+import json
+import re
+
+from .cmd.selector import find_selectors, is_unbounded
+from .passes.util import FUNCTION_REF_PATTERN, function_resource, function_tag_resource, is_function_path, is_function_tag_path
+
+MAX_COMMAND_CHAIN_LENGTH = 65536
+TICK_TAG = "#minecraft:tick"
+# runs the rest of the command once for every player or entity, unless limited to one
+_FANOUT_PATTERN = re.compile(r"(?:^|\s)(?:as|at) @[ae](?!\[[^\]]*\blimit=1\b)")
+
+
+@dataclass
+class Call:
+    '''A call from one function to a function or function tag
+
+    Attributes:
+        target: resource location of the called function or function tag
+        weight: number of times the call runs each time the calling function runs
+    '''
+
+    target: str
+    weight: int = 1
+
+
+@dataclass
+class FunctionNode:
+    '''A function or function tag in the call graph
+
+    Attributes:
+        resource: resource location, function tags start with `#`
+        commands: number of commands run by the function itself, counting the commands repeated per entity
+        calls: calls to other functions and function tags, values of a function tag
+        cost: worst case number of commands run including the called functions
+        recursive: whether the function can call itself, in which case its cost counts a single call
+        selectors: number of times each entity selector is used by the function itself
+    '''
+
+    resource: str
+    commands: int = 0
+    calls: list[Call] = field(default_factory=list)
+    cost: int = 0
+    recursive: bool = False
+    selectors: Counter = field(default_factory=Counter)
+
+
+@dataclass
+class Analysis:
+    '''Estimated commands per tick of a datapack
+
+    Attributes:
+        functions: functions and function tags reachable from `#minecraft:tick` by resource location
+        commands_per_tick: worst case number of commands run each tick
+        problems: descriptions of the functions over the budget and the call chains over the command chain limit
+        warnings: descriptions of the unbounded `@e` selectors, which are problems in strict mode
+    '''
+
+    functions: dict[str, FunctionNode]
+    commands_per_tick: int
+    problems: list[str]
+    warnings: list[str] = field(default_factory=list)
+
+
+def call_graph(files: dict[Path, str], entities: int = 1) -> dict[str, FunctionNode]:
+    """Build the call graph of every function and function tag of a datapack
+
+    Args:
+        files: content of the datapack's files by path relative to the datapack root, e.g. `MemoryOutput.files`
+        entities: number of entities assumed to match selectors like `@e` and `@a` in `execute as/at`
+
+    Returns:
+        Dict of the resource location of each function and function tag to its node, with costs computed
+    """
+    graph = {}
+    for path, content in files.items():
+        if is_function_path(path):
+            node = FunctionNode(function_resource(path))
+            for line in content.splitlines():
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                weight = entities if _FANOUT_PATTERN.search(line) else 1
+                node.commands += weight
+                if "@" in line:
+                    node.selectors.update(find_selectors(line))
+                for match in FUNCTION_REF_PATTERN.finditer(line):
+                    # scheduled functions run on a later tick
+                    if not line[: match.start()].endswith("schedule "):
+                        node.calls.append(Call(match.group(1), weight))
+        elif is_function_tag_path(path):
+            node = FunctionNode(function_tag_resource(path))
+            for value in json.loads(content).get("values", []):
+                value = value["id"] if isinstance(value, dict) else value
+                node.calls.append(Call(value))
+        else:
+            continue
+        graph[node.resource] = node
+
+    visiting = set()
+
+    def cost(node: FunctionNode) -> int:
+        if node.resource in visiting:
+            node.recursive = True
+            return 0
+        if node.cost:
+            return node.cost
+        visiting.add(node.resource)
+        total = node.commands
+        for call in node.calls:
+            callee = graph.get(call.target)
+            if callee is not None:
+                total += call.weight * cost(callee)
+        visiting.discard(node.resource)
+        node.cost = total
+        return total
+
+    for node in graph.values():
+        cost(node)
+    return graph
+
+
+def analyze(files: dict[Path, str], budget: int = None, max_chain_length: int = MAX_COMMAND_CHAIN_LENGTH, entities: int = 1, strict: bool = False) -> Analysis:
+    """Estimate the commands a datapack runs each tick and find the functions that run too many
+
+    Args:
+        files: content of the datapack's files by path relative to the datapack root, e.g. `MemoryOutput.files`
+        budget: maximum number of commands a tick function may run including its calls, None for no limit
+        max_chain_length: maximum number of commands of one function run from `#minecraft:tick`
+        entities: number of entities assumed to match selectors like `@e` and `@a` in `execute as/at`
+        strict: also count unbounded `@e` selectors in the functions run each tick as problems
+
+    Returns:
+        The analysis of the functions reachable from `#minecraft:tick`
+
+    Example:
+        ``` python
+        output = MemoryOutput()
+        build(builder, Path("my_pack"), output=output)
+        analysis = analyze(output.files, budget=1000)
+        print(format_analysis(analysis))
+        ```
+    """
+    graph = call_graph(files, entities)
+    reachable = {}
+    pending = [TICK_TAG] if TICK_TAG in graph else []
+    while pending:
+        resource = pending.pop()
+        if resource in reachable or resource not in graph:
+            continue
+        reachable[resource] = graph[resource]
+        pending.extend(call.target for call in graph[resource].calls)
+
+    problems = []
+    if budget is not None:
+        for node in sorted(reachable.values(), key=lambda n: -n.cost):
+            if node.cost > budget:
+                problems.append(f"{node.resource} runs up to {node.cost:,} commands, over the budget of {budget:,}")
+    tick = graph.get(TICK_TAG)
+    if tick is not None:
+        # every function of the tick tag starts its own command chain
+        for call in _tag_functions(tick, graph):
+            node = graph[call]
+            if node.cost > max_chain_length:
+                path = " -> ".join(_heaviest_path(node, graph))
+                problems.append(
+                    f"{node.resource} runs up to {node.cost:,} commands in one chain, over the maxCommandChainLength of {max_chain_length:,}: {path}"
+                )
+    warnings = []
+    for node in reachable.values():
+        for selector, count in sorted(node.selectors.items()):
+            if is_unbounded(selector):
+                warnings.append(
+                    f"{node.resource} uses {selector} {count} time(s), which checks every loaded entity each tick. Add a type, limit or distance"
+                )
+    if strict:
+        problems.extend(warnings)
+    return Analysis(reachable, tick.cost if tick is not None else 0, problems, warnings)
+
+
+def _tag_functions(tag: FunctionNode, graph: dict[str, FunctionNode]) -> list[str]:
+    '''Get the functions of a function tag, including those of the tags it lists'''
+    functions = []
+    for call in tag.calls:
+        node = graph.get(call.target)
+        if node is None:
+            continue
+        if node.resource.startswith("#"):
+            functions.extend(_tag_functions(node, graph))
+        else:
+            functions.append(node.resource)
+    return functions
+
+
+def _heaviest_path(node: FunctionNode, graph: dict[str, FunctionNode]) -> list[str]:
+    '''Follow the most expensive call of each function'''
+    path = [node.resource]
+    while True:
+        calls = [(call.weight * graph[call.target].cost, call.target) for call in node.calls if call.target in graph]
+        calls = [c for c in calls if c[1] not in path]
+        if not calls:
+            return path
+        node = graph[max(calls)[1]]
+        path.append(node.resource)
+
+
+def to_json(analysis: Analysis) -> dict:
+    '''Get the weighted call graph of an analysis as a JSON serializable dict'''
+    return {
+        "commands_per_tick": analysis.commands_per_tick,
+        "problems": analysis.problems,
+        "functions": {
+            node.resource: {
+                "commands": node.commands,
+                "cost": node.cost,
+                "recursive": node.recursive,
+                "selectors": dict(sorted(node.selectors.items())),
+                "calls": [{"target": call.target, "weight": call.weight} for call in node.calls],
+            }
+            for node in analysis.functions.values()
+        },
+    }
+
+
+def to_dot(analysis: Analysis) -> str:
+    '''Get the weighted call graph of an analysis in the Graphviz DOT format'''
+    lines = ["digraph mcpy {", "    node [shape=box];"]
+    for node in analysis.functions.values():
+        lines.append(f'    "{node.resource}" [label="{node.resource}\\n{node.cost:,} commands"];')
+    for node in analysis.functions.values():
+        for call in node.calls:
+            if call.target in analysis.functions:
+                label = f' [label="x{call.weight}"]' if call.weight != 1 else ""
+                lines.append(f'    "{node.resource}" -> "{call.target}"{label};')
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def format_analysis(analysis: Analysis, limit: int = 20) -> str:
+    '''Format an analysis as a table of the most expensive functions followed by its problems'''
+    if not analysis.functions:
+        return f"No {TICK_TAG} function tag"
+    lines = [
+        f"Worst case commands per tick: {analysis.commands_per_tick:,}",
+        f'{"function":<60} {"commands":>10} {"cost":>12} {"selectors":>10}',
+    ]
+    nodes = sorted(analysis.functions.values(), key=lambda n: -n.cost)
+    for node in nodes[:limit]:
+        name = f"{node.resource} (recursive)" if node.recursive else node.resource
+        lines.append(f"{name:<60} {node.commands:>10,} {node.cost:>12,} {sum(node.selectors.values()):>10,}")
+    if len(nodes) > limit:
+        lines.append(f"... {len(nodes) - limit} more")
+    lines.extend(f"Warning: {w}" for w in analysis.warnings if w not in analysis.problems)
+    lines.extend(analysis.problems)
+    return "\n".join(lines)
@@ -0,0 +1,359 @@
+'''
+Module for benchmarking datapack generation with synthetic packs.
+
+Each benchmark builds a generated datapack to an output backend that only counts what it receives, so the numbers reflect the time spent generating commands rather than disk speed.
+
+Attributes:
+    BENCHMARKS (dict[str, Benchmark]): Registered benchmarks by name
+'''
+from __future__ import annotations
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Iterable
+import gc
+import json
+import tempfile
+import time
+import tracemalloc
+
+from .context import write
+from .context_managers import namespace, directory
+from .decorators import mcfunction
+from .output import OutputBackend, OutputFile
+from .config import load_default_config
+from .mcpy import build
+from .stats import count_commands
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    '''A synthetic datapack to time
+
+    Attributes:
+        name: name of the benchmark
+        description: what the benchmark exercises
+        size: size of the pack at scale 1, e.g. number of functions or commands
+        builder_factory: function returning the datapack builder function for a given size
+    '''
+
+    name: str
+    description: str
+    size: int
+    builder_factory: Callable[[int], Callable]
+
+
+@dataclass
+class BenchmarkResult:
+    '''Measurements of a single benchmark run
+
+    Attributes:
+        name: name of the benchmark
+        size: size the pack was generated with
+        seconds: fastest build time
+        commands: number of commands generated
+        files: number of files generated
+        commands_per_sec: commands generated per second
+        files_per_sec: files generated per second
+        peak_memory: peak memory allocated while building in bytes, None if not measured
+    '''
+
+    name: str
+    size: int
+    seconds: float
+    commands: int
+    files: int
+    commands_per_sec: float
+    files_per_sec: float
+    peak_memory: int = None
+
+
+class CountingOutput(OutputBackend):
+    '''Output backend that only counts the generated files and commands, the same way as `BuildStats`'''
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.commands = 0
+
+    def flush(self, files: dict[Path, OutputFile]) -> None:
+        self.files = len(files)
+        self.commands = 0
+        for path, f in files.items():
+            if path.suffix == ".mcfunction":
+                self.commands += count_commands(f.getvalue())
+
+
+def benchmark(name: str, size: int) -> Callable:
+    """Decorator to register a benchmark
+
+    The decorated function takes the size of the pack and returns its datapack builder function.
+
+    Args:
+        name: name of the benchmark
+        size: size of the pack at scale 1
+
+    Example:
+        ``` python
+        @benchmark("tiny_functions", size=10_000)
+        def tiny_functions(size: int):
+            def builder():
+                with namespace("bench"):
+                    for i in range(size):
+                        @mcfunction(name=f"fn_{i}")
+                        def _fn():
+                            yield f"say {i}"
+            return builder
+        ```
+    """
+
+    def decorator(factory: Callable[[int], Callable]) -> Callable[[int], Callable]:
+        BENCHMARKS[name] = Benchmark(name, (factory.__doc__ or "").strip(), size, factory)
+        return factory
+
+    return decorator
+
+
+def run_benchmark(bench: Benchmark, scale: float = 1.0, repeat: int = 1, memory: bool = True) -> BenchmarkResult:
+    """Build a benchmark's pack and measure it
+
+    Args:
+        bench: benchmark to run
+        scale: multiplier of the benchmark's size
+        repeat: number of timed builds, the fastest is reported
+        memory: also measure peak memory in an extra build, which is slower because allocations are traced
+
+    Returns:
+        The measurements
+    """
+    size = max(1, int(bench.size * scale))
+    config = load_default_config()
+    seconds = None
+    output = CountingOutput()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for _ in range(repeat):
+            builder = bench.builder_factory(size)
+            gc.collect()
+            start = time.perf_counter()
+            build(builder, Path(tmp_dir), config=config, output=output)
+            elapsed = time.perf_counter() - start
+            seconds = elapsed if seconds is None else min(seconds, elapsed)
+        peak_memory = None
+        if memory:
+            builder = bench.builder_factory(size)
+            gc.collect()
+            tracemalloc.start()
+            try:
+                build(builder, Path(tmp_dir), config=config, output=CountingOutput())
+                peak_memory = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return BenchmarkResult(
+        name=bench.name,
+        size=size,
+        seconds=seconds,
+        commands=output.commands,
+        files=output.files,
+        commands_per_sec=output.commands / seconds if seconds else 0.0,
+        files_per_sec=output.files / seconds if seconds else 0.0,
+        peak_memory=peak_memory,
+    )
+
+
+def run_benchmarks(names: Iterable[str] = None, scale: float = 1.0, repeat: int = 1, memory: bool = True) -> list[BenchmarkResult]:
+    """Run the given benchmarks, defaults to all registered benchmarks
+
+    Raises:
+        KeyError: if a benchmark name is not registered
+    """
+    names = list(names) if names else list(BENCHMARKS)
+    return [run_benchmark(BENCHMARKS[name], scale, repeat, memory) for name in names]
+
+
+def save_results(results: list[BenchmarkResult], path: Path) -> None:
+    '''Write benchmark results to a JSON baseline file'''
+    data = {"benchmarks": {r.name: asdict(r) for r in results}}
+    Path(path).write_text(json.dumps(data, indent=2, sort_keys=True))
+
+
+def load_results(path: Path) -> dict[str, BenchmarkResult]:
+    '''Read a JSON baseline file written by `save_results`'''
+    data = json.loads(Path(path).read_text())
+    return {name: BenchmarkResult(**r) for name, r in data["benchmarks"].items()}
+
+
+def compare_results(results: list[BenchmarkResult], baseline: dict[str, BenchmarkResult], tolerance: float = 0.25) -> dict[str, list[str]]:
+    """Compare results to a baseline
+
+    Benchmarks are only compared to a baseline of the same size.
+
+    Args:
+        results: results of the current run
+        baseline: results of a previous run by benchmark name
+        tolerance: allowed fraction of throughput loss or memory growth before it counts as a regression
+
+    Returns:
+        Dict of the names of the regressed benchmarks to a description of each regression
+    """
+    regressions = {}
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None or previous.size != result.size:
+            continue
+        problems = []
+        for metric in ("commands_per_sec", "files_per_sec"):
+            old, new = getattr(previous, metric), getattr(result, metric)
+            if old and new < old * (1 - tolerance):
+                problems.append(f"{metric} {old:,.1f} -> {new:,.1f}")
+        if previous.peak_memory and result.peak_memory and result.peak_memory > previous.peak_memory * (1 + tolerance):
+            problems.append(f"peak_memory {previous.peak_memory:,} -> {result.peak_memory:,}")
+        if problems:
+            regressions[result.name] = problems
+    return regressions
+
+
+def format_results(results: list[BenchmarkResult], baseline: dict[str, BenchmarkResult] = None) -> str:
+    '''Format results as a table, with the throughput relative to the baseline if given'''
+    lines = [
+        f'{"benchmark":<24} {"size":>10} {"seconds":>9} {"commands/s":>12} {"files/s":>10} {"peak MiB":>9} {"vs baseline":>12}'
+    ]
+    for r in results:
+        memory = f"{r.peak_memory / 2**20:.1f}" if r.peak_memory is not None else "-"
+        relative = "-"
+        previous = (baseline or {}).get(r.name)
+        if previous is not None and previous.size == r.size and previous.seconds:
+            relative = f"{previous.seconds / r.seconds:.2f}x"
+        lines.append(
+            f"{r.name:<24} {r.size:>10,} {r.seconds:>9.3f} {r.commands_per_sec:>12,.0f} {r.files_per_sec:>10,.0f} {memory:>9} {relative:>12}"
+        )
+    return "\n".join(lines)
+
+
+@benchmark("tiny_functions", size=10_000)
+def tiny_functions(size: int) -> Callable:
+    '''Many functions with a single command each'''
+
+    def builder():
+        with namespace("bench"):
+            for i in range(size):
+                @mcfunction(name=f"fn_{i}")
+                def _fn():
+                    yield f"say {i}"
+
+    return builder
+
+
+@benchmark("huge_function", size=1_000_000)
+def huge_function(size: int) -> Callable:
+    '''One function with a very large number of commands'''
+
+    def builder():
+        with namespace("bench"):
+            @mcfunction
+            def huge():
+                for i in range(size):
+                    yield f"scoreboard players add $i bench {i}"
+
+    return builder
+
+
+@benchmark("nested_execute", size=500)
+def nested_execute(size: int) -> Callable:
+    '''Deeply nested execute blocks that each spill into generated functions'''
+    from .cmd.exec import execute
+
+    def nested(depth: int):
+        with execute(f"if score $depth bench matches {depth}"):
+            for i in range(4):
+                write(f"say {depth} {i}")
+            if depth < 8:
+                nested(depth + 1)
+
+    def builder():
+        with namespace("bench"):
+            for i in range(size):
+                @mcfunction(name=f"fn_{i}")
+                def _fn():
+                    nested(0)
+
+    return builder
+
+
+@benchmark("spilled_execute", size=200_000)
+def spilled_execute(size: int) -> Callable:
+    '''One execute block with enough lines to spill into a single large generated function'''
+    from .cmd.exec import execute
+
+    def builder():
+        with namespace("bench"):
+            @mcfunction
+            def spilled():
+                with execute("as @a"):
+                    for i in range(size):
+                        yield f"scoreboard players add @s bench {i}"
+
+    return builder
+
+
+@benchmark("context_scopes", size=5_000)
+def context_scopes(size: int) -> Callable:
+    '''Small functions in nested namespaces, directories and inline execute blocks'''
+    from .cmd.exec import execute
+
+    def builder():
+        for i in range(size):
+            with namespace(f"bench{i % 10}"), directory("a"), directory(f"b{i % 7}"):
+                @mcfunction(name=f"fn_{i}")
+                def _fn():
+                    with execute("as @a"), execute("at @s"):
+                        yield f"say {i}"
+                        yield f"say {i + 1}"
+
+    return builder
+
+
+@benchmark("scoped_vars", size=2_000)
+def scoped_vars(size: int) -> Callable:
+    '''Scoped functions passing and copying storage variables'''
+    from .cmd.vars import Var, scoped_mcfunction, arg0, ret_var
+
+    def builder():
+        with namespace("bench"):
+            @scoped_mcfunction
+            def add_one():
+                value = arg0.to_score()
+                value.add(1)
+                ret_var.set_from_score(value)
+
+            for i in range(size):
+                @scoped_mcfunction(name=f"fn_{i}")
+                def _fn():
+                    a = Var().set(i)
+                    b = a.copy()
+                    c = add_one(b).copy()
+                    ret_var.set(c)
+
+    return builder
+
+
+@benchmark("nbt_literals", size=2_000)
+def nbt_literals(size: int) -> Callable:
+    '''Storage set to large nested NBT compounds and lists'''
+    from .cmd.data import StoragePath
+
+    item = {
+        "id": "minecraft:diamond_sword",
+        "Count": 1,
+        "tag": {"Enchantments": [{"id": "sharpness", "lvl": 5}, {"id": "unbreaking", "lvl": 3}]},
+    }
+    literal = {"items": [dict(item, Slot=slot) for slot in range(27)], "name": "chest", "open": True}
+
+    def builder():
+        with namespace("bench"):
+            with directory("nbt"):
+                for i in range(size):
+                    @mcfunction(name=f"fn_{i}")
+                    def _fn():
+                        StoragePath(f"chest{i}", "bench:data").set(literal)
+
+    return builder
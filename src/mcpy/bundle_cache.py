@@ -0,0 +1,111 @@
+'''
+Module for caching bundled dependency datapacks between builds.
+
+Bundles are stored in a directory keyed by a hash of everything that goes into them, so unchanged dependencies are not rebuilt and datapacks that include the same library share its bundle.
+
+Attributes:
+    CACHE_DIR_ENV (str): Environment variable that overrides the cache directory
+'''
+from pathlib import Path
+from typing import Callable
+import hashlib
+import os
+import shutil
+
+CACHE_DIR_ENV = "MCPY_CACHE_DIR"
+
+
+def default_cache_dir() -> Path:
+    '''Get the bundle cache directory, `$MCPY_CACHE_DIR` or `~/.cache/mcpy/bundles`'''
+    if os.environ.get(CACHE_DIR_ENV):
+        return Path(os.environ[CACHE_DIR_ENV])
+    return Path.home() / ".cache" / "mcpy" / "bundles"
+
+
+def hash_files(h: "hashlib._Hash", root: Path, pattern: str = "**/*") -> None:
+    """Update a hash with the relative paths and content of the files under a directory
+
+    Args:
+        h: hash to update
+        root: directory to hash the files of
+        pattern: glob pattern of the files to include
+    """
+    for path in sorted(root.glob(pattern)):
+        if path.is_file() and "__pycache__" not in path.parts:
+            h.update(path.relative_to(root).as_posix().encode("utf-8"))
+            h.update(b"\0")
+            h.update(path.read_bytes())
+            h.update(b"\0")
+
+
+class BundleCache:
+    '''Directory of bundled datapacks keyed by content hash
+
+    Example:
+        ``` python
+        cache = BundleCache()
+        entry = cache.get(key)
+        if entry is None:
+            entry = cache.put(key, dep_pack.bundle)
+        ```
+    '''
+
+    def __init__(self, root: Path = None) -> None:
+        self.root = Path(root) if root else default_cache_dir()
+
+    def get(self, key: str, stamp: str = "") -> Path | None:
+        """Get the directory of a cached bundle
+
+        Args:
+            key: cache key of the bundle
+            stamp: value that must match the stamp the bundle was stored with
+
+        Returns:
+            The bundle directory or None if it is not cached
+        """
+        path = self.root / key
+        stamp_path = self.root / f"{key}.stamp"
+        if not path.is_dir() or not stamp_path.is_file():
+            return None
+        return path if stamp_path.read_text() == stamp else None
+
+    def put(self, key: str, bundle_fn: Callable[[Path], None], stamp_fn: Callable[[], str] = None) -> Path:
+        """Bundle into the cache
+
+        The bundle is written to a temporary directory first so a failed or concurrent bundle never leaves a partial entry behind.
+
+        Args:
+            key: cache key of the bundle
+            bundle_fn: function that bundles into the given directory
+            stamp_fn: function returning the stamp to store the bundle with, called after bundling
+
+        Returns:
+            The bundle directory
+        """
+        path = self.root / key
+        tmp_path = self.root / f"{key}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+        old_path = self.root / f"{key}.{os.getpid()}.old"
+        try:
+            bundle_fn(tmp_path)
+            stamp = stamp_fn() if stamp_fn else ""
+            try:
+                os.replace(tmp_path, path)
+            except OSError:
+                # move the stale entry aside first, another process may be replacing it at the same time
+                try:
+                    os.replace(path, old_path)
+                except FileNotFoundError:
+                    pass
+                try:
+                    os.replace(tmp_path, path)
+                except OSError:
+                    # another process stored the same key first
+                    if not path.is_dir():
+                        raise
+            (self.root / f"{key}.stamp").write_text(stamp)
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            shutil.rmtree(old_path, ignore_errors=True)
+        return path
@@ -15,6 +15,7 @@ from .scoreboard import Score, score_get
 from .exec import execute
 from ..context import write
 from .tellraw import Tellable
+from ..ir import Command, DataGet, DataModify, DataRemove, Execute
 from typing_extensions import Self
 
 
@@ -111,7 +112,10 @@ class DataPath(NbtPath, DataCondition):
             Self
         """
         write(
-            f"execute store result storage {self} {result_type} {scale} run {next(score_get(score))}"
+            Execute(
+                f"store result storage {self} {result_type} {scale}",
+                next(score_get(score)),
+            )
         )
         return self
 
@@ -274,100 +278,86 @@ def get_target_type(target: TargetType | Value) -> str:
     raise ValueError(f"Unsupported target type: {type(target)}")
 
 
-def data_get(target: TargetType) -> Iterator[str]:
+def data_get(target: TargetType) -> Iterator[Command]:
     """Command template function for "data get ..."
 
     Args:
         target: target path
 
-    Returns:
-        yielded command
+    Yields:
+        the command node
     """
-    target_type = get_target_type(target)
-    yield f"data get {target_type} {target}"
+    yield DataGet(get_target_type(target), target)
 
 
-def data_modify_set(target: TargetType, source: SourceType) -> Iterator[str]:
+def data_modify_set(target: TargetType, source: SourceType) -> Iterator[Command]:
     """Sets the target path to the given source path or value
 
     Args:
         target: target path
         source: source path or value
 
-    Returns:
-        yielded command
+    Yields:
+        the command node
     """
-    target_type = get_target_type(target)
     source = __wrap_source_type(source)
-    source_type = get_target_type(source)
-    if source_type != "value":
-        source_type = "from " + source_type
+    yield DataModify(get_target_type(target), target, "set", get_target_type(source), source)
 
-    yield f"data modify {target_type} {target} set {source_type} {source}"
 
-
-def data_modify_append(target: TargetType, source: SourceType) -> Iterator[str]:
+def data_modify_append(target: TargetType, source: SourceType) -> Iterator[Command]:
     """Command template function for "data modify ... append ..."
 
     Args:
         target: target path
         source: source path or value
 
-    Returns:
-        yielded command
+    Yields:
+        the command node
     """
-    target_type = get_target_type(target)
     source = __wrap_source_type(source)
-    source_type = get_target_type(source)
-    if source_type != "value":
-        source_type = "from " + source_type
-    yield f"data modify {target_type} {target} append {source_type} {source}"
+    yield DataModify(get_target_type(target), target, "append", get_target_type(source), source)
 
 
-def data_modify_merge(target: TargetType, source: SourceType) -> Iterator[str]:
+def data_modify_merge(target: TargetType, source: SourceType) -> Iterator[Command]:
     """Command template function for "data modify ... merge ..."
 
     Args:
         target: target path
         source: source path or value
 
-    Returns:
-        yielded command
+    Yields:
+        the command node
     """
-    target_type = get_target_type(target)
     source = __wrap_source_type(source)
-    source_type = get_target_type(source)
-    if source_type != "value":
-        source_type = "from " + source_type
-    yield f"data modify {target_type} {target} merge {source_type} {source}"
+    yield DataModify(get_target_type(target), target, "merge", get_target_type(source), source)
 
 
-def data_merge(target: TargetType, source: Value) -> Iterator[str]:
+def data_merge(target: TargetType, source: Value) -> Iterator[Command]:
     """Command template function for "data merge ..."
 
     Args:
         target: target path
         source: source path or value
 
-    Returns:
-        yielded command
+    Yields:
+        the command node
     """
     raise NotImplementedError()
 
 
-def data_remove(target: TargetType) -> Iterator[str]:
+def data_remove(target: TargetType) -> Iterator[Command]:
     """Command template function for "data remove ..."
     Args:
         target: target path
 
-    Returns:
-        yielded command
+    Yields:
+        the command node
     """
-    yield f"data remove {get_target_type(target)} {target}"
+    yield DataRemove(get_target_type(target), target)
 
 
 def __wrap_source_type(source: SourceType) -> TargetType | Value:
-    if isinstance(source, (Value, StoragePath, EntityPath, BlockPath)):
+    if isinstance(source, (StoragePath, EntityPath, BlockPath)):
         return source
-    source = as_nbt(source)
-    return source
+    # serialize values now, so changing a dict or list afterwards does not change the written command
+    return Value(str(as_nbt(source)))
@@ -2,7 +2,7 @@
 Module for all execute command container types and functions
 '''
 
-from .util import stringify, tokens_to_str
+from .util import stringify
 from ..context import (
     get_context,
     get_global_context,
@@ -12,19 +12,11 @@ from ..context import (
 )
 from ..context_managers import directory
 from ..decorators import mcfunction
-from pathlib import Path
+from ..trace import span
+from ..ir import Execute, FunctionCall, as_command
 import contextlib
 
 
-def __create_file_name(directory: Path, base_file_name: str) -> str:
-    gen_file_name = None
-    counter = get_global_context().counter
-    while gen_file_name is None or (directory / f"{gen_file_name}.mcfunction").exists():
-        gen_file_name = f'{base_file_name}_{counter["generated_files"]}'
-        counter["generated_files"] += 1
-    return gen_file_name
-
-
 @contextlib.contextmanager
 def execute(*conditions: str, limit: int = 3):
     """Context manager to execute the inner statements with the given conditions
@@ -48,7 +40,7 @@ def execute(*conditions: str, limit: int = 3):
     conditions = stringify(conditions)
     lines_buffer = []
     prev_ctx = get_context()
-    file_name = prev_ctx.get_path().stem
+    file_name = prev_ctx.get_relative_path().stem
     gen_dir_name = get_global_context().config["generated_dir"]
     gen_ctx = None
 
@@ -61,22 +53,19 @@ def execute(*conditions: str, limit: int = 3):
         # always write inline to current mcfunction
         if limit is None:
             with switch_context(prev_ctx):
-                item = tokens_to_str("execute", conditions, "run", item)
-                write(item)
+                write(Execute(conditions, as_command(item)))
         # if already wrote to generated file, continue writing lines to it
         elif gen_ctx:
-            with switch_context(gen_ctx):
-                @mcfunction(name=Path(gen_ctx.file_name).stem, mode="a")
-                def __gen_fn():
-                    write(item)
-
+            gen_ctx.write(item)
         else:
             lines_buffer.append(item)
             if len(lines_buffer) > limit:
-                with directory(gen_dir_name):
+                get_global_context().add_spill(prev_ctx.get_relative_path())
+                with span("execute spill", "execute"), directory(gen_dir_name):
                     # determine file name
-                    gen_file_name = __create_file_name(
-                        get_context().get_path(), file_name
+                    gen_file_name = get_global_context().allocate_name(
+                        get_context().derive(file_name=None).get_relative_path(),
+                        file_name,
                     )
 
                     # write buffer to generated file
@@ -87,25 +76,30 @@ def execute(*conditions: str, limit: int = 3):
                         for line in lines_buffer:
                             write(line)
 
+                    # keep the generated file open for the rest of the block
+                    gen_ctx = gen_ctx.derive(
+                        opened_file=get_global_context().open_file(
+                            gen_ctx.get_relative_path(), "a"
+                        ),
+                    )
+
                     with switch_context(prev_ctx):
                         write(
-                            tokens_to_str(
-                                "execute",
-                                conditions,
-                                "run",
-                                f"function {gen_ctx.get_resource_path()}",
-                            )
+                            Execute(conditions, FunctionCall(gen_ctx.get_resource_path()))
                         )
 
                 lines_buffer = None
 
     with update_context(input_handler=handle):
-        yield
+        try:
+            yield
+        finally:
+            if gen_ctx:
+                gen_ctx.opened_file.close()
     if lines_buffer:
         with switch_context(prev_ctx):
             for line in lines_buffer:
-                line = tokens_to_str("execute", conditions, "run", line)
-                write(line)
+                write(Execute(conditions, as_command(line)))
 
 
 def if_(*conditions: str) -> str:
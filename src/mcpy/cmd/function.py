@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 from .util import CmdObject
+from collections.abc import Iterator
+from ..ir import Command, FunctionCall
 
 @dataclass
 class Function(CmdObject):
@@ -14,7 +16,7 @@ class Fn(Function):
     pass
 
 
-def function(function_resource_path: str):
+def function(function_resource_path: str) -> Iterator[Command]:
     '''Function command'''
-    yield f'function {function_resource_path}'
+    yield FunctionCall(function_resource_path)
 
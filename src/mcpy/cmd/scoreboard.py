@@ -6,7 +6,9 @@ tokens_to_str
 from ..context import write, get_global_context
 from .block import CmdObject
 from .tellraw import Tellable
+from ..ir import Command, ScoreboardPlayers, ScoreboardObjectivesAdd
 from dataclasses import dataclass
+from collections.abc import Iterator
 
 MCPY_SCORE_OBJECTIVE = 'mcpy.var'
 
@@ -69,33 +71,33 @@ class Score(CmdObject, ScoreCondition, Tellable):
         return {"score":{"name":self.holder,"objective":self.objective}}
         
 
-def score_get(score: Score):
+def score_get(score: Score) -> Iterator[Command]:
     '''Command to get a player score'''
-    yield f'scoreboard players get {score}'
+    yield ScoreboardPlayers('get', score)
 
-def score_set(score: Score):
+def score_set(score: Score) -> Iterator[Command]:
     '''Command to set a player score'''
-    yield f'scoreboard players set {score}'
+    yield ScoreboardPlayers('set', score)
 
 
-def score_remove(score: Score, count: int = 1):
+def score_remove(score: Score, count: int = 1) -> Iterator[Command]:
     '''Command to remove an amount from a player score'''
-    yield f'scoreboard players remove {score} {count}'
+    yield ScoreboardPlayers('remove', score, count)
 
-def score_add(score: Score, count: int = 1):
+def score_add(score: Score, count: int = 1) -> Iterator[Command]:
     '''Command to add an amount to a player score'''
-    yield f'scoreboard players add {score} {count}'
+    yield ScoreboardPlayers('add', score, count)
 
-def score_reset(score: Score):
+def score_reset(score: Score) -> Iterator[Command]:
     '''Command to reset the score'''
-    yield f'scoreboard players reset {score}'
+    yield ScoreboardPlayers('reset', score)
 
-def score_enable(score: Score):
+def score_enable(score: Score) -> Iterator[Command]:
     '''Command to enable the score'''
-    yield f'scoreboard players enable {score}'
+    yield ScoreboardPlayers('enable', score)
 
-def score_objectives_add(name: str, type: str = None):
+def score_objectives_add(name: str, type: str = None) -> Iterator[Command]:
     '''Command to add an objective. Type defaults to "dummy"'''
     if type is None:
         type = 'dummy'
-    yield f'scoreboard objectives add {name} {type}'
\ No newline at end of file
+    yield ScoreboardObjectivesAdd(name, type)
\ No newline at end of file
@@ -4,11 +4,33 @@ Module for all entity selector container types and functions
 
 from __future__ import annotations
 from dataclasses import dataclass, field
+from typing import Callable
+import re
 from .util import CmdObject
 from .data import EntityPath
+
+# arguments that narrow down the entities to check come first, arguments that read entity data last
+_ARGUMENT_ORDER = {
+    key: i
+    for i, key in enumerate(
+        (
+            "type", "x", "y", "z", "distance", "dx", "dy", "dz", "limit", "sort",
+            "gamemode", "team", "level", "tag", "name", "x_rotation", "y_rotation",
+            "scores", "advancements", "predicate", "nbt",
+        )
+    )
+}
+_DEFAULT_ARGUMENT_RANK = _ARGUMENT_ORDER["name"]
+_SELECTOR_PATTERN = re.compile(r"@[aeprs](?![\w])")
+# arguments that keep an @e selector from checking every loaded entity
+_BOUNDING_ARGUMENTS = ("type", "limit", "distance", "dx", "dy", "dz")
+
+
 @dataclass
 class Selector(CmdObject):
     '''Base container type for entity selectors
+
+    Arguments are written cheapest first, e.g. `type` and `distance` before `tag`, `scores` and `nbt`, so the game can skip an entity as soon as possible. Repeated arguments keep the order they were added in.
     
     Attributes:
         entity_type: type of entity (e.g. @s, @p)
@@ -48,7 +70,8 @@ class Selector(CmdObject):
                         val_str = '{' + key_equal_value_str(kv_list) + '}'
                     arg_strs.append(f'{key}={val_str}')   
                 return ','.join(arg_strs)
-            result += key_equal_value_str(self.arguments)
+            arguments = sorted(self.arguments, key=lambda a: _ARGUMENT_ORDER.get(a[0], _DEFAULT_ARGUMENT_RANK))
+            result += key_equal_value_str(arguments)
             result += ']'
         return result
 
@@ -57,3 +80,112 @@ CurrentEntity = Selector('@s')
 RandomPlayer = Selector('@r')
 NearestPlayer = Selector('@p')
 Entities = Selector('@e')
+
+
+def find_selectors(command: str) -> list[str]:
+    '''Get the entity selectors of a command, e.g. `execute as @e[type=zombie] run kill @s` -> `["@e[type=zombie]", "@s"]`'''
+    return [command[start:end] for start, end in _selector_spans(command)]
+
+
+def replace_selectors(command: str, replace: Callable[[str, int], str | None]) -> str:
+    """Replace the entity selectors of a command
+
+    Args:
+        command: command to replace selectors in
+        replace: function of a selector and its index in the command returning the new selector, or None to keep it
+
+    Returns:
+        The command with the selectors replaced
+
+    Example:
+        ``` python
+        replace_selectors('kill @e[type=zombie]', lambda s, i: '@e[tag=marked]')
+        # kill @e[tag=marked]
+        ```
+    """
+    parts = []
+    last = 0
+    for start, end in _selector_spans(command):
+        new = replace(command[start:end], start)
+        if new is not None:
+            parts.append(command[last:start])
+            parts.append(new)
+            last = end
+    parts.append(command[last:])
+    return "".join(parts)
+
+
+def _selector_spans(command: str) -> list[tuple[int, int]]:
+    spans = []
+    for match in _SELECTOR_PATTERN.finditer(command):
+        end = match.end()
+        if command.startswith("[", end):
+            end = _closing_bracket(command, end)
+        spans.append((match.start(), end))
+    return spans
+
+
+def is_unbounded(selector: str) -> bool:
+    '''Whether a selector is an `@e` selector that checks every loaded entity, with no type, limit, distance or volume'''
+    if not selector.startswith("@e"):
+        return False
+    for key, value in _selector_arguments(selector):
+        if key not in _BOUNDING_ARGUMENTS:
+            continue
+        # excluding a type or only a minimum distance still checks every entity
+        if key == "type" and value.startswith("!"):
+            continue
+        if key == "distance" and value.endswith(".."):
+            continue
+        return False
+    return True
+
+
+def _closing_bracket(text: str, start: int) -> int:
+    '''Get the index after the bracket closing the one at start, skipping nested brackets and quoted strings'''
+    depth = 0
+    quote = None
+    i = start
+    while i < len(text):
+        c = text[i]
+        if quote:
+            if c == "\\":
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in "\"'":
+            quote = c
+        elif c in "[{":
+            depth += 1
+        elif c in "]}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(text)
+
+
+def _selector_arguments(selector: str) -> list[tuple[str, str]]:
+    '''Split the arguments of a selector into keys and values'''
+    if not selector.endswith("]"):
+        return []
+    body = selector[selector.index("[") + 1 : -1]
+    arguments = []
+    start = 0
+    depth = 0
+    quote = None
+    for i, c in enumerate(body + ","):
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in "\"'":
+            quote = c
+        elif c in "[{":
+            depth += 1
+        elif c in "]}":
+            depth -= 1
+        elif c == "," and depth == 0:
+            key, _, value = body[start:i].partition("=")
+            arguments.append((key.strip(), value.strip()))
+            start = i + 1
+    return arguments
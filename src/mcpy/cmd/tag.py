@@ -4,20 +4,45 @@ Module for all tag command container types and functions
 from __future__ import annotations
 from dataclasses import dataclass
 from .util import CmdObject
-from .selector import Selector
+from .selector import Selector, find_selectors, replace_selectors, _selector_arguments
 from collections.abc import Iterator
-from ..context import write, get_global_context
-
-
-def tag_add(entity_selector: Selector, tag: Tag) -> Iterator[str]:
+from collections import Counter
+from ..context import write, get_context, get_global_context, switch_context, update_context
+from ..ir import Command, TagCommand, as_command
+import contextlib
+import re
+
+# execute subcommands that move where position arguments like distance are measured from
+_MOVES_POSITION = re.compile(r"(?:^|\s)(?:at|positioned|in|rotated|facing|anchored|align)\s")
+_POSITION_ARGUMENTS = re.compile(r"[\[,](?:(?:x|y|z|distance|dx|dy|dz)=|sort=(?!arbitrary))")
+_RETURN = re.compile(r"(?:^|\s)return(?:\s|$)", re.MULTILINE)
+# commands that can change what a selector argument matches, None if any command can
+_FILTER_CHANGES = {
+    "tag": re.compile(r"(?:^|\s)tag\s"),
+    "scores": re.compile(r"(?:^|\s)(?:scoreboard|store|trigger)\s"),
+    "team": re.compile(r"(?:^|\s)team\s"),
+    "name": re.compile(r"(?:^|\s)data\s"),
+    "gamemode": re.compile(r"(?:^|\s)gamemode\s"),
+    "level": re.compile(r"(?:^|\s)(?:xp|experience)\s"),
+    "advancements": re.compile(r"(?:^|\s)advancement\s"),
+    "nbt": None,
+    "predicate": None,
+}
+# called functions and macro lines can run any command
+_ANY_CHANGE = re.compile(r"(?:^|\s)function\s|^\$", re.MULTILINE)
+# kept when a selector is replaced by its tag, so it selects the tagged entities in the same order
+_ORDER_ARGUMENTS = ("sort", "limit")
+
+
+def tag_add(entity_selector: Selector, tag: Tag) -> Iterator[Command]:
     '''Command template function to add a tag to the given selector
 
     Args:
         entity_selector: Entity to add the tag to
         tag: tag to add
     
-    Returns:
-        yielded command
+    Yields:
+        the command node
 
     Example:
         ``` python
@@ -26,17 +51,17 @@ def tag_add(entity_selector: Selector, tag: Tag) -> Iterator[str]:
         tag_add(CurrentEntity, 'foo')
         ```
     '''
-    yield f'tag {entity_selector} add {tag}'
+    yield TagCommand(entity_selector, 'add', tag)
 
-def tag_remove(entity_selector: Selector, tag: Tag) -> Iterator[str]:
+def tag_remove(entity_selector: Selector, tag: Tag) -> Iterator[Command]:
     '''Command template function to remove a tag to the given selector
 
     Args:
         entity_selector: Entity to remove the tag to
         tag: tag to remove
     
-    Returns:
-        yielded command
+    Yields:
+        the command node
 
     Example:
         ``` python
@@ -45,7 +70,7 @@ def tag_remove(entity_selector: Selector, tag: Tag) -> Iterator[str]:
         tag_remove(CurrentEntity, 'foo')
         ```
     '''
-    yield f'tag {entity_selector} remove {tag}'
+    yield TagCommand(entity_selector, 'remove', tag)
 
 @dataclass
 class Tag(CmdObject):
@@ -133,4 +158,96 @@ class Tag(CmdObject):
             ```
         '''
         write(tag_remove(entity_selector, self))
-        return self
\ No newline at end of file
+        return self
+
+
+@contextlib.contextmanager
+def tagged_selectors(min_uses: int = 2):
+    """Context manager to find the entities of each repeated `@e` selector once
+
+    The inner commands are collected until the end of the block. Every `@e` selector used by at least `min_uses` of them is run once at the start of the block to tag the matching entities with a generated `Tag`, the commands select the tagged entities with `@e[tag=...]` instead, and the tag is removed at the end of the block.
+
+    The entities are matched when the block starts, so entities summoned, moved or changed inside the block are not selected differently. Selectors that could match other entities later in the block are left as they are:
+
+    - selectors with position arguments like `distance` or `sort=nearest` in commands that run at another position, e.g. after `execute at`
+    - selectors with `sort=random`, which should pick new entities each time
+    - selectors with `tag`, `scores`, `team`, `name`, `gamemode`, `level` or `advancements` arguments if the block has commands that can change them, e.g. `tag` commands for `tag=!done`, or calls a function
+    - selectors with `nbt` or `predicate` arguments, which can change with any command
+
+    Nothing is changed if the block returns early with `return`, since the tag would not be removed.
+
+    Args:
+        min_uses: number of commands that must use the same selector before it is tagged
+
+    Example:
+        ``` python
+        @mcfunction
+        def zombies():
+            nearby_zombies = Entities.where('type', 'zombie').where('distance', '..32')
+            with tagged_selectors():
+                yield f'effect give {nearby_zombies} minecraft:glowing 1'
+                yield f'execute as {nearby_zombies} run data merge entity @s {{Silent:1b}}'
+                yield f'tp {nearby_zombies} ~ ~ ~'
+        ```
+    """
+    prev_ctx = get_context()
+    items = []
+
+    def handle(ctx, item):
+        items.append(item)
+
+    with update_context(input_handler=handle):
+        yield
+
+    lines = [str(as_command(item)) for item in items]
+    tagged = {}
+    if not any(_RETURN.search(line) for line in lines):
+        block = "\n".join(lines)
+        uses = Counter()
+        for line in lines:
+            uses.update({s for s in find_selectors(line) if s.startswith("@e") and _can_tag(line, s)})
+        for selector, count in uses.items():
+            if count >= min_uses and _is_fixed(selector, block):
+                tagged[selector] = Tag()
+
+    with switch_context(prev_ctx):
+        for selector, tag in tagged.items():
+            write(tag_add(selector, tag))
+        for item, line in zip(items, lines):
+            new_line = _tag_selectors(line, tagged) if tagged and "@e" in line else line
+            write(new_line if new_line != line else item)
+        for tag in tagged.values():
+            write(tag_remove(f"@e[tag={tag}]", tag))
+
+
+def _tag_selectors(line: str, tagged: dict[str, Tag]) -> str:
+    '''Replace the uses of tagged selectors in a command with their tag'''
+
+    def replace(selector: str, start: int) -> str | None:
+        tag = tagged.get(selector)
+        if tag is None or (_POSITION_ARGUMENTS.search(selector) and _MOVES_POSITION.search(line, 0, start)):
+            return None
+        order = "".join(f",{key}={value}" for key, value in _selector_arguments(selector) if key in _ORDER_ARGUMENTS)
+        return f"@e[tag={tag}{order}]"
+
+    return replace_selectors(line, replace)
+
+
+def _can_tag(line: str, selector: str) -> bool:
+    '''Whether a use of a selector in a command selects the same entities as at the start of the block'''
+    if not _POSITION_ARGUMENTS.search(selector):
+        return True
+    return not _MOVES_POSITION.search(line, 0, line.find(selector))
+
+
+def _is_fixed(selector: str, block: str) -> bool:
+    '''Whether a selector matches the same entities throughout a block, apart from their position'''
+    arguments = _selector_arguments(selector)
+    if ("sort", "random") in arguments:
+        return False
+    filters = {key for key, _ in arguments} & _FILTER_CHANGES.keys()
+    if not filters:
+        return True
+    if _ANY_CHANGE.search(block):
+        return False
+    return not any(_FILTER_CHANGES[key] is None or _FILTER_CHANGES[key].search(block) for key in filters)
@@ -6,6 +6,7 @@ from .nbt import Str, NbtObj, NbtList
 from abc import ABC, abstractmethod
 from typing import Union
 from ..context import write
+from ..ir import Tellraw
 class Tellable(ABC):
     '''Interface implemented by container types to convert into a tellraw displayable type.
     '''
@@ -43,4 +44,5 @@ def tellraw(entity_selector: any, *items: Union[Tellable,str,dict]) -> None:
         else:
             raise ValueError(f'Unsupported tellraw argument: {item}. Use str(item) to use string representation.')
     res = NbtList(res)
-    write(f'tellraw {entity_selector} {res}')
\ No newline at end of file
+    # serialized now, the items can be changed after the command is written
+    write(Tellraw(entity_selector, str(res)))
\ No newline at end of file
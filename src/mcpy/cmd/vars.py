@@ -1,8 +1,9 @@
 from __future__ import annotations
 import contextlib
+import re
 from dataclasses import dataclass, field
 
-from ..context import write, get_global_context, get_context
+from ..context import write, get_global_context, get_context, update_context
 from ..decorators import mcfunction, FunctionResource
 from .scoreboard import Score, score_get
 from .data import *
@@ -13,16 +14,64 @@ from typing import Union, Callable
 from .util import tokens_to_str
 from .exec import execute
 from .tellraw import Tellable
+from ..ir import FunctionCall, Execute, ScoreboardOperation, ScoreboardPlayers
 TargetType = Union[StoragePath, EntityPath, BlockPath]
 SourceType = Union[StoragePath, EntityPath, BlockPath, Value, NbtPrimitive]
 
 
 @contextlib.contextmanager
 def scope():
-    write('function call_stack:push')
+    write(FunctionCall('call_stack:push'))
     # write(f'say called {get_context().get_path().stem}')
-    yield
-    write('function call_stack:pop')
+    # int variables created in this scope are saved to its frame around scoped calls
+    scope_vars = []
+    with update_context(scope_vars=scope_vars):
+        yield
+    _remove_dead_saves(get_context().opened_file, scope_vars)
+    write(FunctionCall('call_stack:pop'))
+
+
+_CALLED_FUNCTIONS = re.compile(r'(?:^|\s)function\s+(\S+)')
+
+
+def _remove_dead_saves(f, scope_vars: list[IntVar]) -> None:
+    '''Remove the saves and restores of int variables around scoped calls of a function when the variable is not used after the call
+
+    Only saves written directly to the function's file are removed, not the ones in `execute` blocks.
+    '''
+    if f is None:
+        return
+    index = {id(c): i for i, c in enumerate(f.chunks)}
+    pairs = [
+        (index[id(restore)], index[id(save)], int_var)
+        for int_var in scope_vars
+        for save, restore in int_var._saves
+        if id(save) in index and id(restore) in index
+    ]
+    if not pairs:
+        return
+    scoped_functions = get_global_context().scoped_functions
+    lines = [str(c) for c in f.chunks]
+    removed = set()
+    # from the last call back, so a save that is removed no longer keeps the variable alive at earlier calls
+    for restore_i, save_i, int_var in sorted(pairs, key=lambda p: p[0], reverse=True):
+        holder = re.compile(rf'(?<![\w$.]){re.escape(int_var.holder)}(?![\w.])')
+        for i in range(restore_i + 1, len(lines)):
+            if i in removed:
+                continue
+            line = lines[i]
+            if holder.search(line) or line.startswith('$'):
+                break
+            # other functions run in the same frame and could read the variable, scoped ones save their own
+            if any(
+                fn not in scoped_functions and not fn.startswith(CALL_STACK_NAMESPACE)
+                for fn in _CALLED_FUNCTIONS.findall(line)
+            ):
+                break
+        else:
+            removed.update((save_i, restore_i))
+    if removed:
+        f.chunks = [c for i, c in enumerate(f.chunks) if i not in removed]
 
 CALL_STACK_NAMESPACE = 'call_stack:'
 
@@ -54,6 +103,86 @@ class Var(StoragePath, Tellable):
         return {"nbt": f'{self.prefix}.{self.path}', get_target_type(self): self.namespace}
     
 
+@dataclass
+class IntVar(Score):
+    '''Scoreboard based container for a scoped integer variable
+
+    The value is kept in a fake player of the `mcpy.var` objective, so arithmetic uses cheap scoreboard commands instead of storage. Fake players are shared by every function, so an int variable created in a scoped function is saved to the function's call stack frame before calling another scoped function and restored after it returns. This costs two commands per variable and call, they are left out when the variable is not used after the call.
+
+    Example:
+        ``` python
+        @scoped_mcfunction
+        def sum_to():
+            total = IntVar().set(0)
+            i = IntVar().set(arg0)
+            with execute(f'if {i.matches("1..")}'):
+                total.add(i)
+            ret_var.set_from_score(total)
+        ```
+    '''
+
+    _saves: list = field(default_factory=list, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.holder is None:
+            count = get_global_context().increment_count('var_count')
+            self.holder = f'$ivar{count}'
+        super().__post_init__()
+        scope_vars = get_context().scope_vars
+        if scope_vars is not None:
+            scope_vars.append(self)
+
+    def set(self, value: int | Score | StoragePath | EntityPath | BlockPath) -> IntVar:
+        '''Set this variable to a number, the value of a score or the number at a data path'''
+        if isinstance(value, Score):
+            write(ScoreboardOperation(self, '=', value))
+        elif isinstance(value, (StoragePath, EntityPath, BlockPath)):
+            write(Execute(f'store result score {self}', next(data_get(value))))
+        else:
+            write(ScoreboardPlayers('set', self, int(value)))
+        return self
+
+    def add(self, value: int | Score = 1) -> IntVar:
+        '''Add a number or the value of a score to this variable'''
+        if isinstance(value, Score):
+            return self.operation('+=', value)
+        return super().add(value)
+
+    def remove(self, value: int | Score = 1) -> IntVar:
+        '''Subtract a number or the value of a score from this variable'''
+        if isinstance(value, Score):
+            return self.operation('-=', value)
+        return super().remove(value)
+
+    def operation(self, operation: str, source: Score) -> IntVar:
+        '''Apply a scoreboard operation with another score, e.g. `*=`, `/=`, `%=`, `<`, `>` or `><`'''
+        write(ScoreboardOperation(self, operation, source))
+        return self
+
+    def to_var(self, name: str = None) -> Var:
+        '''Copy this variable to a new storage variable'''
+        return Var(path=name).set_from_score(self)
+
+    def save(self) -> IntVar:
+        '''Copy the value to the call stack frame of the current scope'''
+        write(self._save_command())
+        return self
+
+    def restore(self) -> IntVar:
+        '''Copy the value back from the call stack frame of the current scope'''
+        write(self._restore_command())
+        return self
+
+    def _save_command(self) -> Execute:
+        return Execute(f'store result storage {self._frame_var()} int 1', next(score_get(self)))
+
+    def _restore_command(self) -> Execute:
+        return Execute(f'store result score {self}', next(data_get(self._frame_var())))
+
+    def _frame_var(self) -> Var:
+        return Var(path=self.holder.lstrip('$'))
+
+
 @dataclass
 class CallVar(Var):
     prefix: str = field(default='call',init=False)
@@ -87,7 +216,15 @@ def call(resource_str: str, *call_args, extra_args=None) -> Var:
     if extra_args is not None:
         for name, value in extra_args:
             CallVar(name).set(value)
+    # the called function can change any fake player, keep the int variables of this scope in its frame
+    saves = [(int_var, int_var._save_command(), int_var._restore_command()) for int_var in get_context().scope_vars or ()]
+    for int_var, save, restore in saves:
+        write(save)
+        # kept to remove them when the scope ends, if the variable is not used after the call
+        int_var._saves.append((save, restore))
     write(function(resource_str))
+    for int_var, save, restore in saves:
+        write(restore)
     return CallVar('return')
 
 
@@ -128,7 +265,9 @@ def scoped_mcfunction(generator_fn: Callable[[],Iterator]=None, *, name:str = No
         if not hasattr(func, '_resource'):
             func._resource = ScopedFunctionResource
             wrapped_callable._resource = ScopedFunctionResource
-        return ScopedFunctionResource(mcfunction(wrapped_callable, name=name, **kwargs).path)
+        resource = ScopedFunctionResource(mcfunction(wrapped_callable, name=name, **kwargs).path)
+        get_global_context().scoped_functions.add(resource.path)
+        return resource
 
     if generator_fn is None:
         return decorator_mcfunction
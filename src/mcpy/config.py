@@ -1,8 +1,20 @@
 from pathlib import Path
 import json
 
-DEFAULT_CONFIG = {"entrypoint": "pack.py", "generated_dir": "__generated__"}
+DEFAULT_CONFIG = {
+    "entrypoint": "pack.py",
+    "generated_dir": "__generated__",
+    "elide_call_frames": False,
+    "inline_functions": False,
+    "inline_max_commands": 2,
+    "peephole": False,
+    "reuse_slots": False,
+    "dedupe_functions": False,
+    "remove_unused_functions": False,
+    "exports": [],
+}
 DEFAULT_NAME = "mcpy_config.json"
+DEFAULT_WORKSPACE_NAME = "mcpy_workspace.json"
 
 
 def find_config_path(datapack_path: Path, use_default=False) -> Path:
@@ -57,6 +69,24 @@ def load_config_for_datapack(datapack_path: Path) -> dict:
     return config
 
 
+def load_workspace(workspace_path: Path) -> list[Path]:
+    """Load the datapack paths listed in a workspace file
+
+    Example:
+        ``` json title="mcpy_workspace.json"
+        {"packs": ["pack_a", "libs/pack_b"]}
+        ```
+
+    Args:
+        workspace_path: path to the workspace file
+    Returns:
+        Datapack paths, relative to the workspace file's directory
+    """
+    with open(workspace_path) as f:
+        workspace = json.load(f)
+    return [workspace_path.parent / p for p in workspace.get("packs", [])]
+
+
 def __merge(source, destination):
     for key, value in source.items():
         if isinstance(value, dict):
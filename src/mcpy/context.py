@@ -5,10 +5,11 @@ from pathlib import Path
 import json
 from typing import IO, Callable
 from pathlib import Path
-from dataclasses import dataclass, field, replace
+from dataclasses import dataclass, field, FrozenInstanceError
 import inspect
 import contextvars
 from collections import defaultdict
+from .output import OutputBackend, OutputFile, FileSystemOutput
 
 __CONTEXT = contextvars.ContextVar("mcpy.context")
 __GLOBAL = contextvars.ContextVar("mcpy.global_context")
@@ -18,9 +19,19 @@ __GLOBAL = contextvars.ContextVar("mcpy.global_context")
 class GlobalContext:
     base_dir: Path
     config: dict
+    output: OutputBackend = None
     counter: defaultdict[int] = field(
         default_factory=lambda: defaultdict(int), init=False
     )
+    cache: any = None
+    files: dict[Path, OutputFile] = field(default_factory=dict, init=False)
+    file_log: list[tuple[Path, bool]] = field(default_factory=list, init=False)
+    spill_log: list[Path] = field(default_factory=list, init=False)
+    sources: dict[Path, any] = field(default_factory=dict, init=False)
+    stats: any = None
+    pass_results: dict[str, any] = field(default_factory=dict, init=False)
+    no_inline: set[str] = field(default_factory=set, init=False)
+    scoped_functions: set[str] = field(default_factory=set, init=False)
 
     def increment_count(self, key: str) -> int:
         """Get the current count then increment the counter"""
@@ -28,22 +39,154 @@ class GlobalContext:
         self.counter[key] += 1
         return count
 
+    def add_spill(self, path: Path) -> None:
+        """Record an `execute` block of the given file spilling into a generated file"""
+        self.spill_log.append(path)
+        if self.stats is not None:
+            self.stats.add_spill(path)
+
+    def allocate_name(self, directory: Path, base_name: str, suffix: str = ".mcfunction") -> str:
+        """Get a file name not yet generated in a directory of this build
+
+        Names are numbered with the "generated_files" counter, so they only depend on the order of generation and not on files left over from previous builds.
+
+        Args:
+            directory: directory relative to the root of the datapack
+            base_name: name to number, e.g. "myfile" for "myfile_0"
+            suffix: file extension of the name
+
+        Returns:
+            The file name without the suffix
+        """
+        while True:
+            name = f'{base_name}_{self.increment_count("generated_files")}'
+            if directory / f"{name}{suffix}" not in self.files:
+                return name
+
+    def open_file(self, path: Path, mode: str = "w") -> OutputFile:
+        """Open an in-memory file buffer for writing
+
+        Args:
+            path: path of the file relative to the datapack root
+            mode: "w" to start a new file, "a" to append to a file already generated in this build
+
+        Returns:
+            Opened file buffer
+        """
+        f = self.files.get(path)
+        appended = f is not None and mode == "a"
+        if not appended:
+            f = OutputFile(path)
+            self.files[path] = f
+        f.closed = False
+        self.file_log.append((path, appended))
+        return f
+
+    def flush(self) -> None:
+        """Write all generated files to the output backend"""
+        output = self.output
+        if output is None:
+            output = FileSystemOutput(self.base_dir)
+        output.flush(self.files)
+
+
+_PATH_FIELDS = frozenset(("sub_dir_stack", "namespace", "file_category", "file_name"))
+
 
-@dataclass(frozen=True)
 class Context:
     """
     A class to represent the state of the datapack.
+
+    Contexts are immutable, use `derive` (or `update_context`) to get a changed copy. The resource location and paths of a context are computed once and cached.
     """
 
-    sub_dir_stack: tuple[Path] = field(default_factory=tuple)
-    namespace: str = None
-    file_category: str = None
-    file_name: str = None
-    opened_file: IO = None
-    input_handler: Callable = None
-    resource_type: any = None
+    __slots__ = (
+        "sub_dir_stack",
+        "namespace",
+        "file_category",
+        "file_name",
+        "opened_file",
+        "input_handler",
+        "resource_type",
+        "source",
+        "scope_vars",
+        "_resource_path",
+        "_relative_path",
+        "_path",
+    )
+
+    def __init__(
+        self,
+        sub_dir_stack: tuple[Path] = (),
+        namespace: str = None,
+        file_category: str = None,
+        file_name: str = None,
+        opened_file: IO = None,
+        input_handler: Callable = None,
+        resource_type: any = None,
+        source: any = None,
+        scope_vars: list = None,
+    ) -> None:
+        _set = _set_field
+        _set(self, "sub_dir_stack", sub_dir_stack)
+        _set(self, "namespace", namespace)
+        _set(self, "file_category", file_category)
+        _set(self, "file_name", file_name)
+        _set(self, "opened_file", opened_file)
+        _set(self, "input_handler", input_handler)
+        _set(self, "resource_type", resource_type)
+        _set(self, "source", source)
+        _set(self, "scope_vars", scope_vars)
+        _set(self, "_resource_path", None)
+        _set(self, "_relative_path", None)
+        _set(self, "_path", None)
+
+    def derive(self, **changes: any) -> "Context":
+        """Get a copy of this context with the given fields changed
+
+        Cached paths are kept unless a field they depend on changed.
+
+        Args:
+            changes: fields to change
+
+        Returns:
+            The new context
+        """
+        ctx = _new_context(Context)
+        for name in Context.__slots__:
+            _set_field(ctx, name, getattr(self, name))
+        for name, value in changes.items():
+            if name not in _FIELDS:
+                raise TypeError(f"Context has no field {name!r}")
+            _set_field(ctx, name, value)
+        if not _PATH_FIELDS.isdisjoint(changes):
+            _set_field(ctx, "_resource_path", None)
+            _set_field(ctx, "_relative_path", None)
+            _set_field(ctx, "_path", None)
+        return ctx
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in _FIELDS)
+
+    def __hash__(self) -> int:
+        # scope_vars is a mutable list collecting the variables of a scope, leave it out
+        return hash(tuple(getattr(self, n) for n in _HASH_FIELDS))
+
+    def __setattr__(self, name: str, value: any) -> None:
+        raise FrozenInstanceError(f"cannot assign to field {name!r}")
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{n}={getattr(self, n)!r}" for n in _FIELDS)
+        return f"Context({fields})"
 
     def get_resource_path(self) -> str:
+        if self._resource_path is not None:
+            return self._resource_path
         if not self.file_category:
             raise ValueError(
                 "File category not set! (e.g. pack/data/namespace/<category>/etc)"
@@ -52,9 +195,11 @@ class Context:
             raise ValueError(
                 "Namespace not set! (e.g. pack/data/<namespace>/functions/etc)"
             )
-        path_items = (*map(lambda p: str(p), self.sub_dir_stack), Path(self.file_name).stem)
-        return f'{self.namespace}:{"/".join(path_items)}'
-    
+        path_items = (*map(str, self.sub_dir_stack), Path(self.file_name).stem)
+        path = f'{self.namespace}:{"/".join(path_items)}'
+        _set_field(self, "_resource_path", path)
+        return path
+
     def get_resource(self) -> any:
         """Returns the resource for the current context or None if the context does not have an associated resource. E.g. Resource, FunctionResource, etc"""
         r = self.resource_type
@@ -63,7 +208,14 @@ class Context:
         return r
     def get_path(self) -> Path:
         """Returns the current full path in the datapack"""
-
+        if self._path is None:
+            _set_field(self, "_path", get_global_context().base_dir / self.get_relative_path())
+        return self._path
+
+    def get_relative_path(self) -> Path:
+        """Returns the current path relative to the root of the datapack"""
+        if self._relative_path is not None:
+            return self._relative_path
         if not self.file_category:
             raise ValueError(
                 "File category not set! (e.g. pack/data/namespace/<category>/etc)"
@@ -73,15 +225,13 @@ class Context:
                 "Namespace not set! (e.g. pack/data/<namespace>/functions/etc)"
             )
 
-        path_dir = (
-            get_global_context().base_dir
-            / "data"
-            / self.namespace
-            / Path(self.file_category).joinpath(*self.sub_dir_stack)
-        )
+        # join once as a string, building the Path part by part is much slower
+        parts = ["data", self.namespace, str(self.file_category), *map(str, self.sub_dir_stack)]
         if self.file_name:
-            return path_dir / self.file_name
-        return path_dir
+            parts.append(self.file_name)
+        path = Path("/".join(parts))
+        _set_field(self, "_relative_path", path)
+        return path
 
     def write(self, item: any) -> None:
         """Handle the given input depending on the current context"""
@@ -90,6 +240,12 @@ class Context:
         self.input_handler(self, item)
 
 
+_FIELDS = Context.__slots__[:-3]
+_HASH_FIELDS = tuple(n for n in _FIELDS if n != "scope_vars")
+_new_context = object.__new__
+_set_field = object.__setattr__
+
+
 def write(item: any) -> None:
     """Handle the given input depending on the current context"""
     ctx = get_context()
@@ -147,38 +303,71 @@ def call_self(*args: any, **kwargs: any) -> any:
     else:
         raise ValueError('No resource type defined for this context!')
 
-@contextlib.contextmanager
-def switch_context(ctx: Context):
-    token = __CONTEXT.set(ctx)
-    yield
-    __CONTEXT.reset(token)
+class _ContextSwitch:
+    '''Context manager setting the current context, cheaper than a generator based one'''
+
+    __slots__ = ("var", "ctx", "token")
+
+    def __init__(self, var: contextvars.ContextVar, ctx: Context) -> None:
+        self.var = var
+        self.ctx = ctx
+
+    def __enter__(self) -> None:
+        self.token = self.var.set(self.ctx)
+
+    def __exit__(self, *exc) -> None:
+        self.var.reset(self.token)
+
+
+class _ContextUpdate(_ContextSwitch):
+    '''Context manager deriving the current context when entered'''
+
+    __slots__ = ("changes",)
+
+    def __init__(self, var: contextvars.ContextVar, changes: dict) -> None:
+        super().__init__(var, None)
+        self.changes = changes
+
+    def __enter__(self) -> None:
+        self.token = self.var.set(self.var.get().derive(**self.changes))
+
+
+def switch_context(ctx: Context) -> contextlib.AbstractContextManager:
+    """Context manager to make the given context the current context
+
+    Args:
+        ctx: context to switch to
+    """
+    return _ContextSwitch(__CONTEXT, ctx)
 
 
 @contextlib.contextmanager
-def init_context(base_dir: Path, config: dict, **initial_ctx_args: any):
+def init_context(base_dir: Path, config: dict, output: OutputBackend = None, cache: any = None, stats: any = None, **initial_ctx_args: any):
     """Underlying context manager for creating an initial datapack context
 
     Args:
         base_dir: datapack base directory
         config: datapack config
+        output: backend the generated files are flushed to, defaults to the filesystem at base_dir
+        cache: BuildCache to reuse generator output from previous builds
+        stats: BuildStats to collect per-resource statistics into
         initial_ctx_args: initial values to apply to the context
     """
-    __GLOBAL.set(GlobalContext(base_dir, config))
+    __GLOBAL.set(GlobalContext(base_dir, config, output, cache, stats=stats))
     ctx = Context(**initial_ctx_args)
     with switch_context(ctx):
         yield
 
 
-@contextlib.contextmanager
-def update_context(**context_changes: any):
+def update_context(**context_changes: any) -> contextlib.AbstractContextManager:
     """Underlying context manager for making changes to the current context
 
+    The changes are applied to the context that is current when the block is entered.
+
     Args:
         context_changes: changes to apply to the new context
     """
-    ctx = get_context()
-    with switch_context(replace(ctx, **context_changes)):
-        yield
+    return _ContextUpdate(__CONTEXT, context_changes)
 
 
 
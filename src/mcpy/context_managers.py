@@ -3,9 +3,9 @@ from typing import Iterator
 from pathlib import Path
 from .context import (
     get_context,
-    get_global_context,
     update_context,
 )
+from .trace import span
 
 
 @contextlib.contextmanager
@@ -23,8 +23,9 @@ def directory(name: str) -> Iterator[None]:
         ```
     """
     ctx = get_context()
-    with update_context(sub_dir_stack=(*ctx.sub_dir_stack, Path(name))):
-        yield
+    with span(f"directory {name}", "directory"):
+        with update_context(sub_dir_stack=(*ctx.sub_dir_stack, Path(name))):
+            yield
 
 
 @contextlib.contextmanager
@@ -58,10 +59,6 @@ def namespace(name: str) -> Iterator[None]:
         ...
     ```
     """
-    ctx = get_context()
-    with update_context(namespace=name):
-        ctx = get_context()
-        (get_global_context().base_dir / "data" / ctx.namespace).mkdir(
-            parents=True, exist_ok=True
-        )
-        yield
+    with span(f"namespace {name}", "namespace"):
+        with update_context(namespace=name):
+            yield
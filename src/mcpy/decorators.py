@@ -6,12 +6,16 @@ from dataclasses import dataclass
 from .context import (
     Context,
     get_context,
+    get_global_context,
     update_context,
     write
 )
 from .context_managers import (
     directory
 )
+from .incremental import ResourceSource, is_internal
+from .trace import span
+from .ir import Command, FunctionCall
 import inspect
 
 DEFAULT_HEADER_MSG = "Built with mcpy (https://github.com/dthigpen/mcpy)"
@@ -27,7 +31,7 @@ class Resource:
 class FunctionResource(Resource):
 
     def __call__(self) -> None:
-        write(f"function {self}")
+        write(FunctionCall(self))
 
 def __validate_files(ctx) -> None:
     if not ctx.opened_file or ctx.opened_file.closed:
@@ -47,29 +51,34 @@ def __json_file_handler(ctx: Context, item: dict | str) -> None:
     ctx.opened_file.write(item)
 
 
-def __mcfunction_handler(ctx: Context, item: str | list[str]):
-    __validate_files(ctx)
+def __write_mcfunction_item(f, content: any) -> None:
+    # command nodes are kept as is and serialized when the file is flushed
+    if isinstance(content, Command):
+        f.write(content)
+        return
+    content = str(content)
+    newline_count = content.count("\n")
+    if content.endswith("\n"):
+        newline_count -= 1
 
-    def write_str(content: str):
-        newline_count = content.count("\n")
-        if content.endswith("\n"):
-            newline_count -= 1
+    # unindent indented multiline strings
+    if newline_count > 0:
+        content = textwrap.dedent(content)
 
-        # unindent indented multiline strings
-        if newline_count > 0:
-            content = textwrap.dedent(content)
+    # add trailing newline if not present
+    if not content.endswith("\n"):
+        content += "\n"
 
-        # add trailing newline if not present
-        if not content.endswith("\n"):
-            content += "\n"
+    f.write(content)
 
-        ctx.opened_file.write(content)
 
+def __mcfunction_handler(ctx: Context, item: str | list[str]):
+    __validate_files(ctx)
     if isinstance(item, list) or inspect.isgenerator(item):
         for content in item:
-            write_str(str(content))
+            __write_mcfunction_item(ctx.opened_file, content)
     else:
-        write_str(str(item))
+        __write_mcfunction_item(ctx.opened_file, item)
 
 
 
@@ -103,16 +112,39 @@ def file(
         if name is None:
             name = func.__name__
         ctx = get_context()
+        global_ctx = get_global_context()
+        source = ctx.source if is_internal(func) else ResourceSource.of(func)
+        input_handler = ctx_handler if ctx_handler else ctx.input_handler
         with update_context(
             file_name=name,
             file_category=category,
-            input_handler=ctx_handler if ctx_handler else ctx.input_handler,
-            resource_type=func._resource
+            input_handler=input_handler,
+            resource_type=func._resource,
+            source=source,
         ):
             ctx = get_context()
-            ctx.get_path().parent.mkdir(parents=True, exist_ok=True)
-            with open(ctx.get_path(), mode) as f:
-                with update_context(opened_file=f):
+            path = ctx.get_relative_path()
+            cache = global_ctx.cache
+            stats = global_ctx.stats
+            if stats is not None:
+                stats_start = stats.start()
+            cache_key = None
+            if cache is not None and mode == "w":
+                cache_key = cache.key(func, path, header, getattr(input_handler, "__qualname__", None))
+                if cache_key is not None:
+                    # restored output and its spills are recorded like a generator run
+                    with span(ctx.get_resource_path, "cache"):
+                        restored = cache.restore(cache_key, global_ctx)
+                    if restored:
+                        global_ctx.sources[path] = source
+                        if stats is not None:
+                            stats.stop(path, stats_start)
+                        return Resource(ctx.get_resource_path())
+                mark = cache.start(global_ctx)
+            global_ctx.sources[path] = source
+            f = global_ctx.open_file(path, mode)
+            try:
+                with span(ctx.get_resource_path, "file", mode=mode), update_context(opened_file=f):
                     if header and mode == "w":
                         write(f"# {DEFAULT_HEADER_MSG}\n\n")
                     items = func()
@@ -120,6 +152,12 @@ def file(
                         for item in items:
                             write(item)
                     resource_path = get_context().get_resource_path()
+            finally:
+                f.close()
+                if stats is not None:
+                    stats.stop(path, stats_start)
+            if cache_key is not None:
+                cache.store(cache_key, global_ctx, mark)
             
             return Resource(resource_path)
 
@@ -160,7 +198,7 @@ def tag(generator_fn: Callable[[],Iterator]=None, *, tag_type: Literal["function
         return decorator_tag(generator_fn)
 
 
-def mcfunction(generator_fn: Callable[[],Iterator]=None, *, name:str = None, **kwargs: any):
+def mcfunction(generator_fn: Callable[[],Iterator]=None, *, name:str = None, inline: bool = True, **kwargs: any):
     """A decorator for creating an mcfunction file.
     
     The generator function can yield command strings or call write(<cmd>)
@@ -168,6 +206,7 @@ def mcfunction(generator_fn: Callable[[],Iterator]=None, *, name:str = None, **k
     Args:
         generator_fn: Generator function to build the file from
         name: The name of the file, overrides the decorated function's name
+        inline: Whether the inline_functions pass may replace calls to this function with its commands
         kwargs: extra arguments to be passed to the underlying file function
 
     Example:
@@ -195,6 +234,8 @@ def mcfunction(generator_fn: Callable[[],Iterator]=None, *, name:str = None, **k
             ctx_handler=__mcfunction_handler,
             **kwargs,
         )
+        if not inline:
+            get_global_context().no_inline.add(file_resource.path)
 
         return FunctionResource(file_resource.path)
 
@@ -0,0 +1,328 @@
+'''
+Module for tracking which Python functions produced which resources and reusing their output between builds.
+
+A generator's output is reused when its fingerprint is unchanged. The fingerprint covers its code, the values it closes over, and the globals it references. Lists, dicts and sets are hashed by their content when the generator is called. Generators that close over or reference other mutable objects, or that assign globals, are always re-executed. Generators are assumed to produce their output from these inputs only, e.g. not from reading other files.
+'''
+from __future__ import annotations
+from dataclasses import dataclass, field, is_dataclass
+from pathlib import Path
+from types import CodeType, FunctionType, ModuleType, BuiltinFunctionType, MethodType
+import dis
+import hashlib
+import inspect
+import json
+
+_VALUE_TYPES = (type(None), bool, int, float, complex, str, bytes, Path)
+_MAX_DEPTH = 8
+
+
+@dataclass(frozen=True)
+class ResourceSource:
+    '''The Python function that produced a resource
+
+    Attributes:
+        module: module name of the function
+        function: qualified name of the function
+        file: source file of the function
+        line: first line of the function in its source file
+    '''
+
+    module: str
+    function: str
+    file: str
+    line: int
+
+    @classmethod
+    def of(cls, func) -> ResourceSource:
+        func = inspect.unwrap(func)
+        code = getattr(func, "__code__", None)
+        return cls(
+            getattr(func, "__module__", None),
+            getattr(func, "__qualname__", repr(func)),
+            code.co_filename if code else None,
+            code.co_firstlineno if code else None,
+        )
+
+    def __str__(self) -> str:
+        return f"{self.module}.{self.function} ({self.file}:{self.line})"
+
+
+def is_internal(func) -> bool:
+    '''Whether a generator function is defined by mcpy itself, e.g. for execute spill files'''
+    module = getattr(func, "__module__", None) or ""
+    return module == "mcpy" or module.startswith("mcpy.")
+
+
+@dataclass
+class CacheEntry:
+    '''Output of a single generator run'''
+
+    counter_start: dict[str, int]
+    counter_delta: dict[str, int]
+    files: dict[Path, list]
+    sources: dict[Path, ResourceSource]
+    children: list = field(default_factory=list)
+    spills: list[Path] = field(default_factory=list)
+
+
+class BuildCache:
+    '''Cache of generator output reused across builds of the same datapack
+
+    Example:
+        ``` python
+        cache = BuildCache()
+        build(builder, Path("my_pack"), cache=cache)
+        # only generators whose code or inputs changed are executed again
+        build(builder, Path("my_pack"), cache=cache)
+        ```
+
+    Attributes:
+        hits: number of generators reused in the last build
+        misses: number of generators executed in the last build
+    '''
+
+    def __init__(self) -> None:
+        self.entries: dict[tuple, CacheEntry] = {}
+        self.hits = 0
+        self.misses = 0
+        self.__config_hash = None
+        self.__used: dict[tuple, CacheEntry] = {}
+        self.__used_order: list[tuple] = []
+        self.__memo: dict[int, tuple] = {}
+        # code objects are shared by every closure created from the same function definition, e.g. in a loop
+        self.__code_memo: dict[CodeType, tuple] = {}
+        self.__last_code_memo: dict[CodeType, tuple] = {}
+
+    def begin(self, config: dict) -> None:
+        '''Prepare the cache for a new build'''
+        config_hash = json.dumps(config, sort_keys=True, default=str)
+        if config_hash != self.__config_hash:
+            self.entries = {}
+            self.__config_hash = config_hash
+        self.__used = {}
+        self.__used_order = []
+        self.__memo = {}
+        self.hits = 0
+        self.misses = 0
+
+    def end(self) -> None:
+        '''Drop entries not used by the build that just finished'''
+        self.entries = self.__used
+        self.__used = {}
+        self.__used_order = []
+        self.__memo = {}
+        # only keep the code of generators used by the last build, e.g. not of reloaded modules
+        self.__last_code_memo = self.__code_memo
+        self.__code_memo = {}
+
+    def key(self, func, path: Path, *extra: any) -> tuple | None:
+        """Get the cache key of a generator for the resource at the given path
+
+        Returns:
+            The key or None if the generator's output cannot be cached
+        """
+        digest = self.fingerprint(func)
+        if digest is None:
+            return None
+        return (path, digest, *map(repr, extra))
+
+    def restore(self, key: tuple, global_ctx) -> bool:
+        """Replay a cached generator run into the current build
+
+        Returns:
+            True if the generator's output was restored
+        """
+        entry = self.entries.get(key)
+        if entry is None or any(
+            global_ctx.counter[k] != v for k, v in entry.counter_start.items()
+        ):
+            self.misses += 1
+            return False
+        self.hits += 1
+        self.__keep(key, entry)
+        for path, chunks in entry.files.items():
+            global_ctx.open_file(path).chunks.extend(chunks)
+            global_ctx.files[path].close()
+        global_ctx.sources.update(entry.sources)
+        for path in entry.spills:
+            global_ctx.add_spill(path)
+        for k, delta in entry.counter_delta.items():
+            global_ctx.counter[k] += delta
+        return True
+
+    def start(self, global_ctx) -> tuple:
+        '''Mark the start of a generator run'''
+        return len(global_ctx.file_log), dict(global_ctx.counter), len(self.__used_order), len(global_ctx.spill_log)
+
+    def store(self, key: tuple, global_ctx, mark: tuple) -> None:
+        '''Record the output of a generator run started with `start`'''
+        log_start, counter_start, used_start, spill_start = mark
+        created = set()
+        for path, appended in global_ctx.file_log[log_start:]:
+            if appended and path not in created:
+                # wrote to a file produced by another generator
+                return
+            created.add(path)
+        counter_delta = {
+            k: v - counter_start.get(k, 0)
+            for k, v in global_ctx.counter.items()
+            if v != counter_start.get(k, 0)
+        }
+        entry = CacheEntry(
+            counter_start={k: counter_start.get(k, 0) for k in counter_delta},
+            counter_delta=counter_delta,
+            files={p: list(global_ctx.files[p].chunks) for p in created},
+            sources={p: global_ctx.sources[p] for p in created if p in global_ctx.sources},
+            children=self.__used_order[used_start:],
+            spills=global_ctx.spill_log[spill_start:],
+        )
+        self.__keep(key, entry)
+
+    def __keep(self, key: tuple, entry: CacheEntry) -> None:
+        if key in self.__used:
+            return
+        self.__used_order.append(key)
+        self.__used[key] = entry
+        for child in entry.children:
+            if child in self.entries:
+                self.__keep(child, self.entries[child])
+
+    def fingerprint(self, func) -> str | None:
+        """Hash a generator function's code, closure and referenced globals
+
+        Returns:
+            Hex digest or None if the function cannot be safely fingerprinted
+        """
+        return self.__hash_function(func, 0)
+
+    def __hash_function(self, func, depth: int) -> str | None:
+        # memo entries keep the function alive so its id is not reused during the build
+        if id(func) in self.__memo:
+            return self.__memo[id(func)][1]
+        # guard recursive references while hashing
+        self.__memo[id(func)] = (func, f"recursive:{func.__qualname__}")
+        digest = None
+        if depth <= _MAX_DEPTH:
+            code_digest, global_names = self.__hash_code(func.__code__)
+            parts = [func.__qualname__, code_digest]
+            ok = code_digest is not None
+            for value in (*(func.__defaults__ or ()), *(func.__kwdefaults__ or {}).values()):
+                ok = ok and self.__hash_value(value, parts, depth)
+            for cell in func.__closure__ or ():
+                try:
+                    value = cell.cell_contents
+                except ValueError:
+                    value = None
+                ok = ok and self.__hash_value(value, parts, depth)
+            for name in global_names:
+                if ok and name in func.__globals__:
+                    parts.append(name)
+                    ok = self.__hash_value(func.__globals__[name], parts, depth)
+            for attr in ("_resource", "__wrapped__"):
+                if ok and attr in func.__dict__:
+                    ok = self.__hash_value(func.__dict__[attr], parts, depth)
+            if ok:
+                digest = hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()
+        self.__memo[id(func)] = (func, digest)
+        return digest
+
+    def __hash_code(self, code: CodeType) -> tuple[str | None, list[str]]:
+        '''Get the digest of a code object, None if it assigns globals, and the global names it references'''
+        memo = self.__code_memo.get(code)
+        if memo is None:
+            memo = self.__last_code_memo.get(code)
+        if memo is None:
+            parts = []
+            digest = None
+            if _hash_code(code, parts):
+                digest = hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()
+            memo = (digest, _global_names(code))
+        self.__code_memo[code] = memo
+        return memo
+
+    def __hash_value(self, value: any, parts: list, depth: int) -> bool:
+        if isinstance(value, _VALUE_TYPES):
+            parts.append(repr(value))
+        elif isinstance(value, (tuple, list, dict)) and _is_plain(value, depth):
+            # literals like NBT compounds, their repr is much faster to hash item by item
+            parts.append(repr(value))
+        elif isinstance(value, (tuple, frozenset, list)):
+            parts.append(f"{type(value).__name__}:{len(value)}")
+            return all(self.__hash_value(v, parts, depth) for v in value)
+        elif isinstance(value, set):
+            # hash the items in a stable order, sets of unorderable items are not cached
+            try:
+                items = sorted(value)
+            except TypeError:
+                return False
+            parts.append(f"set:{len(value)}")
+            return all(self.__hash_value(v, parts, depth) for v in items)
+        elif isinstance(value, dict):
+            parts.append(f"dict:{len(value)}")
+            return all(
+                self.__hash_value(k, parts, depth) and self.__hash_value(v, parts, depth)
+                for k, v in value.items()
+            )
+        elif isinstance(value, FunctionType):
+            if is_internal(value):
+                parts.append(f"{value.__module__}.{value.__qualname__}")
+            else:
+                digest = self.__hash_function(value, depth + 1)
+                if digest is None:
+                    return False
+                parts.append(digest)
+        elif isinstance(value, MethodType):
+            return self.__hash_value(value.__func__, parts, depth) and self.__hash_value(
+                value.__self__, parts, depth
+            )
+        elif isinstance(value, (ModuleType, BuiltinFunctionType)):
+            parts.append(getattr(value, "__name__", repr(value)))
+        elif isinstance(value, type):
+            parts.append(f"{value.__module__}.{value.__qualname__}")
+            if not is_internal(value):
+                for attr in value.__dict__.values():
+                    if isinstance(attr, FunctionType) and not self.__hash_value(
+                        attr, parts, depth
+                    ):
+                        return False
+        elif is_dataclass(value):
+            parts.append(repr(value))
+        else:
+            return False
+        return True
+
+
+def _is_plain(value: any, depth: int) -> bool:
+    '''Whether a value only holds values of `_VALUE_TYPES` in nested tuples, lists and dicts'''
+    if isinstance(value, _VALUE_TYPES):
+        return True
+    if depth > _MAX_DEPTH:
+        return False
+    if isinstance(value, (tuple, list)):
+        return all(_is_plain(v, depth + 1) for v in value)
+    if isinstance(value, dict):
+        return all(_is_plain(k, depth + 1) and _is_plain(v, depth + 1) for k, v in value.items())
+    return False
+
+
+def _hash_code(code: CodeType, parts: list) -> bool:
+    for instruction in dis.get_instructions(code):
+        if instruction.opname in ("STORE_GLOBAL", "DELETE_GLOBAL"):
+            return False
+    parts.append(code.co_code.hex())
+    parts.append(repr(code.co_names))
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            if not _hash_code(const, parts):
+                return False
+        else:
+            parts.append(repr(const))
+    return True
+
+
+def _global_names(code: CodeType) -> list[str]:
+    names = list(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names.extend(_global_names(const))
+    return names
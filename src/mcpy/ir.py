@@ -0,0 +1,305 @@
+'''
+Module for the intermediate representation of commands.
+
+The command helpers of `mcpy.cmd` yield command nodes instead of strings. Nodes keep their operands (scores, data paths, selectors, NBT values, etc) as objects and are only turned into text when the file they were written to is flushed. Passes can read and replace the commands of a generated function with `get_commands` and `set_commands`.
+
+NBT values and tellraw components are serialized when the command is written, so the dicts and lists they were made from can be changed afterwards. Scores, data paths and selectors are serialized lazily.
+
+Example:
+    ``` python
+    @mcfunction
+    def foo():
+        yield ScoreboardPlayers("add", Score("$count", "obj"), 1)
+        yield FunctionCall("ns:bar")
+        # strings are still accepted as commands
+        yield "say done"
+    ```
+'''
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Iterable
+import re
+
+
+
+class Command:
+    '''Base class of command nodes
+
+    Commands can be concatenated with strings like the command strings they replace, e.g. `"$" + command`. They are not `str` instances though, so use `str(command)` or `"".join(map(str, commands))` to get the text.
+    '''
+
+    __slots__ = ()
+
+    def __str__(self) -> str:
+        raise NotImplementedError()
+
+    def __add__(self, other: str) -> str:
+        if isinstance(other, str):
+            return str(self) + other
+        return NotImplemented
+
+    def __radd__(self, other: str) -> str:
+        if isinstance(other, str):
+            return other + str(self)
+        return NotImplemented
+
+
+@dataclass(slots=True)
+class Raw(Command):
+    '''A command, comment or blank line kept as text, e.g. a string yielded by a generator
+
+    Attributes:
+        text: the line without its trailing newline
+    '''
+
+    text: str
+
+    def __str__(self) -> str:
+        return self.text
+
+
+@dataclass(slots=True)
+class FunctionCall(Command):
+    '''`function <resource>` command
+
+    Attributes:
+        resource: function resource location or function tag
+        arguments: macro arguments, e.g. "with storage ns:io args", or None
+    '''
+
+    resource: any
+    arguments: any = None
+
+    def __str__(self) -> str:
+        return _join("function", self.resource, self.arguments)
+
+
+@dataclass(slots=True)
+class ScoreboardPlayers(Command):
+    '''`scoreboard players <action> <score> [value]` command
+
+    Attributes:
+        action: get, set, add, remove, reset or enable
+        score: score holder and objective, e.g. a `Score`
+        value: amount for set, add and remove
+    '''
+
+    action: str
+    score: any
+    value: any = None
+
+    def __str__(self) -> str:
+        if self.value is None:
+            return f"scoreboard players {self.action} {self.score}"
+        return f"scoreboard players {self.action} {self.score} {self.value}"
+
+
+@dataclass(slots=True)
+class ScoreboardOperation(Command):
+    '''`scoreboard players operation <target> <operation> <source>` command'''
+
+    target: any
+    operation: str
+    source: any
+
+    def __str__(self) -> str:
+        return f"scoreboard players operation {self.target} {self.operation} {self.source}"
+
+
+@dataclass(slots=True)
+class ScoreboardObjectivesAdd(Command):
+    '''`scoreboard objectives add <name> <criteria>` command'''
+
+    name: str
+    criteria: str = "dummy"
+
+    def __str__(self) -> str:
+        return f"scoreboard objectives add {self.name} {self.criteria}"
+
+
+@dataclass(slots=True)
+class DataGet(Command):
+    '''`data get <target type> <target>` command
+
+    Attributes:
+        target_type: storage, entity or block
+        target: data path
+    '''
+
+    target_type: str
+    target: any
+
+    def __str__(self) -> str:
+        return f"data get {self.target_type} {self.target}"
+
+
+@dataclass(slots=True)
+class DataModify(Command):
+    '''`data modify <target type> <target> <operation> <source>` command
+
+    Attributes:
+        target_type: storage, entity or block
+        target: data path
+        operation: set, append or merge
+        source_type: value, storage, entity or block
+        source: NBT value or data path
+    '''
+
+    target_type: str
+    target: any
+    operation: str
+    source_type: str
+    source: any
+
+    def __str__(self) -> str:
+        source_type = self.source_type
+        if source_type != "value":
+            source_type = "from " + source_type
+        return f"data modify {self.target_type} {self.target} {self.operation} {source_type} {self.source}"
+
+
+@dataclass(slots=True)
+class DataRemove(Command):
+    '''`data remove <target type> <target>` command'''
+
+    target_type: str
+    target: any
+
+    def __str__(self) -> str:
+        return f"data remove {self.target_type} {self.target}"
+
+
+@dataclass(slots=True)
+class TagCommand(Command):
+    '''`tag <selector> <action> <tag>` command
+
+    Attributes:
+        selector: entity selector
+        action: add or remove
+        tag: tag name
+    '''
+
+    selector: any
+    action: str
+    tag: any
+
+    def __str__(self) -> str:
+        return f"tag {self.selector} {self.action} {self.tag}"
+
+
+@dataclass(slots=True)
+class Tellraw(Command):
+    '''`tellraw <selector> <components>` command'''
+
+    selector: any
+    components: any
+
+    def __str__(self) -> str:
+        return f"tellraw {self.selector} {self.components}"
+
+
+@dataclass(slots=True)
+class Execute(Command):
+    '''`execute <conditions> run <command>` command
+
+    Attributes:
+        conditions: execute subcommands, e.g. "as @a at @s"
+        command: command to run
+    '''
+
+    conditions: str
+    command: Command
+
+    def __str__(self) -> str:
+        return _join("execute", self.conditions, "run", self.command)
+
+
+def _join(*tokens: any) -> str:
+    # same as cmd.util.tokens_to_str, which cannot be imported here without an import cycle
+    return " ".join(t for t in map(str, filter(bool, tokens)) if t)
+
+
+def as_command(item: any) -> Command:
+    '''Get the command node of an item written to an mcfunction, strings are kept as `Raw` until `get_commands` parses them'''
+    if isinstance(item, Command):
+        return item
+    return Raw(str(item).rstrip("\n"))
+
+
+_SCORE_ACTIONS = {"get", "set", "add", "remove", "reset", "enable"}
+_EXECUTE_RUN = re.compile(r" run ")
+
+
+def parse_command(line: str) -> Command:
+    """Parse a single command into a node
+
+    Function calls, execute commands, scoreboard player commands and tag commands are recognized. Anything else, including comments and blank lines, is kept as `Raw`.
+
+    Args:
+        line: command without a trailing newline
+
+    Returns:
+        The command node
+    """
+    from .cmd.scoreboard import Score
+
+    tokens = line.split(" ")
+    first = tokens[0]
+    if first == "function" and len(tokens) == 2:
+        return FunctionCall(tokens[1])
+    if first == "execute":
+        match = _EXECUTE_RUN.search(line)
+        if match is not None and match.start() > len("execute"):
+            conditions = line[len("execute ") : match.start()]
+            return Execute(conditions, parse_command(line[match.end() :]))
+    elif first == "scoreboard" and len(tokens) >= 5 and tokens[1] == "players":
+        action = tokens[2]
+        if action in _SCORE_ACTIONS and len(tokens) <= 6:
+            value = tokens[5] if len(tokens) == 6 else None
+            return ScoreboardPlayers(action, Score(tokens[3], tokens[4]), value)
+        if action == "operation" and len(tokens) == 8:
+            return ScoreboardOperation(Score(tokens[3], tokens[4]), tokens[5], Score(tokens[6], tokens[7]))
+    elif first == "tag" and len(tokens) == 4 and tokens[2] in ("add", "remove"):
+        return TagCommand(tokens[1], tokens[2], tokens[3])
+    return Raw(line)
+
+
+def get_commands(f) -> list[Command]:
+    """Get the commands of a generated mcfunction file
+
+    Args:
+        f: OutputFile of the function
+
+    Returns:
+        Commands in order, with comments and blank lines as `Raw` nodes
+    """
+    commands = []
+    for chunk in f.chunks:
+        if isinstance(chunk, Command):
+            commands.append(_parse_raw(chunk))
+        else:
+            lines = chunk.split("\n")
+            if lines[-1] == "":
+                lines.pop()
+            commands.extend(map(parse_command, lines))
+    return commands
+
+
+def _parse_raw(command: Command) -> Command:
+    if isinstance(command, Raw):
+        return parse_command(command.text)
+    if isinstance(command, Execute) and isinstance(command.command, (Raw, Execute)):
+        inner = _parse_raw(command.command)
+        if inner is not command.command:
+            return Execute(command.conditions, inner)
+    return command
+
+
+def set_commands(f, commands: Iterable[Command]) -> None:
+    """Replace the commands of a generated mcfunction file
+
+    Args:
+        f: OutputFile of the function
+        commands: new commands of the function
+    """
+    f.chunks = list(commands)
@@ -1,18 +1,35 @@
 import argparse
 import importlib
+import sys
 from typing import Callable
 from types import ModuleType
 from pathlib import Path
 from timeit import default_timer as timer
 import traceback
 from datetime import timedelta
-from .context import Context, write, init_context
+from .context import Context, write, init_context, get_global_context
+from .output import OutputBackend, OUTPUT_BACKENDS, create_output, ZipOutput, MemoryOutput
+from .incremental import BuildCache
+from .reloader import ModuleReloader
+from .bundle_cache import BundleCache, hash_files
+from .output import MANIFEST_NAME
+from .trace import Tracer, span, tracing, get_tracer
+from .passes import run_passes, release_config
+from .analyze import MAX_COMMAND_CHAIN_LENGTH, analyze, format_analysis, to_dot, to_json
+from .stats import BuildStats, format_report, format_diff, diff_reports, write_report, load_report
+import hashlib
 import functools
 import json
 import tempfile
 import shutil
 import re
 from string import Template
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+    FIRST_COMPLETED,
+)
 
 from .config import (
     load_config,
@@ -22,6 +39,8 @@ from .config import (
     find_config_path,
     DEFAULT_CONFIG,
     DEFAULT_NAME,
+    DEFAULT_WORKSPACE_NAME,
+    load_workspace,
 )
 
 from watchfiles import watch
@@ -64,6 +83,12 @@ class _Datapack:
         # TODO this could be copy since there are no deps
         dpbuild.run(self.path, [], output_dir)
 
+    def bundle_key(self) -> str:
+        """Get a hash of everything that affects the bundled datapack"""
+        h = hashlib.sha1(type(self).__name__.encode("utf-8"))
+        hash_files(h, self.path)
+        return h.hexdigest()
+
 
 class _ArchiveDatapack(_Datapack):
    '''Class to represent a compressed datapack'''
@@ -73,13 +98,23 @@ class _ArchiveDatapack(_Datapack):
    def __init__(self, path: str | Path) -> None:
        self.path = Path(path)
 
+   def bundle_key(self) -> str:
+       return hashlib.sha1(self.path.read_bytes()).hexdigest()
+
 
 class _McpyDatapack(_Datapack):
     '''Class to represent an Mcpy datapack'''
+    _instances: dict[tuple[Path, bool], "_McpyDatapack"] = {}
+
     def __init__(self, path) -> None:
         super().__init__(path)
         _valid_mcpy_datapack_path(path)
         self.module = None
+        self.built = False
+        self.cache: BuildCache = None
+        self.stats: BuildStats = None
+        self.reloader: ModuleReloader = None
+        self.release = False
 
     def __get_fn(self) -> Callable:
         marked_functions = [
@@ -118,18 +153,69 @@ class _McpyDatapack(_Datapack):
                 return next(res)
         raise ValueError("Unable to find entrypoint .py file!")
 
-    def build(self, output_dir=None) -> None:
-        '''Update the datapack's data directory by running its code'''
+    def build(self, output_dir=None, output: OutputBackend = None) -> None:
+        '''Update the datapack's data directory by running its code
+
+        Args:
+            output_dir: The output location of the datapack, defaults to the datapack's directory
+            output: The backend to write generated files to, defaults to the filesystem at output_dir
+        '''
         if not output_dir:
             output_dir = self.path
+        self.load_module()
+        config = self.load_config()
+        if self.release:
+            config = release_config(config)
+        build(self.__get_fn(), output_dir, config=config, output=output, cache=self.cache, stats=self.stats)
+        self.built = True
+
+    def load_module(self) -> None:
+        '''Import the datapack's python module, or reload it and its changed dependencies if already imported'''
         if not self.module:
             module_path = self.get_module_path()
+            if module_path.is_absolute() and module_path.is_relative_to(Path.cwd()):
+                # dependency paths are resolved, import them relative to the working directory
+                module_path = module_path.relative_to(Path.cwd())
             module_name = str(module_path.parent / module_path.stem).replace("/", ".")
-            self.module = importlib.import_module(module_name)
+            with span(f"import {module_name}", "import"):
+                if module_name in sys.modules:
+                    # loaded by another instance for this datapack, e.g. as a dependency
+                    self.module = importlib.reload(sys.modules[module_name])
+                else:
+                    self.module = importlib.import_module(module_name)
+            self.reloader = ModuleReloader(module_path.parent)
+            self.reloader.update()
         else:
-            self.module = importlib.reload(self.module)
+            # reload changed modules of the pack's source tree and the modules importing them
+            with span(f"reload {self.module.__name__}", "import"):
+                self.reloader.reload()
+                self.module = sys.modules.get(self.module.__name__) or importlib.import_module(
+                    self.module.__name__
+                )
+
+    def get_watch_dirs(self, include_deps: bool = False) -> list[Path]:
+        '''Get the directories to watch for changes that require a rebuild
 
-        build(self.__get_fn(), output_dir, config=self.load_config())
+        Args:
+            include_deps: also watch the datapacks included as dependencies
+
+        Returns:
+            A list of directory paths
+        '''
+        watch_dirs = [self.get_module_path().parent]
+        if include_deps:
+            for p in self.get_includes():
+                p = self.path.resolve().parent.resolve() / p
+                try:
+                    dep_pack = _McpyDatapack(p)
+                    watch_dirs.append(dep_pack.get_module_path().parent)
+                except:
+                    try:
+                        dep_pack = _valid_datapack_path(p)
+                        watch_dirs.append(dep_pack)
+                    except:
+                        pass
+        return watch_dirs
 
     def get_includes(self) -> list[str | Path]:
         '''Get the list of dependency paths to be included in the bundled datapack
@@ -140,10 +226,144 @@ class _McpyDatapack(_Datapack):
         '''
         return getattr(self.__get_fn(), "mcpy_include")
 
-    def bundle(self, output_dir: Path):
-        '''Bundle the datapack and dependencies to an output directory'''
-        if not self.module:
+    @classmethod
+    def for_path(cls, path: str | Path, release: bool = False) -> "_McpyDatapack":
+        '''Get the shared instance for a dependency datapack path so its module is only loaded once
+
+        Args:
+            path: Path of the datapack
+            release: Whether the datapack is built with every optimization pass enabled
+        '''
+        key = (Path(path).resolve(), release)
+        if key not in cls._instances:
+            datapack = cls(path)
+            datapack.release = release
+            cls._instances[key] = datapack
+        return cls._instances[key]
+
+    def bundle_key(self, _including: tuple[Path] = ()) -> str:
+        '''Get a hash of this datapack's sources, config, pack.mcmeta and included dependencies
+
+        Returns:
+            Hex digest
+        '''
+        self.load_module()
+        path = self.path.resolve()
+        if path in _including:
+            raise ValueError(f"Datapack includes itself: {' -> '.join(map(str, (*_including, path)))}")
+        h = hashlib.sha1(type(self).__name__.encode("utf-8"))
+        hash_files(h, self.get_module_path().parent, "**/*.py")
+        h.update(json.dumps(self.load_config(), sort_keys=True).encode("utf-8"))
+        h.update(b"release" if self.release else b"debug")
+        h.update((self.path / "pack.mcmeta").read_bytes())
+        for p in self.get_includes():
+            p = path.parent / p
+            h.update(str(p).encode("utf-8"))
+            try:
+                dep_pack = _McpyDatapack.for_path(p, self.release)
+                h.update(dep_pack.bundle_key((*_including, path)).encode("utf-8"))
+            except argparse.ArgumentTypeError:
+                if p.is_dir():
+                    h.update(_Datapack(p).bundle_key().encode("utf-8"))
+                elif p.is_file():
+                    h.update(_ArchiveDatapack(p).bundle_key().encode("utf-8"))
+        return h.hexdigest()
+
+    def dependency_graph(self) -> dict[Path, list[Path]]:
+        '''Resolve the mcpy datapacks included by this datapack, directly or through other dependencies
+
+        Returns:
+            Dict of each resolved datapack path, including this one, to the paths of the mcpy datapacks it includes
+
+        Raises:
+            ValueError: if datapacks include each other in a cycle
+        '''
+        graph: dict[Path, list[Path]] = {}
+
+        def visit(datapack: _McpyDatapack, including: tuple[Path]):
+            path = datapack.path.resolve()
+            if path in including:
+                cycle = " -> ".join(map(str, (*including[including.index(path):], path)))
+                raise ValueError(f"Datapack dependency cycle: {cycle}")
+            if path in graph:
+                return
+            datapack.load_module()
+            deps = []
+            for p in datapack.get_includes():
+                p = path.parent / p
+                try:
+                    dep_pack = _McpyDatapack.for_path(p, self.release)
+                except argparse.ArgumentTypeError:
+                    continue
+                deps.append(dep_pack.path.resolve())
+                visit(dep_pack, (*including, path))
+            graph[path] = deps
+
+        visit(self, ())
+        return graph
+
+    def bundle_dependencies(self, cache: BundleCache = None, jobs: int = None) -> None:
+        '''Bundle all mcpy dependencies into the cache, independent dependencies concurrently
+
+        A dependency is bundled once every dependency it includes has been bundled. Each dependency that is not cached yet is built in its own worker process, since building reloads modules and is bound by the CPU.
+
+        Args:
+            cache: Bundle cache to bundle into, defaults to the shared cache directory
+            jobs: Maximum number of dependencies to bundle at once
+
+        Raises:
+            RuntimeError: if a dependency fails to bundle, the datapacks including it are not bundled
+        '''
+        if cache is None:
+            cache = BundleCache()
+        graph = self.dependency_graph()
+        dependencies = {p: set(deps) for p, deps in graph.items() if p != self.path.resolve()}
+        for p, error in _bundle_graph(dependencies, cache, jobs, self.release).items():
+            raise RuntimeError(f"Failed to bundle dependency {p}: {error!r}") from error
+
+    def is_bundle_cached(self, cache: BundleCache) -> bool:
+        '''Whether the cache holds an up to date bundle of this datapack'''
+        return cache.get(self.bundle_key(), self.__manifest_stamp()) is not None
+
+    def bundle_cached(self, output_dir: Path = None, cache: BundleCache = None) -> None:
+        '''Bundle the datapack and dependencies to an output directory, reusing the last bundle if nothing changed
+
+        Args:
+            output_dir: Directory to bundle into, or None to only update the cache
+            cache: Bundle cache to use, defaults to the shared cache directory
+        '''
+        if cache is None:
+            cache = BundleCache()
+        with span(f"bundle {self.path}", "bundle"):
+            key = self.bundle_key()
+            entry = cache.get(key, self.__manifest_stamp())
+            if entry is None:
+                def rebuild_and_bundle(bundle_dir: Path):
+                    self.build()
+                    self.bundle(bundle_dir, cache)
+
+                entry = cache.put(key, rebuild_and_bundle, self.__manifest_stamp)
+            if output_dir is not None:
+                shutil.copytree(entry, output_dir, dirs_exist_ok=True)
+
+    def __manifest_stamp(self) -> str:
+        # the data directory must still be the one built from these sources
+        manifest = self.path / MANIFEST_NAME
+        return hashlib.sha1(manifest.read_bytes()).hexdigest() if manifest.is_file() else ""
+
+    def bundle(self, output_dir: Path, cache: BundleCache = None, jobs: int = None):
+        '''Bundle the datapack and dependencies to an output directory
+
+        Args:
+            output_dir: Directory to bundle into
+            cache: Bundle cache for mcpy dependencies, defaults to the shared cache directory
+            jobs: Maximum number of dependencies to bundle at once
+        '''
+        if not self.built:
             self.build()
+        if cache is None:
+            cache = BundleCache()
+        self.bundle_dependencies(cache, jobs)
 
         dep_paths: list[Path] = []
         with tempfile.TemporaryDirectory(prefix=f"deps_{self.path.stem}") as tmpdirname:
@@ -153,8 +373,8 @@ class _McpyDatapack(_Datapack):
                 p = self.path.resolve().parent.resolve() / p
                 try:
                     dep_path = _valid_mcpy_datapack_path(p)
-                    dep_pack = _McpyDatapack(p)
-                    dep_pack.bundle(tmpdir)
+                    dep_pack = _McpyDatapack.for_path(p, self.release)
+                    dep_pack.bundle_cached(tmpdir, cache)
                     dep_paths.append(p)
                 except Exception as e1:
                     try:
@@ -170,7 +390,8 @@ class _McpyDatapack(_Datapack):
                         else:
                             print(f"Unknown datapack type at path: {p}")
 
-            dpbuild.run(self.path, dep_paths, output_dir)
+            with span("dpbuild.run", "bundle", datapack=str(self.path)):
+                dpbuild.run(self.path, dep_paths, output_dir)
 
 
 def __get_args() -> argparse.Namespace:
@@ -179,13 +400,64 @@ def __get_args() -> argparse.Namespace:
     init_parser = subparsers.add_parser("init")
     # TODO type dir not just path
     init_parser.add_argument("dir", nargs="?", type=Path, default=".", help="Directory")
-    build_parser = subparsers.add_parser("build")
-    build_parser.add_argument(
+    bench_parser = subparsers.add_parser("bench", help="time the generation of synthetic datapacks")
+    bench_parser.add_argument("benchmarks", nargs="*", help="names of the benchmarks to run, defaults to all")
+    bench_parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    bench_parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="multiplier of the size of each synthetic datapack (default: 1)",
+    )
+    bench_parser.add_argument("--repeat", type=int, default=3, help="number of timed builds per benchmark, the fastest is reported (default: 3)")
+    bench_parser.add_argument("--no-memory", action="store_true", help="skip the slower peak memory measurement")
+    bench_parser.add_argument("--save", type=Path, metavar="FILE", help="write the results to FILE for use as a baseline")
+    bench_parser.add_argument("--baseline", type=Path, metavar="FILE", help="compare the results to a baseline FILE and exit with an error on regressions")
+    bench_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="fraction of throughput loss or memory growth allowed before a regression is reported (default: 0.25)",
+    )
+    analyze_parser = subparsers.add_parser("analyze", help="estimate the commands a datapack runs each tick")
+    analyze_parser.add_argument(
         "mcpy_datapack",
         nargs="?",
         type=_McpyDatapack,
-        default=".",
-        help="mcpy datapack directory",
+        help="mcpy datapack directory, defaults to the current directory",
+    )
+    analyze_parser.add_argument("--budget", type=int, help="maximum number of commands a tick function may run, exit with an error if one runs more")
+    analyze_parser.add_argument(
+        "--max-chain-length",
+        type=int,
+        default=MAX_COMMAND_CHAIN_LENGTH,
+        help=f"value of the maxCommandChainLength game rule, exit with an error if a tick function can run more commands (default: {MAX_COMMAND_CHAIN_LENGTH})",
+    )
+    analyze_parser.add_argument(
+        "--entities",
+        type=int,
+        default=1,
+        help="number of entities assumed to match @e and @a selectors in execute as/at (default: 1)",
+    )
+    analyze_parser.add_argument("--strict", action="store_true", help="exit with an error if a tick function uses an @e selector without a type, limit or distance")
+    analyze_parser.add_argument("--release", action="store_true", help="analyze the datapack built with every optimization pass")
+    analyze_parser.add_argument("--json", type=Path, metavar="FILE", help="write the weighted call graph to FILE as JSON")
+    analyze_parser.add_argument("--dot", type=Path, metavar="FILE", help="write the weighted call graph to FILE in the Graphviz DOT format")
+    build_parser = subparsers.add_parser("build")
+    build_parser.add_argument(
+        "mcpy_datapacks",
+        nargs="*",
+        type=_McpyDatapack,
+        metavar="mcpy_datapack",
+        help="mcpy datapack directories, defaults to the current directory. Multiple datapacks are built in parallel",
+    )
+    build_parser.add_argument(
+        "--workspace",
+        type=Path,
+        help=f"workspace file listing datapack directories to build (e.g. {DEFAULT_WORKSPACE_NAME})",
+    )
+    build_parser.add_argument(
+        "-j", "--jobs", type=int, help="maximum number of datapacks or dependencies to build in parallel"
     )
     build_parser.add_argument(
         "-w", "--watch", action="store_true", help="watch file changes and rebuild"
@@ -193,16 +465,73 @@ def __get_args() -> argparse.Namespace:
     build_parser.add_argument(
         "-o", "--output-dir", type=Path, help="Directory to put compiled datapack"
     )
+    build_parser.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="in watch mode, only re-run generators whose code or inputs changed",
+    )
+    build_parser.add_argument(
+        "--backend",
+        choices=OUTPUT_BACKENDS.keys(),
+        default="filesystem",
+        help="where generated files are written. memory and null do not touch the data directory",
+    )
+    build_parser.add_argument(
+        "--zip",
+        type=Path,
+        metavar="DIR",
+        help="write the generated files and pack.mcmeta directly to DIR/<datapack>.zip instead of the data directory",
+    )
+    build_parser.add_argument(
+        "--compression-level",
+        type=int,
+        choices=range(0, 10),
+        default=6,
+        metavar="{0-9}",
+        help="zip compression level, 0 stores files uncompressed (default: 6)",
+    )
+    build_parser.add_argument(
+        "--release",
+        action="store_true",
+        help="enable every optimization pass, including removing the functions that are never called",
+    )
+    build_parser.add_argument(
+        "--trace",
+        type=Path,
+        metavar="FILE",
+        help="write a timeline of the build to FILE in the Chrome trace event format",
+    )
+    build_parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print the commands, size, generation time and execute spills of each namespace and the largest functions",
+    )
+    build_parser.add_argument(
+        "--stats-json",
+        type=Path,
+        metavar="FILE",
+        help="write the statistics of every resource to FILE as JSON, implies --stats",
+    )
+    build_parser.add_argument(
+        "--stats-diff",
+        type=Path,
+        metavar="FILE",
+        help="compare the statistics against a previous --stats-json report, implies --stats",
+    )
     args = parser.parse_args()
-    sub_commands = ('init', 'build')
+    sub_commands = ('init', 'build', 'bench', 'analyze')
     if args.command not in sub_commands:
         print(f'Must specify a valid command: {", ".join(sub_commands)}')
         print(f'See help command for details.')
         exit(1)
+    if args.command == 'build' and args.output_dir and (args.zip or args.backend != 'filesystem'):
+        # bundling packages the data directory, which these options do not write
+        parser.error('--output-dir bundles the data directory, it cannot be used with --zip or --backend memory/null')
     return args
 
 
-def build(builder_fn: Callable[[Context], None], output_dir: Path, config=None):
+def build(builder_fn: Callable[[Context], None], output_dir: Path, config=None, output: OutputBackend = None, cache: BuildCache = None, stats: BuildStats = None):
     '''Calls the given datapack builder function and writes the datapack to the output directory
     
     This automatically gets called when using the CLI tool.
@@ -210,15 +539,31 @@ def build(builder_fn: Callable[[Context], None], output_dir: Path, config=None):
     Args:
         builder_fn: The datapack builder function
         output_dir: The output location of the datapack
+        config: The datapack config, defaults to the default config
+        output: The backend to write generated files to, defaults to the filesystem at output_dir
+        cache: Cache of generator output to reuse from previous builds
+        stats: Collector of per-resource statistics, its report is updated after the build
     
     '''
     if config is None:
         config = load_default_config()
-    with init_context(output_dir, config):
-        items = builder_fn()
-        if items:
-            for item in items:
-                write(item)
+    if cache is not None:
+        cache.begin(config)
+    if stats is not None:
+        stats.begin()
+    with init_context(output_dir, config, output=output, cache=cache, stats=stats):
+        with span(f"datapack {getattr(builder_fn, '__name__', builder_fn)}", "datapack"):
+            items = builder_fn()
+            if items:
+                for item in items:
+                    write(item)
+        if cache is not None:
+            cache.end()
+        run_passes(get_global_context())
+        if stats is not None:
+            stats.end(get_global_context())
+        with span("flush", "output", files=len(get_global_context().files)):
+            get_global_context().flush()
 
 
 def _valid_datapack_path(path_str: str) -> Path:
@@ -322,47 +667,335 @@ def simple_pack():
         pack_file_path.write_text(default_program)
 
 
+def _create_datapack_output(datapack: _Datapack, backend: str = "filesystem", zip_dir: Path = None, compression_level: int = 6) -> OutputBackend:
+    '''Create the output backend for a datapack build from command line options'''
+    if zip_dir:
+        zip_path = Path(zip_dir) / f"{datapack.path.resolve().name}.zip"
+        return ZipOutput(zip_path, compression_level, base_dir=datapack.path)
+    return create_output(backend, datapack.path)
+
+
+def _bundle_graph(dependencies: dict[Path, set[Path]], cache: BundleCache, jobs: int = None, release: bool = False) -> dict[Path, Exception]:
+    '''Bundle mcpy datapacks into the cache in worker processes, each after the datapacks it includes
+
+    Args:
+        dependencies: Dict of each datapack path to bundle to the paths of the mcpy datapacks it includes
+        cache: Bundle cache to bundle into
+        jobs: Maximum number of datapacks to bundle at once
+        release: Build the datapacks with every optimization pass enabled
+
+    Returns:
+        Dict of the datapacks that failed to bundle to their exception, the datapacks including them are not bundled
+    '''
+    remaining = dict(dependencies)
+    tracer = get_tracer()
+    # cached datapacks are done, only start workers when something has to be rebuilt
+    done = {p for p in remaining if _McpyDatapack.for_path(p, release).is_bundle_cached(cache)}
+    for p in done:
+        del remaining[p]
+    failed = {}
+    if not remaining:
+        return failed
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        running = {}
+        while remaining or running:
+            for p in sorted(p for p, deps in remaining.items() if deps <= done):
+                del remaining[p]
+                future = executor.submit(_bundle_dependency, p, cache.root, tracer is not None, release)
+                running[future] = p
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                p = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    failed[p] = error
+                else:
+                    done.add(p)
+                    if tracer is not None:
+                        tracer.events.extend(future.result())
+    return failed
+
+
+def _bundle_dependency(path: Path, cache_root: Path, trace: bool = False, release: bool = False) -> list[dict]:
+    '''Bundle a dependency datapack into the cache. Used as a process pool task
+
+    Returns:
+        The recorded trace events
+    '''
+    with tracing(Tracer() if trace else None) as tracer:
+        _McpyDatapack.for_path(path, release).bundle_cached(None, BundleCache(cache_root))
+        return tracer.events if tracer else []
+
+
+def _build_datapack(path: Path, output_dir: Path = None, backend: str = "filesystem", zip_dir: Path = None, compression_level: int = 6, jobs: int = None, trace: bool = False, stats: bool = False, release: bool = False) -> tuple[float, list[dict], dict]:
+    '''Build and optionally bundle a single datapack. Used as a process pool task
+
+    Returns:
+        Build time in seconds, the recorded trace events and the statistics report
+    '''
+    with tracing(Tracer() if trace else None) as tracer:
+        start = timer()
+        datapack = _McpyDatapack(path)
+        datapack.stats = BuildStats() if stats else None
+        datapack.release = release
+        datapack.build(output=_create_datapack_output(datapack, backend, zip_dir, compression_level))
+        if output_dir:
+            datapack.bundle(output_dir, jobs=jobs)
+        report = datapack.stats.report if stats else None
+        return timer() - start, tracer.events if tracer else [], report
+
+
+def build_all(paths: list[Path], output_dir: Path = None, backend: str = "filesystem", jobs: int = None, zip_dir: Path = None, compression_level: int = 6, stats: dict[Path, dict] = None, release: bool = False) -> dict[Path, float | Exception]:
+    '''Build independent datapacks concurrently in a process pool
+
+    Each datapack is built in its own worker process, so the output is the same as building them one at a time.
+
+    Args:
+        paths: Paths of the mcpy datapacks to build
+        output_dir: Directory to bundle each datapack into
+        backend: Name of the output backend to write generated files to
+        jobs: Maximum number of worker processes, defaults to the number of CPUs
+        zip_dir: Directory to write each datapack's generated files to as a zip instead of using the backend
+        compression_level: zlib compression level of the zip files
+        stats: Dict to add the statistics report of each built datapack to, None to not collect statistics
+        release: Build the datapacks with every optimization pass enabled
+
+    Returns:
+        Dict of each datapack path to its build time in seconds, or the exception that failed its build
+
+    Raises:
+        ValueError: if bundling to output_dir is combined with a zip_dir or a backend other than the filesystem
+    '''
+    if output_dir and (zip_dir or backend != "filesystem"):
+        raise ValueError("Bundling to output_dir needs the generated files in the data directory, use the filesystem backend without zip_dir")
+    results = {}
+    tracer = get_tracer()
+    if output_dir:
+        results = _bundle_shared_dependencies(paths, jobs, release)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(
+                _build_datapack,
+                path,
+                output_dir,
+                backend,
+                zip_dir,
+                compression_level,
+                jobs,
+                tracer is not None,
+                stats is not None,
+                release,
+            ): path
+            for path in paths
+            if path not in results
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path], events, report = future.result()
+                if tracer is not None:
+                    tracer.events.extend(events)
+                if stats is not None:
+                    stats[path] = report
+            except Exception as e:
+                results[path] = e
+    return {path: results[path] for path in paths}
+
+
+def _bundle_shared_dependencies(paths: list[Path], jobs: int = None, release: bool = False) -> dict[Path, Exception]:
+    '''Bundle the dependencies of several datapacks into the cache once, before the datapacks are built in parallel
+
+    Otherwise each worker building a datapack would bundle the dependencies it shares with the others at the same time.
+
+    Returns:
+        Dict of the datapacks that cannot be built to the exception of their dependency
+    '''
+    failed = {}
+    pack_dependencies = {}
+    dependencies = {}
+    for path in paths:
+        try:
+            graph = _McpyDatapack.for_path(path, release).dependency_graph()
+        except Exception as e:
+            failed[path] = e
+            continue
+        pack_dependencies[path] = set(graph) - {Path(path).resolve()}
+        dependencies.update((p, set(deps)) for p, deps in graph.items() if p != Path(path).resolve())
+    with span("bundle shared dependencies", "bundle"):
+        errors = _bundle_graph(dependencies, BundleCache(), jobs, release)
+    # the dependency graphs include indirect dependencies, so every datapack needing a failed one is found
+    for path, deps in pack_dependencies.items():
+        for dep in sorted(deps & errors.keys()):
+            failed[path] = RuntimeError(f"Failed to bundle dependency {dep}: {errors[dep]!r}")
+    return failed
+
+
 def _main():
     args = __get_args()
     if args.command == "init":
         init_project(args.dir)
         return
-    
+    if args.command == "bench":
+        _bench_command(args)
+        return
+    if args.command == "analyze":
+        _analyze_command(args)
+        return
+    with tracing(Tracer() if args.trace else None):
+        _build_command(args)
+
 
-    datapack: _Datapack = args.mcpy_datapack
+def _bench_command(args: argparse.Namespace):
+    from .bench import BENCHMARKS, run_benchmark, load_results, save_results, compare_results, format_results
 
-    def timed_build():
+    if args.list:
+        for bench in BENCHMARKS.values():
+            print(f"{bench.name:<24} {bench.size:>10,}  {bench.description}")
+        return
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        print(f'Unknown benchmarks: {", ".join(unknown)}')
+        exit(1)
+    baseline = load_results(args.baseline) if args.baseline else None
+    results = []
+    for name in args.benchmarks or BENCHMARKS:
+        print(f"Running {name}")
+        results.append(run_benchmark(BENCHMARKS[name], args.scale, args.repeat, not args.no_memory))
+    print(format_results(results, baseline))
+    if args.save:
+        save_results(results, args.save)
+        print(f"Results written to {args.save}")
+    if baseline is not None:
+        regressions = compare_results(results, baseline, args.tolerance)
+        for name, problems in regressions.items():
+            print(f"Regression in {name}: {'; '.join(problems)}")
+        if regressions:
+            exit(1)
+
+
+def _analyze_command(args: argparse.Namespace):
+    datapack = args.mcpy_datapack or _McpyDatapack(".")
+    datapack.release = args.release
+    # analyze the generated files without touching the data directory
+    output = MemoryOutput()
+    datapack.build(output=output)
+    analysis = analyze(output.files, args.budget, args.max_chain_length, args.entities, args.strict)
+    print(format_analysis(analysis))
+    if args.json:
+        args.json.write_text(json.dumps(to_json(analysis), indent=2, sort_keys=True))
+        print(f"Call graph written to {args.json}")
+    if args.dot:
+        args.dot.write_text(to_dot(analysis))
+        print(f"Call graph written to {args.dot}")
+    if analysis.problems:
+        exit(1)
+
+
+def _build_command(args: argparse.Namespace):
+    datapacks: list[_McpyDatapack] = list(args.mcpy_datapacks)
+    if args.workspace:
+        datapacks.extend(_McpyDatapack(p) for p in load_workspace(args.workspace))
+    if not datapacks:
+        datapacks.append(_McpyDatapack("."))
+    if args.incremental:
+        for datapack in datapacks:
+            datapack.cache = BuildCache()
+    for datapack in datapacks:
+        datapack.release = args.release
+    collect_stats = args.stats or args.stats_json or args.stats_diff
+    if collect_stats:
+        for datapack in datapacks:
+            datapack.stats = BuildStats()
+
+    def timed_build(datapack: _McpyDatapack):
         print(f"Building {datapack.path}")
         start = timer()
-        datapack.build()
+        datapack.build(
+            output=_create_datapack_output(
+                datapack, args.backend, args.zip, args.compression_level
+            )
+        )
         if args.output_dir:
-            datapack.bundle(args.output_dir)
+            datapack.bundle(args.output_dir, jobs=args.jobs)
         end = timer()
         delta = timedelta(seconds=end - start)
         print(f"Build time: {delta}")
-
-    timed_build()
+        if datapack.cache is not None:
+            cache = datapack.cache
+            print(f"Reused {cache.hits} of {cache.hits + cache.misses} generators")
+        if collect_stats:
+            report_stats({datapack.path: datapack.stats.report})
+        write_trace()
+
+    def write_trace():
+        if args.trace:
+            get_tracer().write(args.trace)
+            print(f"Trace written to {args.trace}")
+
+    def report_stats(reports: dict[Path, dict]):
+        reports = {p: r for p, r in reports.items() if r is not None}
+        # a single datapack's report is written as is, several are keyed by datapack path
+        multiple = len(datapacks) > 1
+        previous = load_report(args.stats_diff) if args.stats_diff else None
+        for path, report in reports.items():
+            if multiple:
+                print(f"Statistics for {path}")
+            print(format_report(report))
+            if previous is not None:
+                old = previous.get("packs", {}).get(str(path)) if multiple else previous
+                if old is not None and "resources" in old:
+                    print(f"Changes since {args.stats_diff}")
+                    print(format_diff(diff_reports(old, report)))
+        if args.stats_json:
+            if multiple:
+                write_report({"packs": {str(p): r for p, r in reports.items()}}, args.stats_json)
+            else:
+                write_report(next(iter(reports.values())), args.stats_json)
+            print(f"Statistics written to {args.stats_json}")
+
+    if len(datapacks) == 1:
+        timed_build(datapacks[0])
+    else:
+        print(f"Building {len(datapacks)} datapacks")
+        start = timer()
+        reports = {} if collect_stats else None
+        results = build_all(
+            [d.path for d in datapacks],
+            args.output_dir,
+            args.backend,
+            args.jobs,
+            args.zip,
+            args.compression_level,
+            stats=reports,
+            release=args.release,
+        )
+        for path, result in results.items():
+            if isinstance(result, Exception):
+                print(f"Failed {path}: {result!r}")
+            else:
+                print(f"Built {path} in {timedelta(seconds=result)}")
+        print(f"Build time: {timedelta(seconds=timer() - start)}")
+        if collect_stats:
+            report_stats(reports)
+        write_trace()
+        if not args.watch and any(isinstance(r, Exception) for r in results.values()):
+            exit(1)
 
     if args.watch:
-        watch_dirs = [datapack.get_module_path().parent]
-        if args.output_dir:
-            for p in datapack.get_includes():
-                p = datapack.path.resolve().parent.resolve() / p
-                try:
-                    dep_pack = _McpyDatapack(p)
-                    watch_dirs.append(dep_pack.get_module_path().parent)
-                except:
-                    try:
-                        dep_pack = _valid_datapack_path(p)
-                        watch_dirs.append(dep_pack)
-                    except:
-                        pass
+        watch_dirs = {d: d.get_watch_dirs(include_deps=bool(args.output_dir)) for d in datapacks}
         print(f"Watching files")
         print("Press Ctrl-C to stop at anytime")
-        for _ in watch(*watch_dirs, raise_interrupt=False):
-            try:
-                timed_build()
-            except KeyboardInterrupt as e:
-                raise e
-            except Exception:
-                print(traceback.format_exc())
+        for changes in watch(*{p for dirs in watch_dirs.values() for p in dirs}, raise_interrupt=False):
+            changed_paths = [Path(p).resolve() for _, p in changes]
+            for datapack, dirs in watch_dirs.items():
+                dirs = [d.resolve() for d in dirs]
+                if not any(p.is_relative_to(d) for p in changed_paths for d in dirs):
+                    continue
+                try:
+                    timed_build(datapack)
+                except KeyboardInterrupt as e:
+                    raise e
+                except Exception:
+                    print(traceback.format_exc())
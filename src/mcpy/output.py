@@ -0,0 +1,349 @@
+'''
+Module for the output backends that generated datapack files are flushed to.
+
+Files are generated entirely in memory as `OutputFile` buffers and handed to an `OutputBackend` in one pass once the build has finished.
+
+Attributes:
+    OUTPUT_BACKENDS (dict[str, type[OutputBackend]]): Output backends selectable by name from the command line
+'''
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import struct
+import zlib
+
+MANIFEST_NAME = ".mcpy_manifest.json"
+STAGING_DIR_NAME = ".mcpy_staging"
+
+
+class OutputFile:
+    '''In-memory buffer for a single generated file
+
+    Attributes:
+        path: path of the file relative to the datapack root
+        chunks: written content in order, text or command nodes that are each serialized as one line
+        closed: whether the file is currently closed for writing
+    '''
+
+    __slots__ = ("path", "chunks", "closed")
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.chunks = []
+        self.closed = False
+
+    def write(self, content: any) -> None:
+        if self.closed:
+            raise ValueError(f"File is closed: {self.path}")
+        self.chunks.append(content)
+
+    def close(self) -> None:
+        self.closed = True
+
+    def getvalue(self) -> str:
+        '''Get the full content of the file'''
+        return "".join(c if isinstance(c, str) else f"{c}\n" for c in self.chunks)
+
+
+class OutputBackend:
+    '''Base class of the destinations a built datapack can be written to'''
+
+    def flush(self, files: dict[Path, OutputFile]) -> None:
+        """Write out all files generated by a build
+
+        Args:
+            files: generated files keyed by their path relative to the datapack root
+        """
+        raise NotImplementedError()
+
+
+class FileSystemOutput(OutputBackend):
+    '''Writes generated files under a directory on disk
+
+    A manifest of each written file's content hash is kept in the directory so that files whose content has not changed are not rewritten and files that are no longer generated are deleted. Changed files are first written to a staging directory and then moved into place.
+
+    Example:
+        ``` python
+        build(builder, Path("my_pack"), output=FileSystemOutput(Path("my_pack")))
+        ```
+    '''
+
+    def __init__(self, base_dir: Path, use_manifest: bool = True) -> None:
+        self.base_dir = Path(base_dir)
+        self.use_manifest = use_manifest
+        self.written: list[Path] = []
+        self.deleted: list[Path] = []
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.base_dir / MANIFEST_NAME
+
+    def load_manifest(self) -> dict[str, str]:
+        """Load the content hashes of the files written by the previous build
+
+        Returns:
+            Dict of posix paths relative to the datapack root to content hashes
+        """
+        if not self.use_manifest or not self.manifest_path.is_file():
+            return {}
+        try:
+            return json.loads(self.manifest_path.read_text())["files"]
+        except (ValueError, KeyError):
+            return {}
+
+    def flush(self, files: dict[Path, OutputFile]) -> None:
+        previous = self.load_manifest()
+        manifest = {}
+        changed: dict[Path, bytes] = {}
+        for path, f in files.items():
+            content = f.getvalue().encode("utf-8")
+            key = path.as_posix()
+            manifest[key] = content_hash(content)
+            if previous.get(key) != manifest[key] or not (self.base_dir / path).is_file():
+                changed[path] = content
+
+        self.written = sorted(changed)
+        self.deleted = sorted(Path(p) for p in previous.keys() - manifest.keys())
+        if changed:
+            self.__apply(changed)
+        for path in self.deleted:
+            (self.base_dir / path).unlink(missing_ok=True)
+            self.__remove_empty_parents(path)
+        if self.use_manifest and previous != manifest:
+            write_atomic(
+                self.manifest_path,
+                json.dumps({"files": manifest}, indent=1, sort_keys=True).encode("utf-8"),
+            )
+
+    def __apply(self, changed: dict[Path, bytes]) -> None:
+        # a directory per flush, so builds of the same datapack in other processes do not remove its files
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        staging_dir = Path(tempfile.mkdtemp(prefix=STAGING_DIR_NAME, dir=self.base_dir))
+        try:
+            for parent in {path.parent for path in changed}:
+                (staging_dir / parent).mkdir(parents=True, exist_ok=True)
+                (self.base_dir / parent).mkdir(parents=True, exist_ok=True)
+            for path, content in changed.items():
+                (staging_dir / path).write_bytes(content)
+            for path in changed:
+                os.replace(staging_dir / path, self.base_dir / path)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def __remove_empty_parents(self, path: Path) -> None:
+        for parent in path.parents:
+            if parent == Path("data") or parent == Path("."):
+                break
+            try:
+                (self.base_dir / parent).rmdir()
+            except OSError:
+                break
+
+
+class MemoryOutput(OutputBackend):
+    '''Keeps generated files in memory as a virtual filesystem
+
+    Attributes:
+        files: file contents keyed by their path relative to the datapack root
+
+    Example:
+        ``` python
+        output = MemoryOutput()
+        build(builder, Path("my_pack"), output=output)
+        output.read_text("data/mypack/functions/greet.mcfunction")
+        ```
+    '''
+
+    def __init__(self) -> None:
+        self.files: dict[Path, str] = {}
+
+    def flush(self, files: dict[Path, OutputFile]) -> None:
+        self.files = {path: f.getvalue() for path, f in files.items()}
+
+    def exists(self, path: str | Path) -> bool:
+        return Path(path) in self.files
+
+    def read_text(self, path: str | Path) -> str:
+        return self.files[Path(path)]
+
+
+class NullOutput(OutputBackend):
+    '''Discards generated files. Useful for measuring pure generation cost
+
+    Attributes:
+        file_count: number of files discarded by the last flush
+        byte_count: number of characters discarded by the last flush
+    '''
+
+    def __init__(self) -> None:
+        self.file_count = 0
+        self.byte_count = 0
+
+    def flush(self, files: dict[Path, OutputFile]) -> None:
+        self.file_count = len(files)
+        self.byte_count = sum(len(f.getvalue()) for f in files.values())
+
+
+class ZipOutput(OutputBackend):
+    '''Writes generated files directly into a zip archive
+
+    The archive is deterministic: entries are sorted by path and have a fixed timestamp. Entries are compressed in parallel before being written.
+
+    Attributes:
+        zip_path: path of the zip file to write
+        compression_level: zlib compression level, 0 stores entries uncompressed
+        workers: number of compression threads, defaults to the number of CPUs
+        base_dir: datapack root to copy pack.mcmeta and pack.png from
+
+    Example:
+        ``` python
+        output = ZipOutput(Path("dist/my_pack.zip"), base_dir=Path("my_pack"))
+        build(builder, Path("my_pack"), output=output)
+        ```
+    '''
+
+    def __init__(
+        self,
+        zip_path: Path,
+        compression_level: int = 6,
+        workers: int = None,
+        base_dir: Path = None,
+    ) -> None:
+        self.zip_path = Path(zip_path)
+        self.compression_level = compression_level
+        self.workers = workers
+        self.base_dir = base_dir
+
+    def flush(self, files: dict[Path, OutputFile]) -> None:
+        entries = {path.as_posix(): f.getvalue().encode("utf-8") for path, f in files.items()}
+        if self.base_dir is not None:
+            for name in PACK_FILES:
+                if (p := Path(self.base_dir) / name).is_file():
+                    entries[name] = p.read_bytes()
+        names = sorted(entries)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            compressed = list(executor.map(self.__compress, (entries[n] for n in names)))
+
+        self.zip_path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.zip_path, _zip_archive(names, compressed))
+
+    def __compress(self, content: bytes) -> tuple[bytes, int, int, int]:
+        crc = zlib.crc32(content)
+        if self.compression_level == 0:
+            return content, crc, len(content), _ZIP_STORED
+        compressor = zlib.compressobj(self.compression_level, zlib.DEFLATED, -15)
+        data = compressor.compress(content) + compressor.flush()
+        return data, crc, len(content), _ZIP_DEFLATED
+
+
+OUTPUT_BACKENDS = {
+    "filesystem": FileSystemOutput,
+    "memory": MemoryOutput,
+    "null": NullOutput,
+}
+
+
+PACK_FILES = ("pack.mcmeta", "pack.png")
+
+_ZIP_STORED = 0
+_ZIP_DEFLATED = 8
+# 1980-01-01 00:00:00, the earliest timestamp a zip entry can have
+_ZIP_DATE = (0 << 9) | (1 << 5) | 1
+_ZIP_TIME = 0
+_ZIP_UTF8_FLAG = 0x800
+_ZIP_VERSION = 20
+
+
+def _zip_archive(names: list[str], entries: list[tuple[bytes, int, int, int]]) -> bytes:
+    '''Assemble a zip archive from already compressed entries'''
+    if len(names) > 0xFFFF:
+        raise ValueError(f"Too many files for a zip archive: {len(names)}")
+    local = bytearray()
+    central = bytearray()
+    for name, (data, crc, size, method) in zip(names, entries):
+        encoded_name = name.encode("utf-8")
+        offset = len(local)
+        if max(offset, len(data), size) > 0xFFFFFFFF:
+            raise ValueError("Zip archive is too large")
+        local += struct.pack(
+            "<4s5H3L2H",
+            b"PK\x03\x04",
+            _ZIP_VERSION,
+            _ZIP_UTF8_FLAG,
+            method,
+            _ZIP_TIME,
+            _ZIP_DATE,
+            crc,
+            len(data),
+            size,
+            len(encoded_name),
+            0,
+        )
+        local += encoded_name
+        local += data
+        central += struct.pack(
+            "<4s6H3L5H2L",
+            b"PK\x01\x02",
+            _ZIP_VERSION,
+            _ZIP_VERSION,
+            _ZIP_UTF8_FLAG,
+            method,
+            _ZIP_TIME,
+            _ZIP_DATE,
+            crc,
+            len(data),
+            size,
+            len(encoded_name),
+            0,
+            0,
+            0,
+            0,
+            0,
+            offset,
+        )
+        central += encoded_name
+    end = struct.pack(
+        "<4s4H2LH",
+        b"PK\x05\x06",
+        0,
+        0,
+        len(names),
+        len(names),
+        len(central),
+        len(local),
+        0,
+    )
+    return bytes(local + central + end)
+
+
+def content_hash(content: bytes) -> str:
+    """Hash file content for change detection"""
+    return hashlib.sha1(content).hexdigest()
+
+
+def write_atomic(path: Path, content: bytes) -> None:
+    """Write a file by replacing it with a fully written temporary file"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+
+
+def create_output(name: str, base_dir: Path) -> OutputBackend:
+    """Create an output backend by name
+
+    Args:
+        name: one of the `OUTPUT_BACKENDS` names
+        base_dir: datapack root, used by the filesystem backend
+
+    Returns:
+        New output backend
+    """
+    if name not in OUTPUT_BACKENDS:
+        raise ValueError(f"Unknown output backend: {name}")
+    if name == "filesystem":
+        return FileSystemOutput(base_dir)
+    return OUTPUT_BACKENDS[name]()
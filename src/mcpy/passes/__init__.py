@@ -0,0 +1,63 @@
+'''
+Package of the passes that optimize a datapack after it is generated and before it is written out.
+
+Passes run on the in-memory files of a build and are enabled with keys in the datapack config.
+
+Example:
+    ``` json title="mcpy_config.json"
+    {"peephole": true, "dedupe_functions": true}
+    ```
+
+Attributes:
+    RELEASE_PASSES (tuple[str]): Config keys of the passes enabled by a release build
+'''
+from ..trace import span
+from .dedupe import dedupe_functions
+from .frames import elide_call_frames
+from .inline import inline_functions
+from .peephole import peephole
+from .reachability import remove_unused_functions
+from .slots import reuse_slots
+
+RELEASE_PASSES = ("elide_call_frames", "inline_functions", "peephole", "reuse_slots", "dedupe_functions", "remove_unused_functions")
+
+
+def release_config(config: dict) -> dict:
+    '''Get a copy of a datapack config with every pass enabled'''
+    return {**config, **{key: True for key in RELEASE_PASSES}}
+
+
+def run_passes(global_ctx) -> dict[str, any]:
+    """Run the passes enabled in the build's config on its generated files
+
+    Args:
+        global_ctx: global context of the finished build
+
+    Returns:
+        Dict of each pass that ran to its result
+    """
+    config = global_ctx.config
+    files = global_ctx.files
+    results = {}
+    if config.get("elide_call_frames"):
+        with span("elide_call_frames", "pass"):
+            results["elide_call_frames"] = elide_call_frames(files, global_ctx.scoped_functions)
+    if config.get("inline_functions"):
+        with span("inline_functions", "pass"):
+            results["inline_functions"] = inline_functions(
+                files, config["generated_dir"], config.get("inline_max_commands", 2), global_ctx.no_inline
+            )
+    if config.get("peephole"):
+        with span("peephole", "pass"):
+            results["peephole"] = peephole(files)
+    if config.get("reuse_slots"):
+        with span("reuse_slots", "pass"):
+            results["reuse_slots"] = reuse_slots(files)
+    if config.get("dedupe_functions"):
+        with span("dedupe_functions", "pass"):
+            results["dedupe_functions"] = dedupe_functions(files, config["generated_dir"])
+    if config.get("remove_unused_functions"):
+        with span("remove_unused_functions", "pass"):
+            results["remove_unused_functions"] = remove_unused_functions(files, config.get("exports", []))
+    global_ctx.pass_results.update(results)
+    return results
@@ -0,0 +1,50 @@
+'''
+Pass that merges generated functions with identical bodies.
+'''
+from __future__ import annotations
+from collections import defaultdict
+from pathlib import Path
+import hashlib
+
+from ..output import OutputFile
+from .util import function_resource, is_function_path, is_generated, rewrite_references
+
+
+def dedupe_functions(files: dict[Path, OutputFile], generated_dir: str) -> dict[str, str]:
+    """Emit each distinct generated function body once
+
+    Generated functions (e.g. execute spills) whose content is identical to another function are removed and references to them are rewritten to the remaining one, preferring functions named by the user. Rewriting references can make more bodies identical, so this repeats until nothing changes. Functions named by the user are never removed since they may be called from outside the datapack.
+
+    Args:
+        files: files of the build, updated in place
+        generated_dir: name of the directory of generated functions
+
+    Returns:
+        Dict of each removed function's resource location to the one that replaced it
+    """
+    replaced: dict[str, str] = {}
+    while True:
+        bodies: dict[str, list[Path]] = defaultdict(list)
+        for path, f in files.items():
+            if is_function_path(path):
+                digest = hashlib.sha1(f.getvalue().encode("utf-8")).digest()
+                bodies[digest].append(path)
+
+        merged = {}
+        for paths in bodies.values():
+            if len(paths) < 2:
+                continue
+            # keep a user named function if there is one, otherwise the first generated one
+            paths.sort(key=lambda p: (is_generated(p, generated_dir), p.as_posix()))
+            canonical = function_resource(paths[0])
+            for path in paths[1:]:
+                if is_generated(path, generated_dir):
+                    merged[function_resource(path)] = canonical
+                    del files[path]
+        if not merged:
+            return replaced
+
+        for old, new in replaced.items():
+            replaced[old] = merged.get(new, new)
+        replaced.update(merged)
+        rewrite_references(files, merged.get)
@@ -0,0 +1,84 @@
+'''
+Pass that removes the call stack frames of scoped functions that never use them.
+'''
+from __future__ import annotations
+from collections import defaultdict
+from pathlib import Path
+import re
+
+from ..output import OutputFile
+from .util import function_resource, is_function_path, references, set_content
+
+PUSH = "function call_stack:push"
+POP = "function call_stack:pop"
+_CALL_STACK = "call_stack:"
+# `call.*` holds the frame popped by the last scoped function, e.g. its return value
+_CALL_READ = re.compile(r"(?<![\w.])call\.\w")
+# setting the arguments of the next call does not read the last frame
+_CALL_WRITE = re.compile(r"^data modify storage call_stack: call\.\S+ (?:set|merge|append) ")
+
+
+def elide_call_frames(files: dict[Path, OutputFile], scoped: set[str]) -> list[str]:
+    """Remove the `call_stack:push` and `call_stack:pop` calls of scoped functions that do not need their own frame
+
+    A scoped function needs its frame if it reads or writes `call_stack:` storage, e.g. with a `Var` or its arguments, or calls a function that is not scoped and does. Calls to other scoped functions do not need a frame since they push their own. Calls to function tags, functions outside the datapack and macro lines could use the frame, so they keep it too. Scoped functions called by a function that reads `call.*`, e.g. the return value of a call, keep their frame so that `call.*` is not left over from an earlier call.
+
+    Args:
+        files: files of the build, updated in place
+        scoped: resource locations of the functions created with `scoped_mcfunction`
+
+    Returns:
+        Resource locations of the scoped functions whose frame was removed, sorted
+    """
+    functions = {function_resource(p): f for p, f in files.items() if is_function_path(p)}
+    lines = {r: f.getvalue().splitlines() for r, f in functions.items()}
+    calls = {r: set(references("\n".join(content))) for r, content in lines.items()}
+
+    # functions that are not scoped use the frame of whichever scoped function calls them
+    uses_frame = set()
+    callers = defaultdict(set)
+    for resource, content in lines.items():
+        if resource in scoped:
+            continue
+        if _uses_frame(content, calls[resource], functions, scoped):
+            uses_frame.add(resource)
+        for callee in calls[resource]:
+            callers[callee].add(resource)
+    pending = list(uses_frame)
+    while pending:
+        for caller in callers[pending.pop()]:
+            if caller not in uses_frame:
+                uses_frame.add(caller)
+                pending.append(caller)
+
+    # the frame popped by a call is read from call.*, which would be left over from an earlier call without it
+    read_after_call = set()
+    for resource, content in lines.items():
+        if any(_reads_call(line) for line in content):
+            read_after_call.update(calls[resource])
+
+    elided = []
+    for resource in sorted((scoped & functions.keys()) - read_after_call):
+        content = lines[resource]
+        commands = [i for i, line in enumerate(content) if line.strip() and not line.startswith("#")]
+        if len(commands) < 2 or content[commands[0]] != PUSH or content[commands[-1]] != POP:
+            continue
+        body = [line for i, line in enumerate(content) if i not in (commands[0], commands[-1])]
+        body_calls = set(references("\n".join(body)))
+        if _uses_frame(body, body_calls, functions, scoped) or body_calls & uses_frame:
+            continue
+        set_content(functions[resource], "".join(f"{line}\n" for line in body))
+        elided.append(resource)
+    return elided
+
+
+def _uses_frame(content: list[str], calls: set[str], functions: dict[str, OutputFile], scoped: set[str]) -> bool:
+    '''Whether the commands of a function may use the current call stack frame, not counting the functions it calls'''
+    if any(_CALL_STACK in line or line.startswith("$") for line in content):
+        return True
+    return any(c.startswith("#") or (c not in functions and c not in scoped) for c in calls)
+
+
+def _reads_call(line: str) -> bool:
+    '''Whether a command reads the frame of the last call from `call.*`'''
+    return _CALL_READ.search(_CALL_WRITE.sub("", line, count=1)) is not None
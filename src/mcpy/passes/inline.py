@@ -0,0 +1,132 @@
+'''
+Pass that replaces calls to small functions with the commands of the called function.
+'''
+from __future__ import annotations
+from pathlib import Path
+import re
+
+from ..output import OutputFile
+from .util import (
+    function_resource,
+    is_function_path,
+    is_function_tag_path,
+    is_generated,
+    references,
+    set_content,
+    tag_references,
+)
+
+_CALL_PATTERN = re.compile(r"^(?:execute (.+) run )?function ([a-z0-9_.\-]+:[a-z0-9_.\-/]+)$")
+_STORE_PATTERN = re.compile(r"(?:^|\s)store\s")
+_RETURN_PATTERN = re.compile(r"(?:^|\s)return(?:\s|$)")
+
+
+def inline_functions(files: dict[Path, OutputFile], generated_dir: str, max_commands: int = 2, exclude: set[str] = ()) -> int:
+    """Replace calls to small functions with their commands
+
+    A `function` command is replaced by the commands of the called function if it has at most `max_commands` commands. An `execute ... run function` command is only replaced if the function has a single command, which is run by the same `execute` instead. Functions that are recursive, use `return` or macro lines and calls that `store` the function's result or pass macro arguments are left as they are.
+
+    Generated functions that are no longer called after inlining are removed.
+
+    Args:
+        files: files of the build, updated in place
+        generated_dir: name of the directory of generated functions
+        max_commands: maximum number of commands of an inlined function
+        exclude: resource locations of the functions to never inline
+
+    Returns:
+        Number of calls that were inlined
+    """
+    paths = {function_resource(p): p for p in files if is_function_path(p)}
+    lines = {r: files[p].getvalue().splitlines() for r, p in paths.items()}
+    candidates = {
+        r for r, content in lines.items() if r not in exclude and _is_inlinable(_commands(content), max_commands)
+    }
+    calls = {r: set(references("\n".join(lines[r]))) & candidates for r in candidates}
+
+    inlined = 0
+    bodies: dict[str, list[str]] = {}
+    # inline into the small functions first, so their bodies are final before they are inlined elsewhere
+    order = _callees_first(calls)
+    ordered = set(order)
+    for resource in (*order, *(r for r in lines if r not in ordered)):
+        new_lines, count = _inline_calls(lines[resource], bodies)
+        if count:
+            inlined += count
+            lines[resource] = new_lines
+            set_content(files[paths[resource]], "".join(f"{line}\n" for line in new_lines))
+        if resource in ordered:
+            commands = _commands(new_lines)
+            if len(commands) <= max_commands:
+                bodies[resource] = commands
+
+    if inlined:
+        referenced = set()
+        for path, f in files.items():
+            if is_function_path(path):
+                referenced.update(references(f.getvalue()))
+            elif is_function_tag_path(path):
+                referenced.update(tag_references(f.getvalue()))
+        for resource in bodies:
+            if resource not in referenced and is_generated(paths[resource], generated_dir):
+                del files[paths[resource]]
+    return inlined
+
+
+def _commands(lines: list[str]) -> list[str]:
+    return [line for line in lines if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _is_inlinable(commands: list[str], max_commands: int) -> bool:
+    return len(commands) <= max_commands and not any(
+        command.startswith("$") or _RETURN_PATTERN.search(command) for command in commands
+    )
+
+
+def _callees_first(calls: dict[str, set[str]]) -> list[str]:
+    '''Order functions so each comes after the functions it calls, leaving out recursive functions'''
+    order = []
+    state = {}
+    recursive = set()
+
+    def visit(resource: str, stack: list[str]):
+        state[resource] = "visiting"
+        stack.append(resource)
+        for callee in sorted(calls[resource]):
+            if state.get(callee) == "visiting":
+                # every function on the cycle is recursive
+                recursive.update(stack[stack.index(callee):])
+            elif callee not in state:
+                visit(callee, stack)
+        stack.pop()
+        state[resource] = "done"
+        order.append(resource)
+
+    for resource in sorted(calls):
+        if resource not in state:
+            visit(resource, [])
+    # functions calling a recursive function keep the call, which is not a problem for inlining them
+    return [r for r in order if r not in recursive]
+
+
+def _inline_calls(lines: list[str], bodies: dict[str, list[str]]) -> tuple[list[str], int]:
+    '''Replace the calls to the given function bodies, returns the new lines and the number of replaced calls'''
+    result = []
+    count = 0
+    for line in lines:
+        match = _CALL_PATTERN.match(line) if "function " in line else None
+        body = bodies.get(match.group(2)) if match else None
+        prefix = match.group(1) if match else None
+        if body is None or (prefix is not None and (len(body) > 1 or _STORE_PATTERN.search(prefix))):
+            result.append(line)
+            continue
+        count += 1
+        if prefix is None:
+            result.extend(body)
+        elif body:
+            command = body[0]
+            if command.startswith("execute "):
+                result.append(f"execute {prefix} {command[len('execute '):]}")
+            else:
+                result.append(f"execute {prefix} run {command}")
+    return result, count
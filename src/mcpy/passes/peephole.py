@@ -0,0 +1,196 @@
+'''
+Pass that removes and merges redundant adjacent commands in each generated function.
+'''
+from __future__ import annotations
+from collections import Counter
+from pathlib import Path
+import re
+
+from ..ir import (
+    Command,
+    DataGet,
+    DataModify,
+    DataRemove,
+    Execute,
+    ScoreboardPlayers,
+    ScoreboardOperation,
+    TagCommand,
+    get_commands,
+    set_commands,
+)
+from ..output import OutputFile
+from .util import is_function_path
+
+MAX_SCORE = 2**31 - 1
+_TEMP_VAR_PATTERN = re.compile(r"\bthis\.var\d+\b")
+# paths without indexes or filters, so setting them cannot change which element another set of the same path matches
+_PLAIN_PATH_PATTERN = re.compile(r"[\w.+\-]+")
+# commands that do not call functions, so they cannot read or write variables other than their operands
+_SIMPLE_COMMANDS = (DataModify, DataGet, DataRemove, ScoreboardPlayers, ScoreboardOperation, TagCommand)
+
+
+def peephole(files: dict[Path, OutputFile]) -> int:
+    """Simplify redundant command sequences in every function
+
+    - Consecutive `scoreboard players add/remove` of the same score are merged into one command. Changes that cancel out become `add 0`, which still creates the score if it is not set.
+    - A `data modify ... set` immediately followed by another set of the same path is removed, if the path has no indexes or filters.
+    - A temporary `Var` copy that is read only once is removed and the read uses the copied value directly.
+
+    Args:
+        files: files of the build, updated in place
+
+    Returns:
+        Number of commands removed
+    """
+    functions = {p: f for p, f in files.items() if is_function_path(p)}
+    # temporary variables are numbered per build, count their uses across all functions
+    var_uses = Counter()
+    for f in functions.values():
+        var_uses.update(_TEMP_VAR_PATTERN.findall(f.getvalue()))
+
+    removed = 0
+    for f in functions.values():
+        commands = get_commands(f)
+        optimized = _fold_copies(_drop_overwritten_sets(_merge_score_changes(commands)), var_uses)
+        if len(optimized) != len(commands):
+            removed += len(commands) - len(optimized)
+            set_commands(f, optimized)
+    return removed
+
+
+def _merge_score_changes(commands: list[Command]) -> list[Command]:
+    result = []
+    for command in commands:
+        amount = _score_change(command)
+        previous = result[-1] if result else None
+        previous_amount = _score_change(previous) if previous is not None else None
+        if (
+            amount is not None
+            and previous_amount is not None
+            and str(command.score) == str(previous.score)
+            and not _is_random(str(command.score))
+        ):
+            total = amount + previous_amount
+            if abs(total) <= MAX_SCORE:
+                result.pop()
+                if total > 0:
+                    result.append(ScoreboardPlayers("add", command.score, total))
+                elif total < 0:
+                    result.append(ScoreboardPlayers("remove", command.score, -total))
+                else:
+                    # an unset score becomes 0 when changed, so keep one command
+                    result.append(ScoreboardPlayers("add", command.score, 0))
+                continue
+        result.append(command)
+    return result
+
+
+def _score_change(command: Command) -> int | None:
+    '''Get the signed amount of a scoreboard add or remove command'''
+    if command.__class__ is not ScoreboardPlayers or command.action not in ("add", "remove"):
+        return None
+    try:
+        amount = int(str(command.value))
+    except ValueError:
+        return None
+    return amount if command.action == "add" else -amount
+
+
+def _drop_overwritten_sets(commands: list[Command]) -> list[Command]:
+    result = []
+    for command in commands:
+        previous = result[-1] if result else None
+        if (
+            command.__class__ is DataModify
+            and previous.__class__ is DataModify
+            and command.operation == "set"
+            and previous.operation == "set"
+            and command.target_type == previous.target_type
+            and str(command.target) == str(previous.target)
+            and _is_plain_path(command.target)
+            and not _is_random(str(command.target))
+            and not _reads(command, command.target_type, command.target)
+        ):
+            result[-1] = command
+            continue
+        result.append(command)
+    return result
+
+
+def _is_plain_path(target: any) -> bool:
+    '''Whether a data path has no indexes or filters, e.g. `foo.bar` but not `foo[0]` or `foo[{x:1}]`'''
+    path = getattr(target, "path", None)
+    return path is not None and _PLAIN_PATH_PATTERN.fullmatch(str(path)) is not None
+
+
+def _reads(command: DataModify, target_type: str, target: any) -> bool:
+    '''Whether the source of a data command may read the given target'''
+    if command.source_type == "value":
+        return False
+    if command.source_type != target_type:
+        return False
+    # different selectors or positions can still be the same entity or block
+    if target_type == "storage":
+        source_namespace = getattr(command.source, "namespace", None)
+        target_namespace = getattr(target, "namespace", None)
+        return source_namespace is None or source_namespace == target_namespace
+    return True
+
+
+def _fold_copies(commands: list[Command], var_uses: Counter) -> list[Command]:
+    result = list(commands)
+    i = 0
+    while i < len(result):
+        copy = result[i]
+        var = _temp_copy_var(copy)
+        # the copy and its single read must be the only uses of the variable in the build
+        if var is None or var_uses[var] != 2:
+            i += 1
+            continue
+        source_str = str(copy.source)
+        for j in range(i + 1, len(result)):
+            command = result[j]
+            read = _replace_read(command, f"{copy.target}", copy.source_type, copy.source)
+            if read is not None:
+                result[j] = read
+                del result[i]
+                var_uses[var] = 0
+                break
+            # stop at anything that could use the variable or change the copied value
+            text = str(command)
+            if not isinstance(command, _SIMPLE_COMMANDS) or var in text or source_str in text:
+                break
+        i += 1
+    return result
+
+
+def _temp_copy_var(command: Command) -> str | None:
+    '''Get the temporary variable set by a `Var.copy()`, a `data modify storage <var> set from ...`'''
+    if (
+        command.__class__ is not DataModify
+        or command.operation != "set"
+        or command.target_type != "storage"
+        or command.source_type == "value"
+    ):
+        return None
+    match = _TEMP_VAR_PATTERN.search(str(command.target))
+    if match is None or str(command.target) != f"call_stack: {match.group(0)}":
+        return None
+    return match.group(0)
+
+
+def _replace_read(command: Command, var: str, source_type: str, source: any) -> Command | None:
+    '''Get the command reading `source` instead of the variable, or None if it does not read the variable'''
+    if command.__class__ is DataModify and command.source_type == "storage" and str(command.source) == var:
+        if str(command.target) == var:
+            return None
+        return DataModify(command.target_type, command.target, command.operation, source_type, source)
+    if command.__class__ is Execute and command.command.__class__ is DataGet:
+        get = command.command
+        if get.target_type == "storage" and str(get.target) == var and var not in command.conditions:
+            return Execute(command.conditions, DataGet(source_type, source))
+    return None
+
+
+def _is_random(selector: str) -> bool:
+    return "@r" in selector or "sort=random" in selector
@@ -0,0 +1,82 @@
+'''
+Pass that removes the functions and function tags a datapack never calls.
+'''
+from __future__ import annotations
+from fnmatch import fnmatchcase
+from pathlib import Path
+import json
+import logging
+import re
+
+from ..output import OutputFile
+from .util import FUNCTION_REF_PATTERN, function_resource, function_tag_resource, is_function_path, is_function_tag_path
+
+ROOT_TAGS = ("#minecraft:tick", "#minecraft:load")
+'''Function tags run by the game itself'''
+_REWARD_PATTERN = re.compile(r'"function"\s*:\s*"([a-z0-9_.\-]+:[a-z0-9_.\-/]+)"')
+# a function called through a macro argument, e.g. `$function $(callback)`, can be any function
+_DYNAMIC_REF_PATTERN = re.compile(r"^\$.*(?<![\w.#:-])function [^\s]*\$\(", re.MULTILINE)
+_logger = logging.getLogger(__name__)
+
+
+def remove_unused_functions(files: dict[Path, OutputFile], exports: list[str] = ()) -> list[str]:
+    """Remove every function and function tag that cannot be reached from the datapack's roots
+
+    The roots are the `#minecraft:tick` and `#minecraft:load` function tags, the functions rewarded by advancements and the exported functions and function tags. Everything they reference with `function` commands, including `execute ... run function` and `schedule function`, and the values of referenced function tags are reachable. Function tags that are not reachable are removed too, so they never list a removed function.
+
+    Nothing is removed if a reachable function calls a function named by a macro argument, since it could be any of them, or if the datapack has no roots at all, e.g. a library that did not list its `exports`.
+
+    Args:
+        files: files of the build, updated in place
+        exports: resource locations of the functions and function tags called from outside the datapack, may contain `*` wildcards, e.g. `["my_lib:api/*", "#my_lib:on_load"]`
+
+    Returns:
+        Resource locations of the removed functions and function tags, sorted
+    """
+    functions = {function_resource(p): p for p in files if is_function_path(p)}
+    tags = {function_tag_resource(p): p for p in files if is_function_tag_path(p)}
+    roots = [r for r in ROOT_TAGS if r in tags]
+    roots.extend(r for r in (*functions, *tags) if any(fnmatchcase(r, pattern) for pattern in exports))
+    for path, f in files.items():
+        if len(path.parts) > 2 and path.parts[2] == "advancements":
+            roots.extend(_REWARD_PATTERN.findall(f.getvalue()))
+    if not roots:
+        if functions:
+            _logger.warning(
+                "Not removing unused functions: no #minecraft:tick or #minecraft:load tags, advancement rewards or exports were found. List the functions called from outside the datapack in exports"
+            )
+        return []
+
+    reachable = set()
+    pending = list(roots)
+    while pending:
+        resource = pending.pop()
+        if resource in reachable:
+            continue
+        reachable.add(resource)
+        if resource in functions:
+            content = files[functions[resource]].getvalue()
+            if "function " not in content:
+                continue
+            if "$" in content and _DYNAMIC_REF_PATTERN.search(content):
+                return []
+            pending.extend(FUNCTION_REF_PATTERN.findall(content))
+        elif resource in tags:
+            pending.extend(_tag_values(files[tags[resource]]))
+
+    unused = {r: p for r, p in (*functions.items(), *tags.items()) if r not in reachable}
+    for path in unused.values():
+        del files[path]
+    return sorted(unused)
+
+
+def _tag_values(f: OutputFile) -> list[str]:
+    '''Get the functions and function tags listed by a function tag file'''
+    values = []
+    for value in json.loads(f.getvalue()).get("values", []):
+        # values can also be objects, e.g. {"id": "ns:fn", "required": false}
+        value = value["id"] if isinstance(value, dict) else value
+        if ":" not in value:
+            value = f"#minecraft:{value[1:]}" if value.startswith("#") else f"minecraft:{value}"
+        values.append(value)
+    return values
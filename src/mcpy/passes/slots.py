@@ -0,0 +1,100 @@
+'''
+Pass that reuses the names of temporary scores, variables and tags once they are no longer needed.
+'''
+from __future__ import annotations
+from collections import Counter
+from pathlib import Path
+import re
+
+from ..output import OutputFile
+from .util import FUNCTION_REF_PATTERN, function_resource, is_function_path, set_content
+
+# fake players of `Score` and `IntVar`, storage of `Var` and tags of `Tag`
+_TEMP_PATTERN = re.compile(r"(?<![\w$])\$(?:score|ivar)\d+\b|\bthis\.var\d+\b|\bmcpy_tag_\d+\b")
+
+
+def reuse_slots(files: dict[Path, OutputFile]) -> dict[str, int]:
+    """Rename the temporaries of each function so temporaries that are not alive at the same time share a name
+
+    Every `Score`, `Var` and `Tag` created without a name gets a new one, so a large datapack ends up with many fake players, storage keys and tags that are each used in a single place. A temporary only used in one function is renamed to one of the function's other temporaries of the same kind if it is set after the last use of the other one. Temporaries are kept as they are if their first use does not set their whole value, if a function is called while they are alive, since the function could call this one again, or for tags, if their last use does not remove them from every entity.
+
+    Args:
+        files: files of the build, updated in place
+
+    Returns:
+        Dict of the resource location of each function using temporaries to the most temporaries alive at once
+    """
+    uses = Counter()
+    contents = {}
+    for path, f in files.items():
+        content = f.getvalue()
+        names = set(_TEMP_PATTERN.findall(content))
+        uses.update(names)
+        if names and is_function_path(path):
+            contents[path] = content
+
+    peaks = {}
+    for path, content in contents.items():
+        lines = [line.strip() for line in content.splitlines()]
+        intervals: dict[str, list[int]] = {}
+        for i, line in enumerate(lines):
+            if line.startswith("#"):
+                continue
+            for name in _TEMP_PATTERN.findall(line):
+                interval = intervals.setdefault(name, [i, i])
+                interval[1] = i
+        peaks[function_resource(path)] = _peak(intervals.values())
+
+        calls = [i for i, line in enumerate(lines) if line.startswith("$") or FUNCTION_REF_PATTERN.search(line)]
+        renames = {}
+        free: dict[str, list[tuple[int, str]]] = {}
+        for name, (first, last) in sorted(intervals.items(), key=lambda item: item[1][0]):
+            if uses[name] != 1 or not _is_temporary(name, lines[first], lines[last]):
+                continue
+            if any(first <= i <= last for i in calls):
+                continue
+            # reuse the slot of a temporary of the same kind that was last used before this one is set
+            slots = free.setdefault(_kind(name), [])
+            reusable = [slot for slot in slots if slot[0] < first]
+            if reusable:
+                slot = min(reusable)
+                slots.remove(slot)
+                renames[name] = slot[1]
+            slots.append((last, renames.get(name, name)))
+        renames = {name: slot for name, slot in renames.items() if name != slot}
+        if renames:
+            set_content(files[path], _TEMP_PATTERN.sub(lambda m: renames.get(m.group(0), m.group(0)), content))
+    return peaks
+
+
+def _kind(name: str) -> str:
+    return name[0] if name[0] in "$t" else "m"
+
+
+def _is_temporary(name: str, first: str, last: str) -> bool:
+    '''Whether a temporary is set by its first use and, for a tag, removed from every entity by its last use'''
+    escaped = re.escape(name)
+    if first.count(name) != 1:
+        return False
+    if name.startswith("$"):
+        return bool(
+            re.match(
+                rf"scoreboard players set {escaped} \S+ -?\d+$|scoreboard players operation {escaped} \S+ = |execute store (?:result|success) score {escaped} \S+ run ",
+                first,
+            )
+        )
+    if name.startswith("this."):
+        return bool(
+            re.match(rf"(?:data modify storage call_stack: {escaped} set |execute store (?:result|success) storage call_stack: {escaped} \S+ \S+ run )", first)
+        )
+    return bool(re.match(rf"tag \S+ add {escaped}$", first)) and last == f"tag @e[tag={name}] remove {name}"
+
+
+def _peak(intervals) -> int:
+    '''Get the most intervals that overlap at once'''
+    events = sorted((i, step) for first, last in intervals for i, step in ((first, 1), (last + 1, -1)))
+    peak = alive = 0
+    for _, step in events:
+        alive += step
+        peak = max(peak, alive)
+    return peak
@@ -0,0 +1,102 @@
+'''
+Helpers shared by the passes for reading and rewriting the generated functions of a build.
+'''
+from __future__ import annotations
+from pathlib import Path
+from typing import Callable
+import re
+
+from ..output import OutputFile
+
+FUNCTION_REF_PATTERN = re.compile(r"(?<![\w.#:-])function (#?[a-z0-9_.\-]+:[a-z0-9_.\-/]+)")
+'''Matches a function reference in a command, group 1 is the resource location'''
+_TAG_VALUE_PATTERN = re.compile(r'"(#?[a-z0-9_.\-]+:[a-z0-9_.\-/]+)"')
+
+
+def is_function_path(path: Path) -> bool:
+    '''Whether a path relative to the datapack root is an mcfunction file'''
+    return len(path.parts) > 3 and path.parts[2] == "functions" and path.suffix == ".mcfunction"
+
+
+def is_function_tag_path(path: Path) -> bool:
+    '''Whether a path relative to the datapack root is a function tag file'''
+    return len(path.parts) > 4 and path.parts[2:4] == ("tags", "functions") and path.suffix == ".json"
+
+
+def function_resource(path: Path) -> str:
+    '''Get the resource location of an mcfunction file, e.g. data/ns/functions/a/b.mcfunction -> ns:a/b'''
+    return f'{path.parts[1]}:{"/".join(path.parts[3:-1] + (path.stem,))}'
+
+
+def function_path(resource: str) -> Path:
+    '''Get the path of an mcfunction file from its resource location, e.g. ns:a/b -> data/ns/functions/a/b.mcfunction'''
+    namespace, name = resource.split(":", 1)
+    return Path("data", namespace, "functions", f"{name}.mcfunction")
+
+
+def function_tag_resource(path: Path) -> str:
+    '''Get the resource location of a function tag file, e.g. data/ns/tags/functions/load.json -> #ns:load'''
+    return f'#{path.parts[1]}:{"/".join(path.parts[4:-1] + (path.stem,))}'
+
+
+def is_generated(path: Path, generated_dir: str) -> bool:
+    '''Whether a function was generated by mcpy, e.g. by an execute spill, rather than named by the user'''
+    return generated_dir in path.parts[3:-1]
+
+
+def function_files(files: dict[Path, OutputFile]) -> dict[str, OutputFile]:
+    '''Get the mcfunction files of a build keyed by resource location'''
+    return {function_resource(p): f for p, f in files.items() if is_function_path(p)}
+
+
+def set_content(f: OutputFile, content: str) -> None:
+    '''Replace the content of a generated file'''
+    f.chunks = [content]
+
+
+def references(content: str) -> list[str]:
+    '''Get the resource locations of the functions and function tags referenced by an mcfunction'''
+    return FUNCTION_REF_PATTERN.findall(content)
+
+
+def tag_references(content: str) -> list[str]:
+    '''Get the resource locations of the functions and function tags listed by a function tag'''
+    return _TAG_VALUE_PATTERN.findall(content)
+
+
+def rewrite_references(files: dict[Path, OutputFile], replace: Callable[[str], str | None]) -> int:
+    """Rewrite the function references of every function and function tag
+
+    Args:
+        files: files of the build
+        replace: function returning the new resource location for a referenced one, or None to keep it
+
+    Returns:
+        Number of files that changed
+    """
+
+    def sub(match: re.Match) -> str:
+        new = replace(match.group(1))
+        return match.group(0) if new is None else f"function {new}"
+
+    def sub_tag(match: re.Match) -> str:
+        new = replace(match.group(1))
+        return match.group(0) if new is None else f'"{new}"'
+
+    changed = 0
+    for path, f in files.items():
+        if is_function_path(path):
+            content = f.getvalue()
+            if "function " not in content:
+                continue
+            new_content = FUNCTION_REF_PATTERN.sub(sub, content)
+        elif is_function_tag_path(path):
+            content = f.getvalue()
+            new_content = _TAG_VALUE_PATTERN.sub(sub_tag, content)
+        else:
+            continue
+        if new_content != content:
+            set_content(f, new_content)
+            changed += 1
+    return changed
+
@@ -0,0 +1,168 @@
+'''
+Module for reloading a datapack's Python modules between builds.
+
+Only modules whose source changed and the modules that import them are reloaded, in dependency order.
+'''
+from __future__ import annotations
+from pathlib import Path
+from types import ModuleType
+import ast
+import importlib
+import sys
+
+
+class ModuleReloader:
+    '''Tracks the imported modules of a datapack's source directory
+
+    Attributes:
+        source_dir: directory containing the datapack's modules (e.g. src/)
+
+    Example:
+        ``` python
+        reloader = ModuleReloader(Path("src"))
+        module = importlib.import_module("src.pack")
+        reloader.update()
+        ...
+        # reloads src.helpers and src.pack if helpers.py was edited
+        reloader.reload()
+        ```
+    '''
+
+    def __init__(self, source_dir: Path) -> None:
+        self.source_dir = Path(source_dir).resolve()
+        self.__mtimes: dict[str, int] = {}
+
+    def modules(self) -> dict[str, ModuleType]:
+        """Get the loaded modules whose source file is in the source directory
+
+        Returns:
+            Dict of module names to modules
+        """
+        modules = {}
+        for name, module in list(sys.modules.items()):
+            file = getattr(module, "__file__", None)
+            if file and Path(file).resolve().is_relative_to(self.source_dir):
+                modules[name] = module
+        return modules
+
+    def update(self) -> None:
+        '''Record the current modification times of the loaded modules'''
+        self.__mtimes = {}
+        for name, module in self.modules().items():
+            mtime = _mtime(module)
+            if mtime is not None:
+                self.__mtimes[name] = mtime
+
+    def import_graph(self, modules: dict[str, ModuleType]) -> dict[str, set[str]]:
+        """Get the imports between the given modules
+
+        Args:
+            modules: Dict of module names to modules
+
+        Returns:
+            Dict of module names to the names of the given modules they import
+        """
+        graph = {}
+        for name, module in modules.items():
+            try:
+                tree = ast.parse(Path(module.__file__).read_bytes())
+            except (OSError, SyntaxError):
+                graph[name] = set()
+                continue
+            package = module.__package__ or ""
+            imported = set()
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    for alias in node.names:
+                        imported.update(_parents(alias.name))
+                elif isinstance(node, ast.ImportFrom):
+                    base = _resolve(node.module, node.level, package)
+                    if base is None:
+                        continue
+                    imported.update(_parents(base))
+                    for alias in node.names:
+                        imported.add(f"{base}.{alias.name}" if base else alias.name)
+            graph[name] = {i for i in imported if i in modules and i != name}
+        return graph
+
+    def reload(self) -> list[str]:
+        """Reload the changed modules and every module that depends on them
+
+        Returns:
+            Names of the reloaded modules in the order they were reloaded
+        """
+        modules = self.modules()
+        changed = set()
+        for name, module in modules.items():
+            mtime = _mtime(module)
+            if mtime is None:
+                # source was deleted, drop it so stale state is not kept around
+                del sys.modules[name]
+            elif mtime != self.__mtimes.get(name):
+                changed.add(name)
+        modules = {n: m for n, m in modules.items() if n in sys.modules}
+        if not changed:
+            return []
+
+        graph = self.import_graph(modules)
+        dependents = {name: set() for name in modules}
+        for name, imports in graph.items():
+            for imported in imports:
+                dependents[imported].add(name)
+
+        affected = set()
+        pending = list(changed)
+        while pending:
+            name = pending.pop()
+            if name not in affected:
+                affected.add(name)
+                pending.extend(dependents[name])
+
+        order = _topological_order(affected, graph)
+        for name in order:
+            importlib.reload(sys.modules[name])
+        self.update()
+        return order
+
+
+def _mtime(module: ModuleType) -> int | None:
+    try:
+        return Path(module.__file__).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _parents(name: str) -> list[str]:
+    parts = name.split(".")
+    return [".".join(parts[: i + 1]) for i in range(len(parts))]
+
+
+def _resolve(module: str | None, level: int, package: str) -> str | None:
+    if level == 0:
+        return module
+    parts = package.split(".") if package else []
+    if level - 1 > len(parts):
+        return None
+    base = parts[: len(parts) - (level - 1)]
+    if module:
+        base.append(module)
+    return ".".join(base)
+
+
+def _topological_order(names: set[str], graph: dict[str, set[str]]) -> list[str]:
+    '''Order module names so that imported modules come before the modules importing them'''
+    order = []
+    visited = set()
+
+    def visit(name: str):
+        if name in visited:
+            return
+        visited.add(name)
+        for dependency in sorted(graph.get(name, ())):
+            if dependency in names:
+                visit(dependency)
+        order.append(name)
+
+    for name in sorted(names):
+        visit(name)
+    return order
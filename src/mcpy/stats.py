@@ -0,0 +1,240 @@
+'''
+Module for per-resource build statistics.
+
+Statistics are collected while generators run: the time spent in each generator (excluding the files it generates inside of it) and the `execute` spills it causes. Command counts and sizes are read from the generated files once the build finishes.
+'''
+from __future__ import annotations
+from collections import defaultdict
+from pathlib import Path
+import json
+import time
+
+from .passes.util import function_resource, is_function_path
+
+_METRICS = ("commands", "bytes", "time_ms", "generated_files")
+_SIZE_METRICS = ("commands", "bytes", "generated_files")
+
+
+class BuildStats:
+    '''Collects statistics about the resources generated by a build
+
+    Example:
+        ``` python
+        stats = BuildStats()
+        build(builder, Path("my_pack"), stats=stats)
+        print(format_report(stats.report))
+        ```
+
+    Attributes:
+        report: report of the last build, see `report`
+    '''
+
+    def __init__(self) -> None:
+        self.report: dict = None
+        self.__times: dict[Path, float] = defaultdict(float)
+        self.__spills: dict[Path, int] = defaultdict(int)
+        self.__stack: list[float] = []
+
+    def begin(self) -> None:
+        '''Prepare for a new build'''
+        self.__times = defaultdict(float)
+        self.__spills = defaultdict(int)
+        self.__stack = []
+
+    def start(self) -> float:
+        '''Mark the start of a generator run'''
+        self.__stack.append(0.0)
+        return time.perf_counter()
+
+    def stop(self, path: Path, start: float) -> None:
+        """Record the time of a generator run started with `start`
+
+        Args:
+            path: path of the generated file
+            start: value returned by `start`
+        """
+        elapsed = time.perf_counter() - start
+        nested = self.__stack.pop()
+        self.__times[path] += elapsed - nested
+        if self.__stack:
+            self.__stack[-1] += elapsed
+
+    def add_spill(self, path: Path) -> None:
+        '''Record an `execute` block of the given file spilling into a generated file'''
+        self.__spills[path] += 1
+
+    def end(self, global_ctx) -> dict:
+        """Build the report from the files of a finished build
+
+        Args:
+            global_ctx: global context of the build
+
+        Returns:
+            The report
+        """
+        resources = {}
+        namespaces = {}
+        total = dict.fromkeys(("files", *_METRICS), 0)
+        # most temporaries alive at once in each function, if the reuse_slots pass ran
+        slots = global_ctx.pass_results.get("reuse_slots", {})
+        for path in sorted(global_ctx.files):
+            content = global_ctx.files[path].getvalue()
+            parts = path.parts
+            namespace = parts[1] if len(parts) > 2 else ""
+            category = parts[2] if len(parts) > 3 else ""
+            commands = count_commands(content) if path.suffix == ".mcfunction" else 0
+            source = global_ctx.sources.get(path)
+            resource = {
+                "namespace": namespace,
+                "category": category,
+                "commands": commands,
+                "bytes": len(content.encode("utf-8")),
+                "time_ms": round(self.__times.get(path, 0.0) * 1000, 3),
+                "generated_files": self.__spills.get(path, 0),
+                "source": f"{source.module}.{source.function}" if source else None,
+                "location": f"{source.file}:{source.line}" if source else None,
+            }
+            if slots and is_function_path(path):
+                resource["temp_slots"] = slots.get(function_resource(path), 0)
+            resources[path.as_posix()] = resource
+            aggregate = namespaces.setdefault(namespace, dict.fromkeys(("files", *_METRICS), 0))
+            for totals in (aggregate, total):
+                totals["files"] += 1
+                for metric in _METRICS:
+                    totals[metric] += resource[metric]
+        for totals in (*namespaces.values(), total):
+            totals["time_ms"] = round(totals["time_ms"], 3)
+        self.report = {"resources": resources, "namespaces": namespaces, "total": total}
+        return self.report
+
+
+def count_commands(content: str) -> int:
+    '''Count the commands of an mcfunction file, every line except comments and blank lines'''
+    commands = 0
+    for line in content.splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            commands += 1
+    return commands
+
+
+def write_report(report: dict, path: Path) -> None:
+    '''Write a report to a JSON file'''
+    Path(path).write_text(json.dumps(report, indent=2, sort_keys=True))
+
+
+def load_report(path: Path) -> dict:
+    '''Read a report written by `write_report`'''
+    return json.loads(Path(path).read_text())
+
+
+def diff_reports(old: dict, new: dict) -> dict:
+    """Compare two reports
+
+    Resources are compared by command count, size and number of generated files, times are included for reference but are not considered a change.
+
+    Args:
+        old: previous report
+        new: current report
+
+    Returns:
+        Dict with the "added" and "removed" resource paths and the "changed" resources and "namespaces" mapped to the old, new and delta values of each metric
+    """
+    old_resources = old["resources"]
+    new_resources = new["resources"]
+
+    def compare(before: dict, after: dict) -> dict | None:
+        metrics = {
+            m: {"old": before.get(m, 0), "new": after.get(m, 0), "delta": after.get(m, 0) - before.get(m, 0)}
+            for m in _METRICS
+        }
+        if all(metrics[m]["delta"] == 0 for m in _SIZE_METRICS):
+            return None
+        metrics["time_ms"]["delta"] = round(metrics["time_ms"]["delta"], 3)
+        return metrics
+
+    changed = {}
+    for key in sorted(old_resources.keys() & new_resources.keys()):
+        if (metrics := compare(old_resources[key], new_resources[key])) is not None:
+            changed[key] = metrics
+    namespaces = {}
+    for namespace in sorted(old["namespaces"].keys() | new["namespaces"].keys()):
+        metrics = compare(old["namespaces"].get(namespace, {}), new["namespaces"].get(namespace, {}))
+        if metrics is not None:
+            namespaces[namespace] = metrics
+    return {
+        "added": sorted(new_resources.keys() - old_resources.keys()),
+        "removed": sorted(old_resources.keys() - new_resources.keys()),
+        "changed": changed,
+        "namespaces": namespaces,
+    }
+
+
+def format_report(report: dict, limit: int = 20) -> str:
+    """Format a report as a table of namespaces and the largest functions
+
+    Args:
+        report: report to format
+        limit: maximum number of resources to list
+
+    Returns:
+        The formatted tables
+    """
+    lines = [_row("namespace", "files", *_METRICS)]
+    for namespace, totals in sorted(report["namespaces"].items()):
+        lines.append(_row(namespace, *(totals[m] for m in ("files", *_METRICS))))
+    total = report["total"]
+    lines.append(_row("total", *(total[m] for m in ("files", *_METRICS))))
+    resources = sorted(
+        report["resources"].items(),
+        key=lambda item: (-item[1]["commands"], -item[1]["bytes"], item[0]),
+    )[:limit]
+    lines.append("")
+    lines.append(_row("resource", "commands", "bytes", "time_ms", "generated_files", "source"))
+    for path, resource in resources:
+        lines.append(
+            _row(
+                path,
+                *(resource[m] for m in _METRICS),
+                resource["source"] or "",
+            )
+        )
+    slots = sorted(
+        ((r["temp_slots"], path) for path, r in report["resources"].items() if r.get("temp_slots")),
+        key=lambda item: (-item[0], item[1]),
+    )[:limit]
+    if slots:
+        lines.append("")
+        lines.append(_row("resource", "temp_slots"))
+        for count, path in slots:
+            lines.append(_row(path, count))
+    return "\n".join(lines)
+
+
+def format_diff(diff: dict) -> str:
+    '''Format the result of `diff_reports` as a table'''
+    lines = []
+    for path in diff["added"]:
+        lines.append(f"+ {path}")
+    for path in diff["removed"]:
+        lines.append(f"- {path}")
+    for title, changes in (("namespace", diff["namespaces"]), ("resource", diff["changed"])):
+        if not changes:
+            continue
+        lines.append(_row(title, *_SIZE_METRICS))
+        rows = sorted(changes.items(), key=lambda item: -abs(item[1]["bytes"]["delta"]))
+        for name, metrics in rows:
+            lines.append(
+                _row(
+                    name,
+                    *(
+                        f'{metrics[m]["old"]} -> {metrics[m]["new"]} ({metrics[m]["delta"]:+})'
+                        for m in _SIZE_METRICS
+                    ),
+                )
+            )
+    return "\n".join(lines) if lines else "No changes"
+
+
+def _row(name: str, *values: any) -> str:
+    return f"{name:<48} " + " ".join(f"{v!s:>16}" for v in values)
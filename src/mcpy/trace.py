@@ -0,0 +1,114 @@
+'''
+Module for recording a timeline of a build in the Chrome trace event format.
+
+The trace file can be opened in a trace viewer such as https://ui.perfetto.dev or chrome://tracing. Spans are only recorded while a `Tracer` is active, otherwise `span` does nothing.
+'''
+from __future__ import annotations
+from pathlib import Path
+from typing import Callable
+import contextlib
+import json
+import os
+import threading
+import time
+
+_tracer: Tracer = None
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Tracer:
+    '''Collects complete ("X") trace events
+
+    Example:
+        ``` python
+        with tracing(Tracer()) as tracer:
+            build(builder, Path("my_pack"))
+        tracer.write(Path("trace.json"))
+        ```
+    '''
+
+    def __init__(self) -> None:
+        self.events: list[dict] = []
+
+    def add(self, name: str, category: str, start_us: float, duration_us: float, args: dict = None) -> None:
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start_us,
+            "dur": duration_us,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def to_dict(self) -> dict:
+        return {"traceEvents": self.events, "displayTimeUnit": "ms"}
+
+    def write(self, path: Path) -> None:
+        '''Write the trace to a JSON file'''
+        Path(path).write_text(json.dumps(self.to_dict()))
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "category", "args", "start", "start_us")
+
+    def __init__(self, tracer: Tracer, name: str, category: str, args: dict) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start_us = time.time_ns() / 1000
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        duration_us = (time.perf_counter_ns() - self.start) / 1000
+        self.tracer.add(self.name, self.category, self.start_us, duration_us, self.args)
+
+
+def span(name: str | Callable[[], str], category: str = "build", **args: any) -> contextlib.AbstractContextManager:
+    """Context manager recording the time spent in its block
+
+    Args:
+        name: name of the span, or a function returning it so it is only computed while tracing
+        category: category of the span, e.g. import, file, bundle
+        args: extra values to show with the span
+
+    Example:
+        ``` python
+        with span("dpbuild.run", "bundle"):
+            dpbuild.run(...)
+        ```
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    if callable(name):
+        name = name()
+    return _Span(tracer, name, category, args)
+
+
+def get_tracer() -> Tracer | None:
+    '''Get the active tracer'''
+    return _tracer
+
+
+@contextlib.contextmanager
+def tracing(tracer: Tracer):
+    """Record spans to the given tracer, including spans from other threads
+
+    Args:
+        tracer: tracer to record to
+    """
+    global _tracer
+    previous = _tracer
+    _tracer = tracer
+    try:
+        yield tracer
+    finally:
+        _tracer = previous
@@ -0,0 +1,35 @@
+from mcpy.config import load_default_config
+from mcpy.mcpy import build
+from mcpy.output import MemoryOutput
+import pytest
+
+
+class BuildOutput(MemoryOutput):
+    '''Generated files of a test build'''
+
+    def function_lines(self) -> dict[str, list[str]]:
+        '''Get the commands of each generated function by file name, without the header comment'''
+        return {
+            p.stem: self.files[p].splitlines()[2:]
+            for p in self.files
+            if p.suffix == ".mcfunction"
+        }
+
+
+@pytest.fixture
+def build_output(tmp_path):
+    '''Build a datapack in memory with the default config updated by the given keys
+
+    Example:
+        ``` python
+        def test_peephole(build_output):
+            lines = build_output(builder, peephole=True).function_lines()["caller"]
+        ```
+    '''
+
+    def build_output(builder, stats=None, **config) -> BuildOutput:
+        output = BuildOutput()
+        build(builder, tmp_path, config={**load_default_config(), **config}, output=output, stats=stats)
+        return output
+
+    return build_output
@@ -5,7 +5,7 @@ def assert_as_str(actual: any, expected: str):
     assert str(actual) == expected
 
 def assert_gen_lines(actual: any, expected: str):
-    lines = '\n'.join(actual)
+    lines = '\n'.join(map(str, actual))
     assert lines == expected
 
 def test_score():
@@ -0,0 +1,35 @@
+from mcpy.cmd.selector import *
+
+
+def test_selector_str():
+    assert str(CurrentEntity) == "@s"
+    assert str(AllPlayers.where("tag", "foo")) == "@a[tag=foo]"
+    assert str(Entities.where("scores", {"obj": "1.."})) == "@e[scores={obj=1..}]"
+
+
+def test_selector_argument_order():
+    selector = (
+        Entities.where("nbt", "{OnGround:1b}")
+        .where("tag", "a")
+        .where("scores", {"obj": "1.."})
+        .where("distance", "..8")
+        .where("tag", "!b")
+        .where("type", "zombie")
+        .where("limit", 1)
+    )
+    # cheap arguments first, repeated arguments keep their order
+    assert str(selector) == "@e[type=zombie,distance=..8,limit=1,tag=a,tag=!b,scores={obj=1..},nbt={OnGround:1b}]"
+
+
+def test_find_selectors():
+    assert find_selectors("execute as @e[type=zombie,nbt={Tags:[\"a]\"]}] run kill @s") == [
+        "@e[type=zombie,nbt={Tags:[\"a]\"]}]",
+        "@s",
+    ]
+    assert find_selectors("say hello@example") == []
+    assert is_unbounded("@e")
+    assert is_unbounded("@e[tag=a,type=!player,distance=5..]")
+    assert not is_unbounded("@e[tag=a,type=zombie]")
+    assert not is_unbounded("@e[distance=..5]")
+    assert not is_unbounded("@a")
+
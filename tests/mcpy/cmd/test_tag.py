@@ -0,0 +1,113 @@
+from mcpy import *
+from mcpy.cmd import *
+
+
+def test_tagged_selectors(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def zombies():
+                zombies = Entities.where("distance", "..32").where("type", "zombie")
+                with tagged_selectors():
+                    yield f"effect give {zombies} minecraft:glowing 1"
+                    yield f"execute as {zombies} run tag @s add seen"
+                    yield "kill @e[type=skeleton]"
+                    yield "kill @e"
+                    yield "say @e"
+                    # measured from another position, so not the same entities
+                    yield f"execute at @p run kill {zombies}"
+                    yield f"tp @s {zombies}"
+
+    assert build_output(builder).function_lines()["zombies"] == [
+        "tag @e[type=zombie,distance=..32] add mcpy_tag_0",
+        "tag @e add mcpy_tag_1",
+        "effect give @e[tag=mcpy_tag_0] minecraft:glowing 1",
+        "execute as @e[tag=mcpy_tag_0] run tag @s add seen",
+        "kill @e[type=skeleton]",
+        "kill @e[tag=mcpy_tag_1]",
+        "say @e[tag=mcpy_tag_1]",
+        "execute at @p run kill @e[type=zombie,distance=..32]",
+        "tp @s @e[tag=mcpy_tag_0]",
+        "tag @e[tag=mcpy_tag_0] remove mcpy_tag_0",
+        "tag @e[tag=mcpy_tag_1] remove mcpy_tag_1",
+    ]
+
+
+def test_tagged_selectors_unchanged(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def zombies():
+                with tagged_selectors():
+                    yield "kill @e[type=zombie]"
+                    yield "execute if entity @e[type=zombie] run return 1"
+                    yield "say @e[type=zombie]"
+                with tagged_selectors(min_uses=3):
+                    yield "kill @e[type=zombie]"
+                    yield "say @e[type=zombie]"
+
+    assert build_output(builder).function_lines()["zombies"] == [
+        "kill @e[type=zombie]",
+        "execute if entity @e[type=zombie] run return 1",
+        "say @e[type=zombie]",
+        "kill @e[type=zombie]",
+        "say @e[type=zombie]",
+    ]
+
+
+def test_tagged_selectors_keep_changing_entities(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def zombies():
+                with tagged_selectors():
+                    # picks a new zombie each time
+                    yield "kill @e[type=zombie,sort=random,limit=1]"
+                    yield "kill @e[type=zombie,sort=random,limit=1]"
+                    # sorted from another position
+                    yield "execute at @r run tp @e[type=zombie,sort=nearest,limit=2] ~ ~ ~"
+                    yield "execute at @r run tp @e[type=zombie,sort=nearest,limit=2] ~ ~ ~"
+                with tagged_selectors():
+                    # changed by the block
+                    yield "tag @e[type=pig,tag=!done,limit=1] add done"
+                    yield "kill @e[type=pig,tag=!done,limit=1]"
+                    yield "say @e[type=cow,nbt={OnGround:1b}]"
+                    yield "say @e[type=cow,nbt={OnGround:1b}]"
+
+    assert build_output(builder).function_lines()["zombies"] == [
+        "kill @e[type=zombie,sort=random,limit=1]",
+        "kill @e[type=zombie,sort=random,limit=1]",
+        "execute at @r run tp @e[type=zombie,sort=nearest,limit=2] ~ ~ ~",
+        "execute at @r run tp @e[type=zombie,sort=nearest,limit=2] ~ ~ ~",
+        "tag @e[type=pig,tag=!done,limit=1] add done",
+        "kill @e[type=pig,tag=!done,limit=1]",
+        "say @e[type=cow,nbt={OnGround:1b}]",
+        "say @e[type=cow,nbt={OnGround:1b}]",
+    ]
+
+
+def test_tagged_selectors_keep_order(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def zombies():
+                with tagged_selectors():
+                    yield "tp @e[type=zombie,sort=nearest,limit=2] ~ ~ ~"
+                    yield "execute as @e[type=zombie,sort=nearest,limit=2] run say hi"
+                    yield "kill @e[type=pig,tag=marked]"
+                    yield "say @e[type=pig,tag=marked]"
+
+    assert build_output(builder).function_lines()["zombies"] == [
+        "tag @e[type=zombie,sort=nearest,limit=2] add mcpy_tag_0",
+        "tag @e[type=pig,tag=marked] add mcpy_tag_1",
+        "tp @e[tag=mcpy_tag_0,sort=nearest,limit=2] ~ ~ ~",
+        "execute as @e[tag=mcpy_tag_0,sort=nearest,limit=2] run say hi",
+        "kill @e[tag=mcpy_tag_1]",
+        "say @e[tag=mcpy_tag_1]",
+        "tag @e[tag=mcpy_tag_0] remove mcpy_tag_0",
+        "tag @e[tag=mcpy_tag_1] remove mcpy_tag_1",
+    ]
@@ -0,0 +1,114 @@
+from mcpy import *
+from mcpy.cmd import *
+
+
+def test_int_var(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def ints():
+                a = IntVar().set(5)
+                b = IntVar("$b").set(a)
+                a.add(2).remove(b).operation("*=", b)
+                IntVar().set(StoragePath("value", "py.test:io"))
+                a.to_var()
+
+    assert build_output(builder).function_lines()["ints"] == [
+        "scoreboard players set $ivar0 mcpy.var 5",
+        "scoreboard players operation $b mcpy.var = $ivar0 mcpy.var",
+        "scoreboard players add $ivar0 mcpy.var 2",
+        "scoreboard players operation $ivar0 mcpy.var -= $b mcpy.var",
+        "scoreboard players operation $ivar0 mcpy.var *= $b mcpy.var",
+        "execute store result score $ivar1 mcpy.var run data get storage py.test:io value",
+        "execute store result storage call_stack: this.var2 int 1 run scoreboard players get $ivar0 mcpy.var",
+    ]
+
+
+def test_int_var_saved_around_scoped_calls(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @scoped_mcfunction
+            def callee():
+                IntVar().set(1)
+
+            @mcfunction
+            def plain():
+                yield "say plain"
+
+            @scoped_mcfunction
+            def caller():
+                i = IntVar().set(3)
+                plain()
+                callee()
+                i.add(1)
+
+    functions = build_output(builder).function_lines()
+    assert functions["caller"] == [
+        "function call_stack:push",
+        "scoreboard players set $ivar1 mcpy.var 3",
+        "function py.test:plain",
+        "execute store result storage call_stack: this.ivar1 int 1 run scoreboard players get $ivar1 mcpy.var",
+        "function py.test:callee",
+        "execute store result score $ivar1 mcpy.var run data get storage call_stack: this.ivar1",
+        "scoreboard players add $ivar1 mcpy.var 1",
+        "function call_stack:pop",
+    ]
+    # the callee does not call scoped functions, so nothing is saved
+    assert functions["callee"] == [
+        "function call_stack:push",
+        "scoreboard players set $ivar0 mcpy.var 1",
+        "function call_stack:pop",
+    ]
+
+
+def test_dead_int_var_not_saved(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @scoped_mcfunction
+            def callee():
+                yield "say callee"
+
+            @mcfunction
+            def plain():
+                yield "say plain"
+
+            @scoped_mcfunction
+            def caller():
+                dead = IntVar().set(1)
+                live = IntVar().set(2)
+                callee()
+                live.add(1)
+                callee()
+
+            @scoped_mcfunction
+            def calls_plain():
+                i = IntVar().set(1)
+                callee()
+                plain()
+
+    functions = build_output(builder).function_lines()
+    # only the variable used after the first call is saved, nothing is used after the second one
+    assert functions["caller"] == [
+        "function call_stack:push",
+        "scoreboard players set $ivar0 mcpy.var 1",
+        "scoreboard players set $ivar1 mcpy.var 2",
+        "execute store result storage call_stack: this.ivar1 int 1 run scoreboard players get $ivar1 mcpy.var",
+        "function py.test:callee",
+        "execute store result score $ivar1 mcpy.var run data get storage call_stack: this.ivar1",
+        "scoreboard players add $ivar1 mcpy.var 1",
+        "function py.test:callee",
+        "function call_stack:pop",
+    ]
+    # functions that are not scoped run in the same frame and could read the variable
+    assert functions["calls_plain"] == [
+        "function call_stack:push",
+        "scoreboard players set $ivar2 mcpy.var 1",
+        "execute store result storage call_stack: this.ivar2 int 1 run scoreboard players get $ivar2 mcpy.var",
+        "function py.test:callee",
+        "execute store result score $ivar2 mcpy.var run data get storage call_stack: this.ivar2",
+        "function py.test:plain",
+        "function call_stack:pop",
+    ]
@@ -0,0 +1,64 @@
+from mcpy import *
+from mcpy.cmd.exec import execute
+
+
+def test_dedupe_functions(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            for i in range(3):
+                @mcfunction(name=f"fn_{i}")
+                def _fn():
+                    with execute("as @a"):
+                        for j in range(5):
+                            yield f"say {j}"
+
+            @mcfunction
+            def same_as_spill():
+                for j in range(5):
+                    yield f"say {j}"
+
+            @functions
+            def load():
+                yield {"values": ["py.test:__generated__/fn_1_1"]}
+
+    output = build_output(builder)
+    assert len(output.files) == 8
+
+    output = build_output(builder, dedupe_functions=True)
+    # user named functions are kept, generated copies of them are removed
+    assert sorted(p.name for p in output.files) == [
+        "fn_0.mcfunction",
+        "fn_1.mcfunction",
+        "fn_2.mcfunction",
+        "load.json",
+        "same_as_spill.mcfunction",
+    ]
+    for i in range(3):
+        content = output.read_text(f"data/py.test/functions/fn_{i}.mcfunction")
+        assert content.endswith("execute as @a run function py.test:same_as_spill\n")
+    assert "py.test:same_as_spill" in output.read_text("data/py.test/tags/functions/load.json")
+
+
+def test_dedupe_functions_fixpoint(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            for i in range(3):
+                @mcfunction(name=f"fn_{i}")
+                def _fn():
+                    with execute("as @a"):
+                        for j in range(4):
+                            yield f"say outer {j}"
+                        with execute("at @s"):
+                            for j in range(4):
+                                yield f"say inner {j}"
+
+    output = build_output(builder, dedupe_functions=True)
+    generated = sorted(p.as_posix() for p in output.files if "__generated__" in p.parts)
+    # the outer spills only differed by which inner spill they called
+    assert len(generated) == 2
+    bodies = {output.read_text(p) for p in generated}
+    contents = [output.read_text(f"data/py.test/functions/fn_{i}.mcfunction") for i in range(3)]
+    assert len(set(contents)) == 1
+    assert len(bodies) == 2
@@ -0,0 +1,73 @@
+from mcpy import *
+from mcpy.cmd import *
+
+
+def test_elide_call_frames(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def helper():
+                yield "say helper"
+
+            @mcfunction
+            def reads_arg():
+                tellraw(AllPlayers, arg0)
+
+            @scoped_mcfunction
+            def leaf():
+                yield "say leaf"
+                helper()
+
+            @scoped_mcfunction
+            def uses_var():
+                Var().set(1)
+
+            @scoped_mcfunction
+            def calls_scoped():
+                uses_var()
+
+            @scoped_mcfunction
+            def calls_reader():
+                reads_arg()
+
+            @scoped_mcfunction
+            def calls_tag():
+                yield "function #py.test:hooks"
+
+    unoptimized = build_output(builder).function_lines()
+    assert unoptimized["leaf"] == ["function call_stack:push", "say leaf", "function py.test:helper", "function call_stack:pop"]
+
+    functions = build_output(builder, elide_call_frames=True).function_lines()
+    assert functions["leaf"] == ["say leaf", "function py.test:helper"]
+    assert functions["calls_scoped"] == ["function py.test:uses_var"]
+    # the scoped function still pushes its own frame
+    assert functions["uses_var"] == unoptimized["uses_var"]
+    assert functions["calls_reader"] == unoptimized["calls_reader"]
+    assert functions["calls_tag"] == unoptimized["calls_tag"]
+
+
+def test_keep_frames_read_from_call(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @scoped_mcfunction
+            def quiet():
+                yield "say quiet"
+
+            @scoped_mcfunction
+            def also_called():
+                yield "say also called"
+
+            @scoped_mcfunction
+            def caller():
+                also_called(1)
+                # reads call.return, which must come from the frame quiet pops
+                ret_var.set(quiet())
+
+    unoptimized = build_output(builder).function_lines()
+    functions = build_output(builder, elide_call_frames=True).function_lines()
+    assert functions["quiet"] == unoptimized["quiet"]
+    # every scoped function called by a function reading call.* keeps its frame
+    assert functions["also_called"] == unoptimized["also_called"]
+    assert functions["caller"] == unoptimized["caller"]
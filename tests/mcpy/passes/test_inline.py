@@ -0,0 +1,112 @@
+from mcpy import *
+from mcpy.cmd.exec import execute
+
+
+def test_inline_functions(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def one():
+                yield "say one"
+
+            @mcfunction
+            def two():
+                yield "say two"
+                one()
+
+            @mcfunction
+            def three():
+                yield "say 1"
+                yield "say 2"
+                yield "say 3"
+
+            @mcfunction
+            def conditional():
+                yield "execute if entity @s[tag=a] run say conditional"
+
+            @mcfunction(inline=False)
+            def kept():
+                yield "say kept"
+
+            @mcfunction
+            def caller():
+                one()
+                two()
+                three()
+                kept()
+                yield f"execute as @a run function {one}"
+                yield f"execute as @a run function {conditional}"
+                yield f"execute as @a run function {two}"
+                yield f"execute store result score $x obj run function {one}"
+                yield f"execute if function {one} run say called"
+
+    output = build_output(builder, inline_functions=True)
+    assert output.function_lines()["two"] == ["say two", "say one"]
+    assert output.function_lines()["caller"] == [
+        "say one",
+        "say two",
+        "say one",
+        "function py.test:three",
+        "function py.test:kept",
+        "execute as @a run say one",
+        "execute as @a if entity @s[tag=a] run say conditional",
+        "execute as @a run function py.test:two",
+        "execute store result score $x obj run function py.test:one",
+        "execute if function py.test:one run say called",
+    ]
+
+
+def test_inline_functions_skips_recursion_and_return(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def countdown():
+                yield "scoreboard players remove $i obj 1"
+                yield "execute if score $i obj matches 1.. run function py.test:countdown"
+
+            @mcfunction
+            def early_return():
+                yield "return 1"
+
+            @mcfunction
+            def macro():
+                yield "$say $(text)"
+
+            @mcfunction
+            def caller():
+                countdown()
+                early_return()
+                macro()
+
+    output = build_output(builder, inline_functions=True)
+    assert output.function_lines()["caller"] == [
+        "function py.test:countdown",
+        "function py.test:early_return",
+        "function py.test:macro",
+    ]
+
+
+def test_inline_spills(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def caller():
+                with execute("as @a", limit=0):
+                    yield "say 1"
+                with execute("at @s", limit=0):
+                    yield "say 1"
+                    yield "say 2"
+
+    output = build_output(builder)
+    assert len(output.files) == 3
+
+    output = build_output(builder, inline_functions=True)
+    # the spill with one command is inlined and removed, the other is called with a prefix so it is kept
+    assert sorted(p.stem for p in output.files) == ["caller", "caller_1"]
+    assert output.function_lines()["caller"] == [
+        "execute as @a run say 1",
+        "execute at @s run function py.test:__generated__/caller_1",
+    ]
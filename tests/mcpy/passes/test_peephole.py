@@ -0,0 +1,87 @@
+from mcpy import *
+from mcpy.cmd import *
+
+
+def test_merge_score_changes(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def scores():
+                count = Score("$count", "obj")
+                count.add(1)
+                count.add(2)
+                yield "scoreboard players remove $count obj 1"
+                yield "say between"
+                count.add(1)
+                count.remove(1)
+                Score("@r", "obj").add(1)
+                Score("@r", "obj").add(1)
+
+    lines = build_output(builder, peephole=True).function_lines()["scores"]
+    assert lines == [
+        "scoreboard players add $count obj 2",
+        "say between",
+        # still creates the score if it is not set
+        "scoreboard players add $count obj 0",
+        "scoreboard players add @r obj 1",
+        "scoreboard players add @r obj 1",
+    ]
+
+
+def test_drop_overwritten_sets(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def sets():
+                foo = StoragePath("foo", "py.test:io")
+                foo.set(1)
+                foo.set(2)
+                foo.set(3)
+                # reads the previous value, must be kept
+                foo.set(StoragePath("foo.bar", "py.test:io"))
+                StoragePath("other", "py.test:io").set(4)
+                # the first set changes which element the second one matches
+                items = StoragePath("items", "py.test:io")
+                items.where({"x": 1}).set({"x": 2})
+                items.where({"x": 1}).set({"x": 3})
+                items.at(0).set(1)
+                items.at(0).set(2)
+
+    lines = build_output(builder, peephole=True).function_lines()["sets"]
+    assert lines == [
+        "data modify storage py.test:io foo set value 3",
+        "data modify storage py.test:io foo set from storage py.test:io foo.bar",
+        "data modify storage py.test:io other set value 4",
+        'data modify storage py.test:io items[{"x": 1}] set value {"x": 2}',
+        'data modify storage py.test:io items[{"x": 1}] set value {"x": 3}',
+        "data modify storage py.test:io items[0] set value 1",
+        "data modify storage py.test:io items[0] set value 2",
+    ]
+
+
+def test_fold_single_read_copies(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @scoped_mcfunction
+            def add_one():
+                ret_var.set(arg0)
+
+            @scoped_mcfunction
+            def caller():
+                a = Var().set(1)
+                b = add_one(a).copy()
+                ret_var.set(b)
+                # read twice, must be kept
+                c = a.copy()
+                ret_var.set(c)
+                arg1.set(c)
+
+    unoptimized = build_output(builder).function_lines()["caller"]
+    lines = build_output(builder, peephole=True).function_lines()["caller"]
+    assert len(lines) == len(unoptimized) - 1
+    assert "data modify storage call_stack: this.return set from storage call_stack: call.return" in lines
+    assert not any("this.var1" in line for line in lines)
+    assert "data modify storage call_stack: this.var2 set from storage call_stack: this.var0" in lines
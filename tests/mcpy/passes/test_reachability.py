@@ -0,0 +1,105 @@
+from mcpy import *
+from mcpy.cmd.exec import execute
+from mcpy.config import load_default_config
+from mcpy.passes import release_config
+from pathlib import Path
+
+
+def test_remove_unused_functions(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def helper():
+                yield "say helper"
+
+            @mcfunction
+            def scheduled():
+                yield "say scheduled"
+
+            @mcfunction
+            def tick():
+                with execute("as @a"):
+                    helper()
+                    for i in range(5):
+                        yield f"say {i}"
+                yield f"schedule function {scheduled} 1t"
+
+            @mcfunction
+            def unused():
+                helper()
+
+            @mcfunction
+            def on_event():
+                yield "say event"
+
+            @functions
+            def event():
+                yield {"values": [str(on_event)]}
+
+            with directory("api"):
+                @mcfunction
+                def public():
+                    yield "say public"
+
+        with namespace("minecraft"):
+            @functions(name="tick")
+            def tick_tag():
+                yield {"values": [str(tick)]}
+
+    output = build_output(builder, remove_unused_functions=True, exports=["py.test:api/*"])
+    files = sorted(p.as_posix() for p in output.files)
+    assert files == [
+        "data/minecraft/tags/functions/tick.json",
+        "data/py.test/functions/__generated__/tick_0.mcfunction",
+        "data/py.test/functions/api/public.mcfunction",
+        "data/py.test/functions/helper.mcfunction",
+        "data/py.test/functions/scheduled.mcfunction",
+        "data/py.test/functions/tick.mcfunction",
+    ]
+
+    output = build_output(builder, remove_unused_functions=True, exports=["py.test:api/*", "#py.test:event"])
+    files = sorted(p.as_posix() for p in output.files)
+    assert "data/py.test/tags/functions/event.json" in files
+    assert "data/py.test/functions/on_event.mcfunction" in files
+    assert "data/py.test/functions/unused.mcfunction" not in files
+
+
+def test_remove_unused_functions_dynamic_calls(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def unused():
+                yield "say unused"
+
+            @mcfunction
+            def load():
+                yield "$function $(callback)"
+
+        with namespace("minecraft"):
+            @functions(name="load")
+            def load_tag():
+                yield {"values": [str(load)]}
+
+    output = build_output(builder, remove_unused_functions=True)
+    assert Path("data/py.test/functions/unused.mcfunction") in output.files
+
+
+def test_remove_unused_functions_without_roots(build_output, caplog):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def api():
+                yield "say api"
+
+    output = build_output(builder, remove_unused_functions=True)
+    assert Path("data/py.test/functions/api.mcfunction") in output.files
+    assert "Not removing unused functions" in caplog.text
+
+
+def test_release_config():
+    config = release_config(load_default_config())
+    assert config["peephole"] and config["dedupe_functions"] and config["remove_unused_functions"]
+    assert not load_default_config()["remove_unused_functions"]
@@ -0,0 +1,76 @@
+from mcpy import *
+from mcpy.cmd import *
+from mcpy.stats import BuildStats, format_report
+
+
+def test_reuse_slots(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def temps():
+                for i in range(3):
+                    score = Score(objective="obj")
+                    yield f"scoreboard players set {score} {i}"
+                    yield f"tellraw @a {{\"score\": {{\"name\": \"{score.holder}\", \"objective\": \"obj\"}}}}"
+                for i in range(2):
+                    var = Var().set(i)
+                    yield f"tellraw @a {{\"nbt\": \"this.{var.path}\", \"storage\": \"call_stack:\"}}"
+                with tagged_selectors():
+                    yield "kill @e[type=zombie]"
+                    yield "say @e[type=zombie]"
+                with tagged_selectors():
+                    yield "kill @e[type=husk]"
+                    yield "say @e[type=husk]"
+
+    lines = build_output(builder, reuse_slots=True).function_lines()["temps"]
+    assert [line for line in lines if "set" in line] == [
+        "scoreboard players set $score0 obj 0",
+        "scoreboard players set $score0 obj 1",
+        "scoreboard players set $score0 obj 2",
+        "data modify storage call_stack: this.var3 set value 0",
+        "data modify storage call_stack: this.var3 set value 1",
+    ]
+    assert lines[-4:] == [
+        "tag @e[type=husk] add mcpy_tag_0",
+        "kill @e[tag=mcpy_tag_0]",
+        "say @e[tag=mcpy_tag_0]",
+        "tag @e[tag=mcpy_tag_0] remove mcpy_tag_0",
+    ]
+
+
+def test_reuse_slots_keeps_live_temporaries(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def helper():
+                yield "say helper"
+
+            @mcfunction
+            def temps():
+                a = Score(objective="obj")
+                yield f"scoreboard players add {a} 1"
+                yield f"say {a}"
+                b = Score(objective="obj")
+                yield f"scoreboard players set {b} 1"
+                helper()
+                yield f"say {b}"
+                c = Score(objective="obj")
+                yield f"scoreboard players set {c} 1"
+                d = Score(objective="obj")
+                yield f"scoreboard players operation {d} = {c}"
+                yield f"say {c} {d}"
+
+            @mcfunction
+            def shared():
+                yield "scoreboard players set $score2 obj 1"
+                yield "say $score2"
+
+    stats = BuildStats()
+    functions = build_output(builder, stats=stats, reuse_slots=True).function_lines()
+    # a is read before it is set, b is alive during a call, c is alive while d is set and $score2 is used by two functions
+    assert functions["temps"] == build_output(builder).function_lines()["temps"]
+    assert stats.report["resources"]["data/py.test/functions/temps.mcfunction"]["temp_slots"] == 2
+    assert stats.report["resources"]["data/py.test/functions/helper.mcfunction"]["temp_slots"] == 0
+    assert "temp_slots" in format_report(stats.report)
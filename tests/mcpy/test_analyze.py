@@ -0,0 +1,124 @@
+import json
+
+from mcpy import *
+from mcpy.analyze import analyze, call_graph, format_analysis, to_dot, to_json
+
+
+@datapack
+def tick_pack():
+    with namespace("py.test"):
+        @mcfunction
+        def helper():
+            yield "say 1"
+            yield "say 2"
+
+        @mcfunction
+        def later():
+            yield "say later"
+
+        @mcfunction
+        def main():
+            helper()
+            yield f"execute as @e[type=zombie] run function {helper}"
+            yield f"execute as @e[limit=1] run function {helper}"
+            yield f"schedule function {later} 1t"
+
+        @mcfunction
+        def loop():
+            yield "scoreboard players remove $i obj 1"
+            yield "execute if score $i obj matches 1.. run function py.test:loop"
+
+        @mcfunction
+        def unused():
+            yield "say unused"
+
+    with namespace("minecraft"):
+        @functions
+        def tick():
+            yield {"values": [str(main), str(loop)]}
+
+
+def test_call_graph(build_output):
+    graph = call_graph(build_output(tick_pack).files, entities=10)
+    assert graph["py.test:helper"].cost == 2
+    # 4 commands, the zombie call runs once per entity
+    assert graph["py.test:main"].commands == 13
+    assert graph["py.test:main"].cost == 13 + 2 + 10 * 2 + 2
+    assert graph["py.test:loop"].recursive
+    assert graph["py.test:loop"].cost == 2
+    assert graph["#minecraft:tick"].cost == graph["py.test:main"].cost + 2
+
+
+def test_analyze(build_output):
+    files = build_output(tick_pack).files
+    analysis = analyze(files)
+    assert analysis.commands_per_tick == 4 + 2 + 2 + 2 + 2
+    assert "py.test:unused" not in analysis.functions
+    assert "py.test:later" not in analysis.functions
+    assert analysis.problems == []
+
+    analysis = analyze(files, budget=5)
+    assert analysis.problems == [
+        "#minecraft:tick runs up to 12 commands, over the budget of 5",
+        "py.test:main runs up to 10 commands, over the budget of 5",
+    ]
+
+    analysis = analyze(files, max_chain_length=9)
+    assert analysis.problems == [
+        "py.test:main runs up to 10 commands in one chain, over the maxCommandChainLength of 9: py.test:main -> py.test:helper"
+    ]
+    assert "Worst case commands per tick: 12" in format_analysis(analysis)
+
+
+def test_export(build_output):
+    analysis = analyze(build_output(tick_pack).files, entities=3)
+    data = json.loads(json.dumps(to_json(analysis)))
+    assert data["functions"]["py.test:main"]["calls"][1] == {"target": "py.test:helper", "weight": 3}
+    dot = to_dot(analysis)
+    assert dot.startswith("digraph")
+    assert '"py.test:main" -> "py.test:helper" [label="x3"];' in dot
+    assert '"#minecraft:tick" -> "py.test:loop";' in dot
+
+
+def test_analyze_without_tick(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def main():
+                yield "say hi"
+
+    analysis = analyze(build_output(builder).files, budget=0)
+    assert analysis.commands_per_tick == 0
+    assert analysis.problems == []
+    assert format_analysis(analysis) == "No #minecraft:tick function tag"
+
+
+def test_analyze_selectors(build_output):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def main():
+                yield "kill @e[tag=a]"
+                yield "kill @e[tag=a]"
+                yield "execute as @e[type=zombie] run say @s"
+
+            @mcfunction
+            def unused():
+                yield "kill @e"
+
+        with namespace("minecraft"):
+            @functions
+            def tick():
+                yield {"values": [str(main)]}
+
+    files = build_output(builder).files
+    analysis = analyze(files)
+    assert analysis.functions["py.test:main"].selectors == {"@e[tag=a]": 2, "@e[type=zombie]": 1, "@s": 1}
+    assert analysis.problems == []
+    assert analysis.warnings == [
+        "py.test:main uses @e[tag=a] 2 time(s), which checks every loaded entity each tick. Add a type, limit or distance"
+    ]
+    assert "Warning: py.test:main uses @e[tag=a]" in format_analysis(analysis)
+    assert analyze(files, strict=True).problems == analysis.warnings
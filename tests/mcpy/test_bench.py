@@ -0,0 +1,51 @@
+from dataclasses import replace
+from mcpy import datapack, namespace, mcfunction
+from mcpy.bench import BENCHMARKS, CountingOutput, run_benchmarks, save_results, load_results, compare_results
+from mcpy.mcpy import build
+from mcpy.stats import BuildStats
+
+
+def test_benchmarks_run(tmp_path):
+    results = run_benchmarks(scale=0.001)
+    assert [r.name for r in results] == list(BENCHMARKS)
+    for result in results:
+        assert result.commands > 0
+        assert result.files > 0
+        assert result.commands_per_sec > 0
+        assert result.peak_memory > 0
+
+    huge = next(r for r in results if r.name == "huge_function")
+    assert huge.commands == 1000
+    assert huge.files == 1
+    tiny = next(r for r in results if r.name == "tiny_functions")
+    assert tiny.commands == tiny.files == 10
+
+    baseline_path = tmp_path / "baseline.json"
+    save_results(results, baseline_path)
+    baseline = load_results(baseline_path)
+    assert compare_results(results, baseline) == {}
+
+    slower = [replace(huge, commands_per_sec=huge.commands_per_sec / 2, peak_memory=huge.peak_memory * 2)]
+    regressions = compare_results(slower, baseline)
+    assert list(regressions) == ["huge_function"]
+    assert len(regressions["huge_function"]) == 2
+    # baselines of a different size are not compared
+    assert compare_results([replace(slower[0], size=5)], baseline) == {}
+
+
+def test_counting_output_matches_stats(tmp_path):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def foo():
+                yield "say one"
+                yield ""
+                yield "  # indented comment"
+                yield "  say two"
+                yield "\n"
+
+    output = CountingOutput()
+    stats = BuildStats()
+    build(builder, tmp_path, output=output, stats=stats)
+    assert output.commands == stats.report["total"]["commands"] == 2
@@ -0,0 +1,189 @@
+from mcpy.bundle_cache import BundleCache
+from mcpy.mcpy import _McpyDatapack
+from pathlib import Path
+from textwrap import dedent
+
+
+def create_pack(pack_dir: Path, name: str, include: list[str] = ()):
+    (pack_dir / "src").mkdir(parents=True)
+    (pack_dir / "pack.mcmeta").write_text('{"pack": {"pack_format": 10,"description": ""}}')
+    (pack_dir / "src" / "pack.py").write_text(dedent(f'''\
+        from mcpy import *
+
+        @datapack(include={list(include)!r})
+        def {name}():
+            with namespace("{name}"):
+                @mcfunction
+                def hello():
+                    yield "say {name}"
+        '''))
+
+
+def test_bundle_cache(tmp_path):
+    cache = BundleCache(tmp_path / "cache")
+    calls = []
+
+    def bundle(output_dir: Path):
+        calls.append(output_dir)
+        (output_dir / "bundled.txt").write_text("bundled")
+
+    assert cache.get("key") is None
+    entry = cache.put("key", bundle, lambda: "stamp")
+    assert (entry / "bundled.txt").read_text() == "bundled"
+    assert cache.get("key", "stamp") == entry
+    assert cache.get("key", "other stamp") is None
+    assert len(calls) == 1
+    assert [p.name for p in (tmp_path / "cache").iterdir() if p.name.endswith(".tmp")] == []
+
+
+def test_bundle_key(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    create_pack(tmp_path / "lib", "lib")
+    create_pack(tmp_path / "pack_a", "pack_a", ["lib"])
+    create_pack(tmp_path / "pack_b", "pack_b", ["lib"])
+
+    lib_key = _McpyDatapack(Path("lib")).bundle_key()
+    pack_a_key = _McpyDatapack(Path("pack_a")).bundle_key()
+    # the shared library hashes the same when reached from another datapack
+    assert _McpyDatapack(Path("lib")).bundle_key() == lib_key
+    assert _McpyDatapack(Path("pack_b")).bundle_key() != pack_a_key
+
+    # changing a dependency's sources changes the key of datapacks including it
+    (tmp_path / "lib" / "src" / "helpers.py").write_text("VALUE = 1\n")
+    assert _McpyDatapack(Path("lib")).bundle_key() != lib_key
+    assert _McpyDatapack(Path("pack_a")).bundle_key() != pack_a_key
+    # building does not change the key
+    new_lib_key = _McpyDatapack(Path("lib")).bundle_key()
+    _McpyDatapack(Path("lib")).build()
+    assert _McpyDatapack(Path("lib")).bundle_key() == new_lib_key
+
+
+def test_dependency_graph(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    create_pack(tmp_path / "graph_lib", "graph_lib")
+    create_pack(tmp_path / "graph_a", "graph_a", ["graph_lib"])
+    create_pack(tmp_path / "graph_b", "graph_b", ["graph_lib"])
+    create_pack(tmp_path / "graph_main", "graph_main", ["graph_a", "graph_b"])
+
+    graph = _McpyDatapack(Path("graph_main")).dependency_graph()
+    assert graph == {
+        tmp_path / "graph_lib": [],
+        tmp_path / "graph_a": [tmp_path / "graph_lib"],
+        tmp_path / "graph_b": [tmp_path / "graph_lib"],
+        tmp_path / "graph_main": [tmp_path / "graph_a", tmp_path / "graph_b"],
+    }
+
+    # dependencies are bundled in worker processes, so record them in a file
+    log = tmp_path / "bundled.txt"
+    log.write_text("")
+
+    def fake_run(path, dep_paths, output_dir):
+        with log.open("a") as f:
+            f.write(Path(path).resolve().name + "\n")
+        (Path(output_dir) / Path(path).resolve().name).mkdir()
+
+    monkeypatch.setattr("mcpy.mcpy.dpbuild.run", fake_run)
+    cache = BundleCache(tmp_path / "cache")
+    _McpyDatapack(Path("graph_main")).bundle_dependencies(cache)
+    # each dependency is bundled once, after the dependencies it includes
+    bundled = log.read_text().split()
+    assert sorted(bundled) == ["graph_a", "graph_b", "graph_lib"]
+    assert bundled[0] == "graph_lib"
+    log.write_text("")
+    _McpyDatapack(Path("graph_main")).bundle_dependencies(cache)
+    assert log.read_text() == ""
+
+
+def test_dependency_failure(tmp_path, monkeypatch):
+    import pytest
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    create_pack(tmp_path / "broken_lib", "broken_lib")
+    create_pack(tmp_path / "broken_main", "broken_main", ["broken_lib"])
+    (tmp_path / "broken_lib" / "src" / "pack.py").write_text(
+        (tmp_path / "broken_lib" / "src" / "pack.py").read_text().replace('yield "say broken_lib"', 'raise ValueError("broken")')
+    )
+
+    with pytest.raises(RuntimeError, match="broken_lib"):
+        _McpyDatapack(Path("broken_main")).bundle_dependencies(BundleCache(tmp_path / "cache"))
+
+
+def test_dependency_cycle(tmp_path, monkeypatch):
+    import pytest
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    create_pack(tmp_path / "cycle_a", "cycle_a", ["cycle_b"])
+    create_pack(tmp_path / "cycle_b", "cycle_b", ["cycle_a"])
+
+    with pytest.raises(ValueError, match="cycle"):
+        _McpyDatapack(Path("cycle_a")).dependency_graph()
+
+
+def test_build_all_shared_dependency(tmp_path, monkeypatch):
+    from mcpy.mcpy import build_all
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv("MCPY_CACHE_DIR", str(tmp_path / "cache"))
+    create_pack(tmp_path / "shared_lib", "shared_lib")
+    create_pack(tmp_path / "shared_a", "shared_a", ["shared_lib"])
+    create_pack(tmp_path / "shared_b", "shared_b", ["shared_lib"])
+    log = tmp_path / "bundled.txt"
+    log.write_text("")
+
+    def fake_run(path, dep_paths, output_dir):
+        with log.open("a") as f:
+            f.write(Path(path).resolve().name + "\n")
+        (Path(output_dir) / Path(path).resolve().name).mkdir(parents=True, exist_ok=True)
+
+    monkeypatch.setattr("mcpy.mcpy.dpbuild.run", fake_run)
+    results = build_all([Path("shared_a"), Path("shared_b")], output_dir=tmp_path / "out", jobs=4)
+    assert all(isinstance(t, float) for t in results.values()), results
+    # the shared library is bundled once, before the datapacks including it
+    assert sorted(log.read_text().split()) == ["shared_a", "shared_b", "shared_lib"]
+    assert log.read_text().split()[0] == "shared_lib"
+
+
+def test_bundle_dependencies_trace(tmp_path, monkeypatch):
+    import os
+    from mcpy.trace import Tracer, tracing
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    create_pack(tmp_path / "traced_lib", "traced_lib")
+    create_pack(tmp_path / "traced_main", "traced_main", ["traced_lib"])
+    monkeypatch.setattr("mcpy.mcpy.dpbuild.run", lambda path, dep_paths, output_dir: None)
+
+    with tracing(Tracer()) as tracer:
+        _McpyDatapack(Path("traced_main")).bundle_dependencies(BundleCache(tmp_path / "cache"))
+    # spans recorded by the worker process bundling the dependency
+    worker_events = [e for e in tracer.events if e["pid"] != os.getpid()]
+    assert any(e["cat"] == "bundle" and "traced_lib" in e["name"] for e in worker_events)
+    assert any(e["cat"] == "file" for e in worker_events)
+
+
+def test_bundle_dependencies_release(tmp_path, monkeypatch):
+    import json
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    create_pack(tmp_path / "release_lib", "release_lib")
+    create_pack(tmp_path / "release_main", "release_main", ["release_lib"])
+    (tmp_path / "release_lib" / "src" / "pack.py").write_text(
+        (tmp_path / "release_lib" / "src" / "pack.py").read_text()
+        + "        @mcfunction\n        def unused():\n            yield 'say unused'\n"
+    )
+    (tmp_path / "release_lib" / "mcpy_config.json").write_text(json.dumps({"exports": ["release_lib:hello"]}))
+    monkeypatch.setattr("mcpy.mcpy.dpbuild.run", lambda path, dep_paths, output_dir: None)
+    functions = tmp_path / "release_lib" / "data" / "release_lib" / "functions"
+    cache = BundleCache(tmp_path / "cache")
+
+    _McpyDatapack(Path("release_main")).bundle_dependencies(cache)
+    assert (functions / "unused.mcfunction").is_file()
+
+    # the library is built with the release passes of the datapack including it
+    datapack = _McpyDatapack(Path("release_main"))
+    datapack.release = True
+    assert datapack.bundle_key() != _McpyDatapack(Path("release_main")).bundle_key()
+    datapack.bundle_dependencies(cache)
+    assert (functions / "hello.mcfunction").is_file()
+    assert not (functions / "unused.mcfunction").exists()
@@ -0,0 +1,63 @@
+from mcpy import *
+from mcpy.context import Context, init_context, switch_context
+from pathlib import Path
+import pytest
+
+
+def test_context_derive(tmp_path):
+    with init_context(tmp_path, {}):
+        ctx = Context(namespace="py.test", file_category="functions", sub_dir_stack=(Path("a"),))
+        named = ctx.derive(file_name="foo.mcfunction")
+        assert ctx.file_name is None
+        assert named.get_resource_path() == "py.test:a/foo"
+        assert named.get_relative_path() == Path("data/py.test/functions/a/foo.mcfunction")
+        assert named.get_path() == tmp_path / "data/py.test/functions/a/foo.mcfunction"
+
+        # paths are cached and kept when unrelated fields change
+        opened = named.derive(opened_file=object())
+        assert opened.get_relative_path() is named.get_relative_path()
+        renamed = named.derive(file_name="bar.mcfunction")
+        assert renamed.get_resource_path() == "py.test:a/bar"
+
+        assert ctx.derive() == ctx
+        assert ctx.derive(namespace="other") != ctx
+        with pytest.raises(TypeError):
+            ctx.derive(unknown=1)
+
+
+def test_update_context(tmp_path):
+    with init_context(tmp_path, {}, namespace="py.test"):
+        outer = get_context()
+        with directory("a"), directory("b/c"):
+            assert get_context().sub_dir_stack == (Path("a"), Path("b/c"))
+            with update_context(file_category="functions", file_name="foo.mcfunction"):
+                assert get_context().get_resource_path() == "py.test:a/b/c/foo"
+        assert get_context() is outer
+        with pytest.raises(RuntimeError):
+            with switch_context(outer.derive(namespace="other")):
+                assert get_context().namespace == "other"
+                raise RuntimeError()
+        assert get_context() is outer
+
+
+def test_context_frozen(tmp_path):
+    with init_context(tmp_path, {}):
+        ctx = Context(namespace="py.test", file_category="functions", file_name="foo.mcfunction")
+        assert hash(ctx) == hash(ctx.derive())
+        assert {ctx: 1}[ctx.derive()] == 1
+        assert hash(ctx.derive(scope_vars=[])) == hash(ctx)
+        ctx.get_path()
+        with pytest.raises(AttributeError):
+            ctx.namespace = "other"
+        with pytest.raises(AttributeError):
+            del ctx.file_name
+        assert ctx.namespace == "py.test"
+
+
+def test_update_context_deferred(tmp_path):
+    with init_context(tmp_path, {}, namespace="py.test"):
+        update = update_context(file_category="functions")
+        with directory("a"):
+            with update:
+                assert get_context().sub_dir_stack == (Path("a"),)
+                assert get_context().file_category == "functions"
@@ -0,0 +1,109 @@
+from mcpy import *
+from mcpy.mcpy import build
+from mcpy.cmd import *
+from mcpy.incremental import BuildCache
+from mcpy.output import MemoryOutput
+from pathlib import Path
+
+
+def test_incremental_build(tmp_path):
+    greeting = "hello"
+    counts = []
+
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def greet():
+                yield f"say {greeting}"
+
+            for i in range(3):
+                @mcfunction(name=f"loop_{i}")
+                def _loop():
+                    with execute("if score $holder obj matches 1"):
+                        for n in range(i + 4):
+                            yield f"say {n}"
+
+            @mcfunction
+            def after():
+                score = Score()
+                yield f"scoreboard players set {score} 1"
+
+    cache = BuildCache()
+    full = MemoryOutput()
+    build(builder, tmp_path, output=full)
+    first = MemoryOutput()
+    build(builder, tmp_path, output=first, cache=cache)
+    assert first.files == full.files
+    assert cache.hits == 0
+
+    second = MemoryOutput()
+    build(builder, tmp_path, output=second, cache=cache)
+    assert second.files == full.files
+    assert cache.misses == 0
+
+    # only the changed generator is executed again
+    greeting = "world"
+    third = MemoryOutput()
+    build(builder, tmp_path, output=third, cache=cache)
+    assert cache.misses == 1
+    assert third.read_text("data/py.test/functions/greet.mcfunction").endswith("say world\n")
+    assert third.files.keys() == full.files.keys()
+
+
+def test_resource_sources(tmp_path):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def spills():
+                with execute("if score $holder obj matches 1"):
+                    for n in range(5):
+                        yield f"say {n}"
+
+    from mcpy.context import get_global_context
+
+    sources = {}
+
+    @datapack
+    def recording_builder():
+        builder()
+        sources.update(get_global_context().sources)
+
+    build(recording_builder, tmp_path, output=MemoryOutput())
+    main = sources[Path("data/py.test/functions/spills.mcfunction")]
+    spill = sources[Path("data/py.test/functions/__generated__/spills_0.mcfunction")]
+    assert main.function.endswith("builder.<locals>.spills")
+    assert main.file == __file__
+    assert spill == main
+
+
+def test_incremental_containers(tmp_path):
+    literal = {"items": [{"id": "minecraft:stone", "Count": 1}], "open": True}
+    names = ["a", "b"]
+
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            for i in range(3):
+                @mcfunction(name=f"store_{i}")
+                def _store():
+                    StoragePath(f"chest{i}", "py.test:data").set(literal)
+
+            @mcfunction
+            def greet():
+                for name in names:
+                    yield f"say {name}"
+
+    cache = BuildCache()
+    build(builder, tmp_path, output=MemoryOutput(), cache=cache)
+    build(builder, tmp_path, output=MemoryOutput(), cache=cache)
+    assert cache.hits == 4 and cache.misses == 0
+
+    # containers are hashed by their content when the generator is called
+    literal["open"] = False
+    names.append("c")
+    output = MemoryOutput()
+    build(builder, tmp_path, output=output, cache=cache)
+    assert cache.misses == 4
+    assert output.read_text("data/py.test/functions/greet.mcfunction").endswith("say c\n")
@@ -0,0 +1,96 @@
+from mcpy import *
+from mcpy.cmd import *
+from mcpy.ir import *
+from mcpy.mcpy import build
+from mcpy.output import OutputBackend
+
+
+class CaptureOutput(OutputBackend):
+    def flush(self, files):
+        self.files = files
+
+
+def test_command_nodes():
+    score = Score('$x', 'obj')
+    assert next(score_add(score, 2)) == ScoreboardPlayers('add', score, 2)
+    assert str(next(score_add(score, 2))) == 'scoreboard players add $x obj 2'
+    storage = StoragePath('foo', 'ns:io')
+    assert str(next(data_modify_set(storage, {'a': 1}))) == 'data modify storage ns:io foo set value {"a": 1}'
+    assert str(next(data_modify_set(storage, StoragePath('bar', 'ns:io')))) == 'data modify storage ns:io foo set from storage ns:io bar'
+    assert str(Execute('as @a', FunctionCall('ns:foo'))) == 'execute as @a run function ns:foo'
+    assert str(Execute('', Raw('say hi'))) == 'execute run say hi'
+
+
+def test_parse_command():
+    assert parse_command('function ns:foo') == FunctionCall('ns:foo')
+    assert parse_command('scoreboard players add $x obj 1') == ScoreboardPlayers('add', Score('$x', 'obj'), '1')
+    assert parse_command('execute as @a at @s run tag @s add foo') == Execute('as @a at @s', TagCommand('@s', 'add', 'foo'))
+    assert parse_command('say hello') == Raw('say hello')
+    assert parse_command('# comment') == Raw('# comment')
+
+
+def test_function_commands(tmp_path):
+    @datapack
+    def builder():
+        with namespace('py.test'):
+            @mcfunction
+            def foo():
+                score = Score('$x', 'obj')
+                score.add(1)
+                yield 'scoreboard players add $x obj 2'
+                with execute('as @a'):
+                    yield 'say hi'
+
+    output = CaptureOutput()
+    build(builder, tmp_path, output=output)
+    f = output.files[next(p for p in output.files if p.name == 'foo.mcfunction')]
+    content = f.getvalue()
+    assert content.endswith(
+        'scoreboard players add $x obj 1\n'
+        'scoreboard players add $x obj 2\n'
+        'execute as @a run say hi\n'
+    )
+
+    commands = get_commands(f)
+    assert commands[0] == Raw('# Built with mcpy (https://github.com/dthigpen/mcpy)')
+    assert commands[1] == Raw('')
+    assert commands[2:] == [
+        ScoreboardPlayers('add', Score('$x', 'obj'), 1),
+        ScoreboardPlayers('add', Score('$x', 'obj'), '2'),
+        Execute('as @a', Raw('say hi')),
+    ]
+    set_commands(f, commands[:3])
+    assert f.getvalue().endswith('\nscoreboard players add $x obj 1\n')
+
+
+def test_values_are_serialized_when_written(tmp_path):
+    @datapack
+    def builder():
+        with namespace('py.test'):
+            @mcfunction
+            def foo():
+                d = {}
+                component = {'text': 'a'}
+                for i in range(3):
+                    d['n'] = i
+                    StoragePath('k', 'x:s').set(d)
+                tellraw('@a', component)
+                component['text'] = 'b'
+
+    output = CaptureOutput()
+    build(builder, tmp_path, output=output)
+    content = output.files[next(p for p in output.files if p.name == 'foo.mcfunction')].getvalue()
+    assert content.endswith(
+        'data modify storage x:s k set value {"n": 0}\n'
+        'data modify storage x:s k set value {"n": 1}\n'
+        'data modify storage x:s k set value {"n": 2}\n'
+        'tellraw @a [{"text": "a"}]\n'
+    )
+
+
+def test_command_concatenation():
+    command = next(score_add(Score('$x', 'obj'), 2))
+    assert isinstance(command, ScoreboardPlayers)
+    assert '$' + command == '$scoreboard players add $x obj 2'
+    assert command + '\n' == 'scoreboard players add $x obj 2\n'
+    assert ''.join(map(str, tag_add('@s', 'foo'))) == 'tag @s add foo'
@@ -1,10 +1,12 @@
 from mcpy import *
-from mcpy.mcpy import build
+from mcpy.mcpy import _main, build, build_all
 from mcpy.cmd import *
 from mcpy.cmd.nbt import *
 from pathlib import Path
 import json
+import sys
 from textwrap import dedent
+import pytest
 
 def create_datapack_env(root_dir: Path):
     mcmeta = root_dir / "pack.mcmeta"
@@ -173,6 +175,60 @@ def test_mcfunction_execute(tmp_path):
             say cmd 4
             say cmd 5
             ''')
+    assert file_path.read_text() == expected_execute_content
+
+
+def test_execute_spill_stays_open(tmp_path):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def long_block():
+                with execute('if score $holder obj matches 1'):
+                    for i in range(100):
+                        yield f'say {i}'
+
+    build(builder, tmp_path)
+    gen_path = Path("data/py.test/functions/__generated__/long_block_0.mcfunction")
+    # created once and reopened once, not once per line
+    assert [p for p, _ in get_global_context().file_log].count(gen_path) == 2
+    lines = (tmp_path / gen_path).read_text().splitlines()
+    assert lines[2:] == [f'say {i}' for i in range(100)]
+
+
+def test_execute_spill_names(tmp_path):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            with directory("__generated__"):
+                @mcfunction
+                def spilled_0():
+                    yield 'say taken'
+
+            @mcfunction
+            def spilled():
+                for _ in range(2):
+                    with execute('as @a'):
+                        for i in range(5):
+                            yield f'say {i}'
+
+    # leftover files from a previous build do not affect the names
+    stale = tmp_path / "data/py.test/functions/__generated__/spilled_1.mcfunction"
+    stale.parent.mkdir(parents=True)
+    stale.write_text("say stale")
+    build(builder, tmp_path)
+    gen_dir = tmp_path / "data/py.test/functions/__generated__"
+    assert sorted(p.name for p in gen_dir.iterdir()) == [
+        "spilled_0.mcfunction",
+        "spilled_1.mcfunction",
+        "spilled_2.mcfunction",
+    ]
+    assert (gen_dir / "spilled_0.mcfunction").read_text().endswith("say taken\n")
+    content = (tmp_path / "data/py.test/functions/spilled.mcfunction").read_text()
+    assert "function py.test:__generated__/spilled_1\n" in content
+    assert "function py.test:__generated__/spilled_2\n" in content
+
+
 def test_cmd_common():
     assert str(Selector('@z').where('tag','py.test')) == '@z[tag=py.test]'
     assert str(CurrentEntity.where('tag','py.test').where('scores',{'py.score':'1..3'})) == '@s[tag=py.test,scores={py.score=1..3}]'
@@ -206,3 +262,39 @@ def test_nbt():
     assert str(nbt.key('ingredient').where(123)) == 'this.ingredient[123]'
     obj = NbtObj({'foo':'bar','123':'aaa'})
     assert str(obj) == '{"foo": "bar", "123": "aaa"}'
+
+
+def test_build_all(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    for name in ("pack_a", "pack_b"):
+        pack_dir = tmp_path / name
+        (pack_dir / "src").mkdir(parents=True)
+        create_datapack_env(pack_dir)
+        (pack_dir / "src" / "pack.py").write_text(dedent(f'''\
+            from mcpy import *
+
+            @datapack
+            def {name}():
+                with namespace("{name}"):
+                    @mcfunction
+                    def hello():
+                        yield "say {name}"
+            '''))
+
+    results = build_all([Path("pack_a"), Path("pack_b")], jobs=2)
+    assert all(isinstance(t, float) for t in results.values())
+    for name in ("pack_a", "pack_b"):
+        file_path = tmp_path / name / "data" / name / "functions" / "hello.mcfunction"
+        assert file_path.read_text().endswith(f"say {name}\n")
+
+
+def test_build_rejects_bundling_without_data_dir(tmp_path, monkeypatch, capsys):
+    for options in (["--zip", str(tmp_path)], ["--backend", "memory"], ["--backend", "null"]):
+        monkeypatch.setattr(sys, "argv", ["mcpy", "build", "-o", str(tmp_path / "out"), *options])
+        with pytest.raises(SystemExit) as e:
+            _main()
+        assert e.value.code == 2
+        assert "--output-dir bundles the data directory" in capsys.readouterr().err
+    with pytest.raises(ValueError):
+        build_all([Path("pack")], output_dir=tmp_path / "out", backend="memory")
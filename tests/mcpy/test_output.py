@@ -0,0 +1,126 @@
+from mcpy import *
+from mcpy.mcpy import build
+from mcpy.output import MemoryOutput, NullOutput, FileSystemOutput
+from pathlib import Path
+
+
+def test_memory_output(tmp_path):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def hello():
+                yield "say hello"
+
+            @functions
+            def load():
+                yield {"values": [str(hello)]}
+
+    output = MemoryOutput()
+    build(builder, tmp_path, output=output)
+
+    assert not (tmp_path / "data").exists()
+    assert output.read_text("data/py.test/functions/hello.mcfunction").endswith("say hello\n")
+    assert output.exists(Path("data/py.test/tags/functions/load.json"))
+
+
+def test_null_output(tmp_path):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            for i in range(10):
+                @mcfunction(name=f"fn_{i}")
+                def _fn():
+                    yield f"say {i}"
+
+    output = NullOutput()
+    build(builder, tmp_path, output=output)
+
+    assert not (tmp_path / "data").exists()
+    assert output.file_count == 10
+    assert output.byte_count > 0
+
+
+def test_filesystem_output_manifest(tmp_path):
+    greeting = "hello"
+    include_extra = True
+
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def greet():
+                yield f"say {greeting}"
+
+            @mcfunction
+            def other():
+                yield "say other"
+
+            if include_extra:
+                with directory("extra"):
+                    @mcfunction
+                    def extra():
+                        yield "say extra"
+
+    build(builder, tmp_path)
+    greet_path = tmp_path / "data/py.test/functions/greet.mcfunction"
+    other_path = tmp_path / "data/py.test/functions/other.mcfunction"
+    extra_path = tmp_path / "data/py.test/functions/extra/extra.mcfunction"
+    assert extra_path.is_file()
+    other_mtime = other_path.stat().st_mtime_ns
+
+    # unchanged files are not rewritten
+    output = FileSystemOutput(tmp_path)
+    build(builder, tmp_path, output=output)
+    assert output.written == []
+    assert output.deleted == []
+
+    # only changed files are rewritten and stale outputs are removed
+    greeting = "world"
+    include_extra = False
+    output = FileSystemOutput(tmp_path)
+    build(builder, tmp_path, output=output)
+    assert output.written == [Path("data/py.test/functions/greet.mcfunction")]
+    assert output.deleted == [Path("data/py.test/functions/extra/extra.mcfunction")]
+    assert greet_path.read_text().endswith("say world\n")
+    assert other_path.stat().st_mtime_ns == other_mtime
+    assert not extra_path.exists()
+    assert not extra_path.parent.exists()
+    assert not (tmp_path / ".mcpy_staging").exists()
+
+
+def test_zip_output(tmp_path):
+    import zipfile
+    from mcpy.output import ZipOutput
+
+    (tmp_path / "pack.mcmeta").write_text('{"pack": {"pack_format": 10,"description": ""}}')
+
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            for i in range(20):
+                @mcfunction(name=f"fn_{i}")
+                def _fn():
+                    yield f"say {i}"
+
+    zip_path = tmp_path / "dist" / "pack.zip"
+    build(builder, tmp_path, output=ZipOutput(zip_path, base_dir=tmp_path))
+    content = zip_path.read_bytes()
+
+    with zipfile.ZipFile(zip_path) as z:
+        assert z.testzip() is None
+        names = z.namelist()
+        assert names == sorted(names)
+        assert "pack.mcmeta" in names
+        assert z.read("data/py.test/functions/fn_3.mcfunction").decode().endswith("say 3\n")
+        assert z.getinfo("pack.mcmeta").date_time == (1980, 1, 1, 0, 0, 0)
+    assert not (tmp_path / "data").exists()
+
+    # deterministic across builds
+    build(builder, tmp_path, output=ZipOutput(zip_path, base_dir=tmp_path))
+    assert zip_path.read_bytes() == content
+
+    build(builder, tmp_path, output=ZipOutput(zip_path, compression_level=0))
+    with zipfile.ZipFile(zip_path) as z:
+        assert z.testzip() is None
+        assert "pack.mcmeta" not in z.namelist()
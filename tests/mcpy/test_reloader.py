@@ -0,0 +1,46 @@
+from mcpy.reloader import ModuleReloader
+from textwrap import dedent
+import importlib
+import os
+import sys
+
+
+def write_module(path, content, mtime):
+    path.write_text(dedent(content))
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_reload_changed_and_dependents(tmp_path, monkeypatch):
+    pkg = tmp_path / "reloader_pkg"
+    pkg.mkdir()
+    write_module(pkg / "__init__.py", "", 1)
+    write_module(pkg / "helpers.py", "GREETING = 'hello'\n", 1)
+    write_module(pkg / "other.py", "VALUE = 1\n", 1)
+    write_module(
+        pkg / "pack.py",
+        """\
+        from .helpers import GREETING
+        from . import other
+        MESSAGE = f"say {GREETING}"
+        """,
+        1,
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    try:
+        pack = importlib.import_module("reloader_pkg.pack")
+        reloader = ModuleReloader(pkg)
+        reloader.update()
+        assert reloader.reload() == []
+
+        write_module(pkg / "helpers.py", "GREETING = 'world'\n", 2)
+        assert reloader.reload() == ["reloader_pkg.helpers", "reloader_pkg.pack"]
+        assert sys.modules["reloader_pkg.pack"].MESSAGE == "say world"
+
+        # deleted modules are dropped
+        os.remove(pkg / "other.py")
+        reloader.reload()
+        assert "reloader_pkg.other" not in sys.modules
+    finally:
+        for name in list(sys.modules):
+            if name.startswith("reloader_pkg"):
+                del sys.modules[name]
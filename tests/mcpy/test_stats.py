@@ -0,0 +1,82 @@
+from mcpy import *
+from mcpy.cmd.exec import execute
+from mcpy.incremental import BuildCache
+from mcpy.mcpy import build
+from mcpy.trace import Tracer, tracing
+from mcpy.output import NullOutput
+from mcpy.stats import BuildStats, diff_reports, format_report, format_diff
+
+
+def test_build_stats(tmp_path):
+    count = 5
+
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def outer():
+                yield "say outer"
+                with execute("as @a"):
+                    for i in range(count):
+                        yield f"say {i}"
+
+            @functions
+            def load():
+                yield {"values": [str(outer)]}
+
+        with namespace("py.other"):
+            @mcfunction
+            def other():
+                yield "say other"
+
+    stats = BuildStats()
+    build(builder, tmp_path, output=NullOutput(), stats=stats)
+    report = stats.report
+
+    outer_stats = report["resources"]["data/py.test/functions/outer.mcfunction"]
+    assert outer_stats["commands"] == 2
+    assert outer_stats["generated_files"] == 1
+    assert outer_stats["source"].endswith("builder.<locals>.outer")
+    assert outer_stats["time_ms"] >= 0
+    spill_stats = report["resources"]["data/py.test/functions/__generated__/outer_0.mcfunction"]
+    assert spill_stats["commands"] == count
+    assert spill_stats["source"] == outer_stats["source"]
+    assert report["resources"]["data/py.test/tags/functions/load.json"]["commands"] == 0
+
+    assert report["namespaces"]["py.test"]["files"] == 3
+    assert report["namespaces"]["py.test"]["commands"] == count + 2
+    assert report["namespaces"]["py.other"]["commands"] == 1
+    assert report["total"]["generated_files"] == 1
+    assert "py.other" in format_report(report)
+
+    count = 8
+    build(builder, tmp_path, output=NullOutput(), stats=stats)
+    diff = diff_reports(report, stats.report)
+    assert diff["added"] == diff["removed"] == []
+    assert list(diff["changed"]) == ["data/py.test/functions/__generated__/outer_0.mcfunction"]
+    assert diff["changed"]["data/py.test/functions/__generated__/outer_0.mcfunction"]["commands"]["delta"] == 3
+    assert list(diff["namespaces"]) == ["py.test"]
+    assert "5 -> 8 (+3)" in format_diff(diff)
+    assert format_diff(diff_reports(report, report)) == "No changes"
+
+
+def test_build_stats_incremental(tmp_path):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def outer():
+                with execute("as @a"):
+                    for i in range(5):
+                        yield f"say {i}"
+
+    cache = BuildCache()
+    stats = BuildStats()
+    build(builder, tmp_path, output=NullOutput(), stats=stats, cache=cache)
+    with tracing(Tracer()) as tracer:
+        build(builder, tmp_path, output=NullOutput(), stats=stats, cache=cache)
+    assert cache.hits == 1
+    # spills of reused generators are still reported
+    assert stats.report["resources"]["data/py.test/functions/outer.mcfunction"]["generated_files"] == 1
+    assert stats.report["total"]["generated_files"] == 1
+    assert [e["name"] for e in tracer.events if e["cat"] == "cache"] == ["py.test:outer"]
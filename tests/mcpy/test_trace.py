@@ -0,0 +1,36 @@
+from mcpy import *
+from mcpy.cmd.exec import execute
+from mcpy.mcpy import build
+from mcpy.output import NullOutput
+from mcpy.trace import Tracer, tracing, span
+
+
+def test_trace_build(tmp_path):
+    @datapack
+    def builder():
+        with namespace("py.test"):
+            @mcfunction
+            def hello():
+                with execute("as @a"):
+                    for i in range(5):
+                        yield f"say {i}"
+
+    with tracing(Tracer()) as tracer:
+        build(builder, tmp_path, output=NullOutput())
+
+    categories = {e["cat"] for e in tracer.events}
+    assert {"datapack", "namespace", "file", "execute", "output"} <= categories
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in tracer.events)
+    names = [e["name"] for e in tracer.events if e["cat"] == "file"]
+    assert "py.test:hello" in names
+
+    trace_path = tmp_path / "trace.json"
+    tracer.write(trace_path)
+    assert trace_path.read_text().startswith('{"traceEvents": [')
+
+
+def test_span_inactive():
+    called = []
+    with span(lambda: called.append(1) or "name"):
+        pass
+    assert called == []